@@ -0,0 +1,181 @@
+"""
+Round-trip benchmark for the SQL Server catalog extractors.
+
+Runs the sequential, per-database batched and cross-database batched
+extractors against a fake pyodbc connection that serves a synthetic catalog
+and sleeps `latency` seconds per round trip, then prints round trips per
+database and wall time for each mode. No server is needed.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_catalog_round_trips --dbs 20 --tables 200 --latency 0.005
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# keep the snapshots written by the extractors out of the real snapshot store
+os.environ.setdefault("LIFTR_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="liftr_bench_"))
+
+from connection.Remote_sql_server import (
+    fetch_sql_server_metadata,
+    fetch_sql_server_metadata_batched,
+)
+
+FIELDS = (
+    "db_ordinal row_ordinal name TABLE_SCHEMA TABLE_NAME create_date modify_date "
+    "COLUMN_NAME DATA_TYPE CHARACTER_MAXIMUM_LENGTH NUMERIC_PRECISION NUMERIC_SCALE IS_NULLABLE COLUMN_DEFAULT "
+    "CONSTRAINT_NAME FOREIGN_SCHEMA FOREIGN_TABLE FOREIGN_COLUMN "
+    "schema_name table_name index_id index_name index_type row_count reserved_kb used_kb data_kb partitions"
+)
+Row = namedtuple("Row", FIELDS, defaults=(None,) * len(FIELDS.split()))
+
+DB_FROM = re.compile(r"FROM \[([^\]]+)\]")
+DB_ORDINAL = re.compile(r"SELECT (\d+) AS db_ordinal")
+STAMP = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def build_catalog(n_dbs, n_tables, n_columns, n_objects):
+    """Synthetic catalog: {db: {"tables": [...], "columns": [...], "views": [...], ...}}."""
+    catalog = {}
+    for d in range(n_dbs):
+        db = f"bench_db_{d}"
+        tables = [Row(TABLE_SCHEMA="dbo", TABLE_NAME=f"table_{t:05d}", create_date=STAMP, modify_date=STAMP)
+                  for t in range(n_tables)]
+        columns = [Row(TABLE_SCHEMA="dbo", TABLE_NAME=t.TABLE_NAME, COLUMN_NAME=f"col_{c}",
+                       DATA_TYPE="nvarchar", CHARACTER_MAXIMUM_LENGTH=50, IS_NULLABLE="YES")
+                   for t in tables for c in range(n_columns)]
+        foreign_keys = [Row(TABLE_SCHEMA="dbo", TABLE_NAME=t.TABLE_NAME, CONSTRAINT_NAME=f"FK_{t.TABLE_NAME}",
+                            COLUMN_NAME="col_1", FOREIGN_SCHEMA="dbo", FOREIGN_TABLE=tables[i - 1].TABLE_NAME,
+                            FOREIGN_COLUMN="col_0")
+                        for i, t in enumerate(tables) if i]
+        volume = [Row(schema_name="dbo", table_name=t.TABLE_NAME, index_id=1, index_name=f"PK_{t.TABLE_NAME}",
+                      index_type="CLUSTERED", row_count=1000, reserved_kb=144, used_kb=136, data_kb=128,
+                      partitions=1)
+                  for t in tables]
+        entry = {"tables": tables, "columns": columns, "foreign_keys": foreign_keys, "data_volume": volume}
+        for kind in ("views", "procedures", "functions", "triggers"):
+            entry[kind] = [Row(name=f"{kind}_{i:04d}", create_date=STAMP, modify_date=STAMP)
+                           for i in range(n_objects)]
+        catalog[db] = entry
+    return catalog
+
+
+def _kind(statement):
+    if "dm_db_partition_stats" in statement:
+        return "data_volume"
+    if "sys.foreign_key_columns" in statement:
+        return "foreign_keys"
+    if "INFORMATION_SCHEMA.TABLES" in statement:
+        return "tables"
+    if "INFORMATION_SCHEMA.COLUMNS" in statement:
+        return "columns"
+    if "sys.views" in statement:
+        return "views"
+    if "sys.procedures" in statement:
+        return "procedures"
+    if "FUNCTION" in statement:
+        return "functions"
+    if "sys.triggers" in statement:
+        return "triggers"
+    raise ValueError(f"Unexpected statement: {statement[:80]}")
+
+
+class FakeCursor:
+    """Minimal pyodbc cursor: every execute() is one round trip, batches yield one result set per SELECT."""
+
+    def __init__(self, catalog, stats, latency):
+        self.catalog = catalog
+        self.stats = stats
+        self.latency = latency
+        self._results = []
+        self._pos = 0
+
+    def execute(self, sql, *params):
+        self.stats["round_trips"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        statements = [s.strip() for s in sql.split(";")]
+        self._results = [self._run(s) for s in statements if s and s.upper() != "SET NOCOUNT ON"]
+        self._pos = 0
+        return self
+
+    def _run(self, statement):
+        if "sys.databases" in statement:
+            return [Row(name=db) for db in self.catalog]
+        rows = []
+        for part in statement.split("UNION ALL"):
+            db = DB_FROM.search(part).group(1)
+            ordinal = DB_ORDINAL.search(part)
+            ordinal = int(ordinal.group(1)) if ordinal else 0
+            for i, row in enumerate(self.catalog[db][_kind(part)]):
+                rows.append(row._replace(db_ordinal=ordinal, row_ordinal=i + 1))
+        return rows
+
+    def fetchall(self):
+        return self._results[self._pos] if self._pos < len(self._results) else []
+
+    def nextset(self):
+        self._pos += 1
+        return self._pos < len(self._results)
+
+
+class FakeConnection:
+    def __init__(self, catalog, stats, latency):
+        self.catalog = catalog
+        self.stats = stats
+        self.latency = latency
+
+    def cursor(self):
+        return FakeCursor(self.catalog, self.stats, self.latency)
+
+    def close(self):
+        pass
+
+
+def run(n_dbs=20, n_tables=200, n_columns=8, n_objects=20, latency=0.005):
+    catalog = build_catalog(n_dbs, n_tables, n_columns, n_objects)
+    modes = {
+        "sequential": lambda c: fetch_sql_server_metadata(c),
+        "batched": lambda c: fetch_sql_server_metadata_batched(c)[0],
+        "cross_database": lambda c: fetch_sql_server_metadata_batched(c, cross_database=True)[0],
+    }
+    results = {}
+    reference = None
+    for mode, extract in modes.items():
+        stats = {"round_trips": 0}
+        start = time.perf_counter()
+        metadata = extract(FakeConnection(catalog, stats, latency))
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = metadata
+        results[mode] = {
+            "round_trips": stats["round_trips"],
+            # the sys.databases listing is one extra round trip shared by all databases
+            "round_trips_per_db": (stats["round_trips"] - 1) / n_dbs,
+            "seconds": elapsed,
+            "same_output": metadata == reference,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dbs", type=int, default=20)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated seconds per round trip")
+    args = parser.parse_args()
+
+    results = run(args.dbs, args.tables, args.columns, args.objects, args.latency)
+    print(f"\n{'mode':<16}{'round trips':>12}{'per db':>10}{'seconds':>10}  same output")
+    for mode, r in results.items():
+        print(f"{mode:<16}{r['round_trips']:>12}{r['round_trips_per_db']:>10.2f}{r['seconds']:>10.3f}  {r['same_output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Round-trip benchmark for the PostgreSQL metadata extractor.
+
+Compares the set-based extractor (connection.postgres.fetch_database_metadata)
+with the previous per-table extractor, reproduced below as
+legacy_database_metadata, against a fake psycopg2 cursor that serves a
+synthetic catalog and sleeps `latency` seconds per round trip. Prints round
+trips and wall time per mode and checks that both produce the same output.
+No server is needed (psycopg2 must be importable).
+
+Run from the Backend directory:
+    python -m benchmarks.bench_postgres_metadata --schemas 2 --tables 500 --latency 0.0005
+"""
+import argparse
+import time
+
+from connection.postgres import fetch_database_metadata
+
+
+def legacy_database_metadata(db_cursor):
+    """The per-table extractor this benchmark compares against (seven queries per table)."""
+    db_meta = {}
+    db_cursor.execute("""
+        SELECT schema_name
+        FROM information_schema.schemata
+        WHERE schema_name NOT LIKE 'pg_%'
+        AND schema_name <> 'information_schema';
+    """)
+    schemas = [s[0] for s in db_cursor.fetchall()]
+    db_meta["schemas"] = {}
+    for schema in schemas:
+        schema_meta = {}
+        db_meta["schemas"][schema] = schema_meta
+        db_cursor.execute("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = %s AND table_type = 'BASE TABLE';
+        """, (schema,))
+        tables = [t[0] for t in db_cursor.fetchall()]
+        schema_meta["tables"] = {}
+        for table in tables:
+            table_meta = {}
+            schema_meta["tables"][table] = table_meta
+            full_table = f"{schema}.{table}"
+
+            db_cursor.execute("""
+                SELECT column_name, data_type, is_nullable, column_default
+                FROM information_schema.columns
+                WHERE table_schema=%s AND table_name=%s;
+            """, (schema, table))
+            table_meta["columns"] = [
+                {"column_name": row[0], "data_type": row[1], "nullable": row[2], "default": row[3]}
+                for row in db_cursor.fetchall()
+            ]
+            db_cursor.execute("""
+                SELECT kcu.column_name
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.key_column_usage kcu
+                    ON tc.constraint_name=kcu.constraint_name
+                WHERE tc.constraint_type='PRIMARY KEY'
+                AND tc.table_schema=%s
+                AND tc.table_name=%s;
+            """, (schema, table))
+            table_meta["primary_keys"] = [pk[0] for pk in db_cursor.fetchall()]
+            db_cursor.execute("""
+                SELECT tc.constraint_name, kcu.column_name,
+                       ccu.table_schema AS foreign_schema,
+                       ccu.table_name AS foreign_table,
+                       ccu.column_name AS foreign_column
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.key_column_usage kcu
+                    ON tc.constraint_name = kcu.constraint_name
+                JOIN information_schema.constraint_column_usage ccu
+                    ON tc.constraint_name = ccu.constraint_name
+                WHERE tc.constraint_type='FOREIGN KEY'
+                AND tc.table_schema=%s
+                AND tc.table_name=%s;
+            """, (schema, table))
+            table_meta["foreign_keys"] = [
+                {"constraint_name": row[0], "column": row[1], "foreign_schema": row[2],
+                 "foreign_table": row[3], "foreign_column": row[4]}
+                for row in db_cursor.fetchall()
+            ]
+            db_cursor.execute("""
+                SELECT indexname, indexdef
+                FROM pg_indexes
+                WHERE schemaname=%s AND tablename=%s;
+            """, (schema, table))
+            table_meta["indexes"] = [{"index_name": row[0], "definition": row[1]} for row in db_cursor.fetchall()]
+            db_cursor.execute("""
+                SELECT trigger_name, event_manipulation, action_statement
+                FROM information_schema.triggers
+                WHERE event_object_schema=%s
+                AND event_object_table=%s;
+            """, (schema, table))
+            table_meta["triggers"] = [
+                {"trigger_name": row[0], "event": row[1], "action": row[2]} for row in db_cursor.fetchall()
+            ]
+            db_cursor.execute("""
+                SELECT conname, pg_get_constraintdef(oid)
+                FROM pg_constraint
+                WHERE contype='c'
+                AND connamespace = (
+                    SELECT oid FROM pg_namespace WHERE nspname=%s
+                )
+                AND conrelid = %s::regclass;
+            """, (schema, full_table))
+            table_meta["check_constraints"] = [{"name": row[0], "definition": row[1]} for row in db_cursor.fetchall()]
+            db_cursor.execute("""
+                SELECT inhrelid::regclass::text
+                FROM pg_inherits
+                WHERE inhparent = %s::regclass;
+            """, (full_table,))
+            table_meta["partitions"] = [p[0] for p in db_cursor.fetchall()]
+
+        db_cursor.execute("""
+            SELECT routine_name, routine_type, data_type
+            FROM information_schema.routines
+            WHERE specific_schema=%s;
+        """, (schema,))
+        schema_meta["functions"] = [{"name": r[0], "type": r[1], "return_type": r[2]} for r in db_cursor.fetchall()]
+        db_cursor.execute("""
+            SELECT proname
+            FROM pg_proc
+            JOIN pg_namespace ON pg_proc.pronamespace = pg_namespace.oid
+            WHERE nspname=%s AND prokind='p';
+        """, (schema,))
+        schema_meta["procedures"] = [p[0] for p in db_cursor.fetchall()]
+        db_cursor.execute("""
+            SELECT table_name, view_definition
+            FROM information_schema.views
+            WHERE table_schema=%s;
+        """, (schema,))
+        schema_meta["views"] = [{"name": v[0], "definition": v[1]} for v in db_cursor.fetchall()]
+    return db_meta
+
+
+# query marker -> catalog key, checked in order
+KINDS = [
+    ("information_schema.schemata", "schemas"),
+    ("information_schema.tables", "tables"),
+    ("information_schema.columns", "columns"),
+    ("'PRIMARY KEY'", "primary_keys"),
+    ("'FOREIGN KEY'", "foreign_keys"),
+    ("pg_indexes", "indexes"),
+    ("information_schema.triggers", "triggers"),
+    ("contype='c'", "check_constraints"),
+    ("pg_inherits", "partitions"),
+    ("information_schema.routines", "functions"),
+    ("prokind='p'", "procedures"),
+    ("information_schema.views", "views"),
+]
+SCHEMA_KINDS = {"tables", "functions", "procedures", "views"}
+
+
+def build_catalog(n_schemas, n_tables, n_columns):
+    """Synthetic catalog: {kind: {(schema, table) or schema: [row payload tuples]}}."""
+    catalog = {kind: {} for _, kind in KINDS}
+    catalog["schemas"] = [f"schema_{s}" for s in range(n_schemas)]
+    for schema in catalog["schemas"]:
+        tables = [f"table_{t:05d}" for t in range(n_tables)]
+        catalog["tables"][schema] = [(t,) for t in tables]
+        for i, t in enumerate(tables):
+            key = (schema, t)
+            catalog["columns"][key] = [(f"col_{c}", "integer" if c == 0 else "character varying",
+                                        "NO" if c == 0 else "YES", None) for c in range(n_columns)]
+            catalog["primary_keys"][key] = [("col_0",)]
+            catalog["foreign_keys"][key] = [(f"{t}_fkey", "col_1", schema, tables[i - 1], "col_0")] if i else []
+            catalog["indexes"][key] = [(f"{t}_pkey", f"CREATE UNIQUE INDEX {t}_pkey ON {schema}.{t} USING btree (col_0)")]
+            catalog["triggers"][key] = []
+            catalog["check_constraints"][key] = [(f"{t}_col_0_check", "CHECK ((col_0 > 0))")]
+            catalog["partitions"][key] = []
+        catalog["functions"][schema] = [(f"fn_{i}", "FUNCTION", "integer") for i in range(5)]
+        catalog["procedures"][schema] = [(f"proc_{i}",) for i in range(3)]
+        catalog["views"][schema] = [(f"view_{i}", "SELECT 1") for i in range(5)]
+    return catalog
+
+
+class FakeCursor:
+    """psycopg2-like cursor that answers both the per-table and the set-based catalog queries."""
+
+    def __init__(self, catalog, stats, latency):
+        self.catalog = catalog
+        self.stats = stats
+        self.latency = latency
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.stats["round_trips"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        kind = next(kind for marker, kind in KINDS if marker in sql)
+        if kind == "schemas":
+            self._rows = [(s,) for s in self.catalog["schemas"]]
+            return
+        rows = self.catalog[kind]
+        if params and isinstance(params[0], list):
+            # set-based query: every row of the requested schemas, prefixed with its owner
+            if kind in SCHEMA_KINDS:
+                self._rows = [(schema,) + row for schema in params[0] for row in rows.get(schema, [])]
+            else:
+                self._rows = [key + row for key, payload in rows.items() if key[0] in params[0] for row in payload]
+        elif kind in SCHEMA_KINDS:
+            self._rows = list(rows.get(params[0], []))
+        elif kind == "partitions":
+            self._rows = list(rows.get(tuple(params[0].split(".", 1)), []))
+        else:
+            key = (params[0], params[-1].split(".", 1)[-1])
+            self._rows = list(rows.get(key, []))
+
+    def fetchall(self):
+        return self._rows
+
+
+def run(n_schemas=2, n_tables=500, n_columns=8, latency=0.0005):
+    catalog = build_catalog(n_schemas, n_tables, n_columns)
+    modes = {
+        "per_table": legacy_database_metadata,
+        "set_based": lambda cursor: fetch_database_metadata(cursor, "bench"),
+    }
+    results = {}
+    reference = None
+    for mode, extract in modes.items():
+        stats = {"round_trips": 0}
+        start = time.perf_counter()
+        metadata = extract(FakeCursor(catalog, stats, latency))
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = metadata
+        results[mode] = {
+            "round_trips": stats["round_trips"],
+            "seconds": elapsed,
+            "same_output": metadata == reference,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemas", type=int, default=2)
+    parser.add_argument("--tables", type=int, default=500, help="tables per schema")
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated seconds per round trip")
+    args = parser.parse_args()
+
+    results = run(args.schemas, args.tables, args.columns, args.latency)
+    print(f"\n{'mode':<12}{'round trips':>12}{'seconds':>10}  same output")
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['round_trips']:>12}{r['seconds']:>10.3f}  {r['same_output']}")
+    speedup = results["per_table"]["seconds"] / max(results["set_based"]["seconds"], 1e-9)
+    print(f"\nset_based is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Offline benchmark suite for the metadata extractors and the RDL parser.
+
+Runs fetch_sql_server_metadata and postgres.get_metadata against the fake
+pyodbc/psycopg2 cursors of bench_catalog_round_trips and
+bench_postgres_metadata (catalogs of 10, 1k and 20k tables, no latency), and
+parse_rdl against reports written by rdl_generator (a small report, one with
+hundreds of datasets and tablixes, and one padded with 20 MB of embedded
+images). Each case reports its best wall time over --repeat runs, its peak
+traced memory (one more run under tracemalloc) and its round trips. Inputs
+are built before timing starts. No network or server is needed.
+
+Results can be saved as a baseline and later runs compared with it: a case
+regresses when it needs more round trips, or its time or peak memory grows
+beyond --tolerance times the baseline. The exit status is 1 on a regression,
+so the suite can gate a CI job.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_suite --save              # record benchmarks/baseline.json
+    python -m benchmarks.bench_suite                     # compare with it
+    python -m benchmarks.bench_suite --only rdl --sizes small medium
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks import bench_catalog_round_trips as sql_server_bench
+from benchmarks import bench_postgres_metadata as postgres_bench
+from benchmarks.rdl_generator import generate_rdl
+from connection.postgres import get_metadata
+from connection.Remote_sql_server import fetch_sql_server_metadata
+from connection.rdl_inspect import parse_rdl
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = ("small", "medium", "large")
+
+# size -> (databases, tables per database, columns, objects per kind): 10, 1k and 20k tables
+SQL_SERVER_SIZES = {"small": (1, 10, 8, 5), "medium": (5, 200, 8, 20), "large": (20, 1000, 8, 50)}
+# size -> (databases, schemas per database, tables per schema, columns)
+POSTGRES_SIZES = {"small": (1, 1, 10, 8), "medium": (2, 2, 250, 8), "large": (4, 5, 1000, 8)}
+# size -> generate_rdl arguments
+RDL_SIZES = {
+    "small": {"datasets": 5, "tablixes": 3, "charts": 2, "parameters": 5},
+    "medium": {"datasets": 300, "tablixes": 200, "charts": 50, "parameters": 100, "subreports": 20},
+    "large": {"datasets": 500, "tablixes": 500, "charts": 100, "parameters": 200, "subreports": 50,
+              "images_mb": 20},
+}
+
+
+class PostgresBenchCursor(postgres_bench.FakeCursor):
+    """The metadata benchmark's cursor plus the pg_database listing get_metadata starts with."""
+
+    def __init__(self, catalog, stats, databases):
+        super().__init__(catalog, stats, 0)
+        self.databases = databases
+
+    def execute(self, sql, params=None):
+        if "pg_database" in sql:
+            self.stats["round_trips"] += 1
+            self._rows = [(db,) for db in self.databases]
+            return
+        super().execute(sql, params)
+
+
+class PostgresBenchSource:
+    """Stands in for connection.postgres.PostgresSource: every database serves the same fake catalog."""
+
+    host = "bench"
+
+    def __init__(self, catalog, stats, n_dbs):
+        self.catalog = catalog
+        self.stats = stats
+        self.databases = [f"bench_db_{d}" for d in range(n_dbs)]
+
+    def read(self, fn, database=None):
+        return fn(PostgresBenchCursor(self.catalog, self.stats, self.databases))
+
+
+def sql_server_case(size):
+    n_dbs, n_tables, n_columns, n_objects = SQL_SERVER_SIZES[size]
+    catalog = sql_server_bench.build_catalog(n_dbs, n_tables, n_columns, n_objects)
+
+    def run(stats):
+        return fetch_sql_server_metadata(sql_server_bench.FakeConnection(catalog, stats, 0))
+    return run, {"tables": n_dbs * n_tables}
+
+
+def postgres_case(size):
+    n_dbs, n_schemas, n_tables, n_columns = POSTGRES_SIZES[size]
+    catalog = postgres_bench.build_catalog(n_schemas, n_tables, n_columns)
+
+    def run(stats):
+        metadata, errors = get_metadata(PostgresBenchSource(catalog, stats, n_dbs))
+        if errors:
+            raise RuntimeError(f"Extraction failed: {errors}")
+        return metadata
+    return run, {"tables": n_dbs * n_schemas * n_tables}
+
+
+def rdl_case(size, workdir):
+    path = os.path.join(workdir, f"bench_{size}.rdl")
+    file_size = generate_rdl(path, **RDL_SIZES[size])
+
+    def run(stats):
+        return parse_rdl(path)
+    return run, {"file_mb": round(file_size / (1024 * 1024), 2)}
+
+
+CASES = {
+    "sql_server_metadata": sql_server_case,
+    "postgres_metadata": postgres_case,
+    "rdl": rdl_case,
+}
+
+
+def measure(fn, repeat):
+    """Best wall time over `repeat` runs, round trips of one run, then peak memory of one traced run."""
+    best = None
+    round_trips = 0
+    for _ in range(max(1, repeat)):
+        stats = {"round_trips": 0}
+        gc.collect()
+        start = time.perf_counter()
+        fn(stats)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        round_trips = stats["round_trips"]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn({"round_trips": 0})
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 4), "peak_mb": round(peak / (1024 * 1024), 2), "round_trips": round_trips}
+
+
+def run(only=None, sizes=SIZES, repeat=3):
+    """{case name: result} for every selected case; names are <group>/<size>."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="liftr_bench_") as workdir:
+        for group, build in CASES.items():
+            if only and group not in only:
+                continue
+            for size in sizes:
+                fn, info = build(size, workdir) if group == "rdl" else build(size)
+                results[f"{group}/{size}"] = {**info, **measure(fn, repeat)}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages of `results` against the cases of a saved baseline."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if r["round_trips"] > base["round_trips"]:
+            regressions.append(f"{name}: {r['round_trips']} round trips, baseline {base['round_trips']}")
+        for key, unit in (("seconds", "s"), ("peak_mb", " MB")):
+            # tiny values are mostly noise, so they get an absolute floor
+            floor = 0.05 if key == "seconds" else 1.0
+            if r[key] > max(base[key] * tolerance, base[key] + floor):
+                regressions.append(f"{name}: {r[key]}{unit}, baseline {base[key]}{unit} "
+                                   f"({r[key] / max(base[key], 1e-9):.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=list(CASES), help="case groups to run")
+    parser.add_argument("--sizes", nargs="*", choices=SIZES, default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (the best counts)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed time/memory growth factor")
+    args = parser.parse_args()
+
+    results = run(args.only, args.sizes, args.repeat)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    print(f"\n{'case':<28}{'seconds':>10}{'peak MB':>10}{'round trips':>13}{'vs baseline':>13}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        ratio = f"{r['seconds'] / max(base['seconds'], 1e-9):.2f}x" if base else "-"
+        print(f"{name:<28}{r['seconds']:>10.3f}{r['peak_mb']:>10.1f}{r['round_trips']:>13}{ratio:>13}")
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            # keep the cases this run did not cover
+            with open(args.baseline, encoding="utf-8") as f:
+                results = {**json.load(f).get("cases", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                       "machine": platform.machine(), "cases": results}, f, indent=4)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    if baseline:
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Synthetic SSRS report definitions for benchmarking connection.rdl_inspect.
+
+generate_rdl writes an RDL 2016 file with the given number of data sources,
+datasets (with joins, CTEs, window functions, unions and stored procedures
+in their queries), parameters (some cascading), tablixes with nested row
+and column groups (every tenth with another tablix inside), charts,
+subreports, custom code and, optionally, embedded images to make the file
+large. Output only depends on the arguments. The file is written element by element, so reports of hundreds of
+MB can be generated without holding them in memory.
+
+Run from the Backend directory:
+    python -m benchmarks.rdl_generator big.rdl --datasets 300 --tablixes 300 --images-mb 20
+"""
+import argparse
+import base64
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+NAMESPACE = "http://schemas.microsoft.com/sqlserver/reporting/2016/01/reportdefinition"
+
+QUERIES = [
+    "SELECT o.OrderID, o.OrderDate, c.Name FROM dbo.Orders o JOIN dbo.Customers c ON c.CustomerID = o.CustomerID "
+    "WHERE o.OrderDate >= @StartDate",
+    "WITH recent AS (SELECT * FROM Sales.Invoices WHERE InvoiceDate > @StartDate) "
+    "SELECT r.*, ROW_NUMBER() OVER (PARTITION BY r.CustomerID ORDER BY r.InvoiceDate) AS rn FROM recent r",
+    "SELECT ProductID, SUM(Qty) AS Qty FROM dbo.OrderLines GROUP BY ProductID "
+    "UNION SELECT ProductID, 0 FROM dbo.Products WHERE ProductID NOT IN (SELECT ProductID FROM dbo.OrderLines)",
+    "EXEC dbo.usp_Disbursements @StartDate, @EndDate",
+    "SELECT a.*, b.Total FROM [Finance].[Accounts] a LEFT JOIN (SELECT AccountID, SUM(Amount) AS Total "
+    "FROM Finance.Ledger GROUP BY AccountID) b ON b.AccountID = a.AccountID INNER JOIN dbo.Branches br "
+    "ON br.BranchID = a.BranchID",
+    "SELECT Region, Amount FROM dbo.Sales",
+]
+CHART_TYPES = ["Column", "Bar", "Line", "Pie", "Area", "Scatter"]
+CUSTOM_CODE = """Public Function Ratio(ByVal a As Decimal, ByVal b As Decimal) As Decimal
+    If b = 0 Then Return 0
+    Return a / b
+End Function"""
+
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.depth = 0
+
+    def open(self, tag, **attrs):
+        attributes = "".join(f" {k}={quoteattr(str(v))}" for k, v in attrs.items())
+        self.f.write(f"{'  ' * self.depth}<{tag}{attributes}>\n")
+        self.depth += 1
+
+    def close(self, tag):
+        self.depth -= 1
+        self.f.write(f"{'  ' * self.depth}</{tag}>\n")
+
+    def text(self, tag, value, **attrs):
+        attributes = "".join(f" {k}={quoteattr(str(v))}" for k, v in attrs.items())
+        self.f.write(f"{'  ' * self.depth}<{tag}{attributes}>{escape(str(value))}</{tag}>\n")
+
+
+def _textbox(w, name, value):
+    w.open("Textbox", Name=name)
+    w.open("Paragraphs")
+    w.open("Paragraph")
+    w.open("TextRuns")
+    w.open("TextRun")
+    w.text("Value", value)
+    w.close("TextRun")
+    w.close("TextRuns")
+    w.close("Paragraph")
+    w.close("Paragraphs")
+    w.close("Textbox")
+
+
+def _members(w, rnd, prefix, depth):
+    """Nested TablixMembers: one group per level down to `depth`, then a detail member."""
+    w.open("TablixMembers")
+    w.open("TablixMember")
+    if depth:
+        w.open("Group", Name=f"{prefix}_{depth}")
+        w.open("GroupExpressions")
+        w.text("GroupExpression", f"=Fields!Col{rnd.randrange(10)}.Value")
+        w.close("GroupExpressions")
+        w.close("Group")
+        _members(w, rnd, prefix, depth - 1)
+    w.close("TablixMember")
+    w.close("TablixMembers")
+
+
+def _tablix(w, rnd, name, datasets, max_depth, columns=4, nested=False):
+    """A tablix; `nested` puts another tablix in its first cell, as reports do for master/detail lists."""
+    w.open("Tablix", Name=name)
+    w.open("TablixBody")
+    w.open("TablixColumns")
+    for _ in range(columns):
+        w.open("TablixColumn")
+        w.text("Width", "1in")
+        w.close("TablixColumn")
+    w.close("TablixColumns")
+    w.open("TablixRows")
+    w.open("TablixRow")
+    w.text("Height", "0.25in")
+    w.open("TablixCells")
+    for c in range(columns):
+        w.open("TablixCell")
+        w.open("CellContents")
+        if nested and not c:
+            _tablix(w, rnd, f"{name}_Inner", datasets, max_depth, columns=2)
+            w.close("CellContents")
+            w.close("TablixCell")
+            continue
+        value = f"=Fields!Col{c}.Value" if c or rnd.random() < 0.9 else \
+            f'=Lookup(Fields!Col{c}.Value, Fields!Key.Value, Fields!Name.Value, "DataSet{rnd.randrange(datasets)}")'
+        _textbox(w, f"{name}_Cell{c}", value)
+        w.close("CellContents")
+        w.close("TablixCell")
+    w.close("TablixCells")
+    w.close("TablixRow")
+    w.close("TablixRows")
+    w.close("TablixBody")
+    w.open("TablixColumnHierarchy")
+    _members(w, rnd, f"{name}_col", rnd.randrange(max_depth // 2 + 1))
+    w.close("TablixColumnHierarchy")
+    w.open("TablixRowHierarchy")
+    _members(w, rnd, f"{name}_row", rnd.randint(1, max_depth))
+    w.close("TablixRowHierarchy")
+    w.text("DataSetName", f"DataSet{rnd.randrange(datasets)}")
+    w.close("Tablix")
+
+
+def _chart(w, rnd, i, datasets):
+    w.open("Chart", Name=f"Chart{i}")
+    w.open("ChartData")
+    w.open("ChartSeriesCollection")
+    for s in range(1 + rnd.randrange(3)):
+        w.open("ChartSeries", Name=f"Chart{i}_Series{s}")
+        w.open("ChartDataPoints")
+        w.open("ChartDataPoint")
+        w.open("ChartDataPointValues")
+        w.text("Y", "=Sum(Fields!Amount.Value)")
+        w.close("ChartDataPointValues")
+        w.close("ChartDataPoint")
+        w.close("ChartDataPoints")
+        # the element parse_rdl reads the chart type from
+        w.text("ChartType", rnd.choice(CHART_TYPES))
+        w.close("ChartSeries")
+    w.close("ChartSeriesCollection")
+    w.close("ChartData")
+    w.text("DataSetName", f"DataSet{rnd.randrange(datasets)}")
+    w.close("Chart")
+
+
+def generate_rdl(path, data_sources=2, datasets=20, parameters=10, tablixes=20, charts=5, subreports=2,
+                 max_group_depth=4, images_mb=0.0, custom_code=True, seed=0):
+    """Write a synthetic RDL file to `path` and return its size in bytes."""
+    rnd = random.Random(seed)
+    datasets = max(1, datasets)
+    with open(path, "w", encoding="utf-8") as f:
+        w = _Writer(f)
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        w.open("Report", xmlns=NAMESPACE)
+
+        w.open("DataSources")
+        for i in range(data_sources):
+            w.open("DataSource", Name=f"DataSource{i}")
+            w.open("ConnectionProperties")
+            w.text("DataProvider", "SQL")
+            w.text("ConnectString", f"Data Source=sql{i % 3}.corp.local;Initial Catalog=Warehouse{i}")
+            w.close("ConnectionProperties")
+            w.close("DataSource")
+        w.close("DataSources")
+
+        w.open("DataSets")
+        for i in range(datasets):
+            query = QUERIES[rnd.randrange(len(QUERIES))]
+            w.open("DataSet", Name=f"DataSet{i}")
+            w.open("Query")
+            w.text("DataSourceName", f"DataSource{i % max(data_sources, 1)}")
+            if query.startswith("EXEC"):
+                w.text("CommandType", "StoredProcedure")
+            w.text("CommandText", query)
+            w.close("Query")
+            w.open("Fields")
+            for c in range(6):
+                w.open("Field", Name=f"Col{c}")
+                w.text("DataField", f"Col{c}")
+                w.close("Field")
+            w.close("Fields")
+            w.close("DataSet")
+        w.close("DataSets")
+
+        w.open("ReportSections")
+        w.open("ReportSection")
+        w.open("Body")
+        w.open("ReportItems")
+        for i in range(tablixes):
+            _tablix(w, rnd, f"Tablix{i}", datasets, max_group_depth, nested=i % 10 == 9)
+        for i in range(charts):
+            _chart(w, rnd, i, datasets)
+        for i in range(subreports):
+            w.open("Subreport", Name=f"Subreport{i}")
+            w.text("ReportName", f"Detail{i}")
+            w.close("Subreport")
+        _textbox(w, "Title", '="Generated " & Globals!ExecutionTime')
+        w.close("ReportItems")
+        w.text("Height", "10in")
+        w.close("Body")
+        w.text("Width", "8.5in")
+        w.close("ReportSection")
+        w.close("ReportSections")
+
+        w.open("ReportParameters")
+        for i in range(parameters):
+            w.open("ReportParameter", Name=f"Param{i}")
+            w.text("DataType", "String")
+            w.text("Prompt", f"Parameter {i}")
+            if i and rnd.random() < 0.3:
+                w.open("ValidValues")
+                w.open("DataSetReference")
+                w.text("DataSetName", f"DataSet{rnd.randrange(datasets)}")
+                w.text("ValueField", "Col0")
+                w.close("DataSetReference")
+                w.close("ValidValues")
+            w.close("ReportParameter")
+        w.close("ReportParameters")
+
+        if custom_code:
+            w.text("Code", CUSTOM_CODE)
+
+        remaining = int(images_mb * 1024 * 1024)
+        if remaining:
+            w.open("EmbeddedImages")
+            i = 0
+            while remaining > 0:
+                # ~1 MB images; random bytes so the base64 does not compress or repeat
+                size = min(remaining, 3 * 256 * 1024)
+                w.open("EmbeddedImage", Name=f"Image{i}")
+                w.text("MIMEType", "image/png")
+                w.text("ImageData", base64.b64encode(rnd.randbytes(size)).decode("ascii"))
+                w.close("EmbeddedImage")
+                remaining -= size * 4 // 3
+                i += 1
+            w.close("EmbeddedImages")
+
+        w.close("Report")
+        return f.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--data-sources", type=int, default=2)
+    parser.add_argument("--datasets", type=int, default=20)
+    parser.add_argument("--parameters", type=int, default=10)
+    parser.add_argument("--tablixes", type=int, default=20)
+    parser.add_argument("--charts", type=int, default=5)
+    parser.add_argument("--subreports", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=4, help="deepest row group nesting")
+    parser.add_argument("--images-mb", type=float, default=0.0, help="embedded image data to add")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    size = generate_rdl(args.path, args.data_sources, args.datasets, args.parameters, args.tablixes, args.charts,
+                        args.subreports, args.depth, args.images_mb, seed=args.seed)
+    print(f"Wrote {args.path} ({size / (1024 * 1024):.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
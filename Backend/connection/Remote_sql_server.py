@@ -1,7 +1,14 @@
-import pyodbc
-import json
-from datetime import datetime
-from flask import Flask, request, jsonify
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from connection.catalog import Catalog
+from connection.data_volume import add_table_volume, fetch_data_volume, new_volume_totals, read_data_volume
+from connection.extractors import get_extractor
+from connection.snapshot_store import DEFAULT_NAMESPACE, get_snapshot_store
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
 
 # def connect_sql_server(data):
 #     # data = request.get_json()
@@ -24,41 +31,211 @@ from flask import Flask, request, jsonify
 #     return conn
 
 def connect_sql_server(data):
-    try:
+    """
+    Open a pyodbc connection from a connect request body.
 
-        server = data.get("server")
-        auth_type = data.get("auth_type", "no").lower()   # "yes" or "no"
-        username = data.get("username")
-        password = data.get("password")
+    Raises ValueError for missing fields and DriverUnavailable if pyodbc is
+    not installed; connection errors are the driver's own.
+    """
+    conn = get_extractor("sqlserver").open(data).connect()
+    logger.info("Connection successful!")
+    return conn
 
-        if not server:
-            return jsonify({"status": "error", "message": "Server name is required"}), 400
 
-        if auth_type == "no":
-            driver = "{ODBC Driver 18 for SQL Server}"
-            if not username or not password:
-                return jsonify({"status": "error", "message": "Username and password required"}), 400
+# Number of worker connections used by fetch_sql_server_metadata_parallel
+# when the caller does not ask for a specific pool size.
+DEFAULT_METADATA_WORKERS = 8
 
-            conn_str = (
-                f"DRIVER={driver};SERVER={server};"
-                f"UID={username};PWD={password};Encrypt=no;"
-            )
-        else:
-            conn_str = (
-                f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-                f"SERVER={server};Trusted_Connection=yes;"
-            )
 
-        conn = pyodbc.connect(conn_str, timeout=5)
-        print("Connection successful!\n")
+def list_databases(cursor):
+    """Return the names of all user databases on the server."""
+    with span("list_databases") as s:
+        cursor.execute("SELECT name FROM sys.databases WHERE database_id > 4")
+        dbs = [row.name for row in cursor.fetchall()]
+        s.rows = len(dbs)
+    return dbs
 
-        return conn
 
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+# Catalog queries read for every database: (key, select list, FROM clause, ORDER BY).
+# They are assembled per database (one statement each), as one multi-result-set
+# batch per database, or as one UNION ALL across all databases. Tables and
+# columns come first and foreign keys third, as they are attached to the tables;
+# the rest are plain object lists (see OBJECT_KEYS).
+CATALOG_QUERIES = [
+    ("tables",
+     "t.TABLE_SCHEMA, t.TABLE_NAME, s.create_date, s.modify_date",
+     "FROM [{db}].INFORMATION_SCHEMA.TABLES t "
+     "JOIN [{db}].sys.tables s ON t.TABLE_NAME = s.name "
+     "WHERE t.TABLE_TYPE = 'BASE TABLE'",
+     "t.TABLE_SCHEMA, t.TABLE_NAME"),
+    ("columns",
+     "TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, "
+     "CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, IS_NULLABLE, COLUMN_DEFAULT",
+     "FROM [{db}].INFORMATION_SCHEMA.COLUMNS",
+     "TABLE_SCHEMA, TABLE_NAME"),
+    # one row per column pair, in the same shape as the PostgreSQL extractor's foreign keys
+    ("foreign_keys",
+     "ps.name AS TABLE_SCHEMA, pt.name AS TABLE_NAME, fk.name AS CONSTRAINT_NAME, pc.name AS COLUMN_NAME, "
+     "rs.name AS FOREIGN_SCHEMA, rt.name AS FOREIGN_TABLE, rc.name AS FOREIGN_COLUMN",
+     "FROM [{db}].sys.foreign_key_columns fkc "
+     "JOIN [{db}].sys.foreign_keys fk ON fk.object_id = fkc.constraint_object_id "
+     "JOIN [{db}].sys.tables pt ON pt.object_id = fkc.parent_object_id "
+     "JOIN [{db}].sys.schemas ps ON ps.schema_id = pt.schema_id "
+     "JOIN [{db}].sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id "
+     "JOIN [{db}].sys.tables rt ON rt.object_id = fkc.referenced_object_id "
+     "JOIN [{db}].sys.schemas rs ON rs.schema_id = rt.schema_id "
+     "JOIN [{db}].sys.columns rc "
+     "ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id",
+     "ps.name, pt.name, fk.name, fkc.constraint_column_id"),
+    ("views",
+     "name, create_date, modify_date",
+     "FROM [{db}].sys.views",
+     "name"),
+    ("procedures",
+     "name, create_date, modify_date",
+     "FROM [{db}].sys.procedures",
+     "name"),
+    ("functions",
+     "name, create_date, modify_date",
+     "FROM [{db}].sys.objects WHERE type_desc LIKE '%FUNCTION%'",
+     "name"),
+    ("triggers",
+     "name, create_date, modify_date",
+     "FROM [{db}].sys.triggers",
+     "name"),
+]
+# catalog keys read as lists of object_record()s
+OBJECT_KEYS = [key for key, _, _, _ in CATALOG_QUERIES[3:]]
+
+
+def build_catalog_query(db, key):
+    """Build the single-database statement for one catalog query."""
+    for name, select, source, order in CATALOG_QUERIES:
+        if name == key:
+            return f"SELECT {select} {source.format(db=db)} ORDER BY {order};"
+    raise KeyError(key)
+
+
+def build_catalog_batch(db):
+    """Build one batch returning every catalog query of a database as consecutive result sets."""
+    return "SET NOCOUNT ON;\n" + "\n".join(build_catalog_query(db, key) for key, _, _, _ in CATALOG_QUERIES)
+
+
+def build_cross_database_batch(dbs):
+    """
+    Build one batch returning each catalog query for all databases as a single UNION ALL.
+
+    Every row carries db_ordinal (position in dbs) and row_ordinal (position inside
+    its database, numbered with that database's own ORDER BY and collation), so the
+    rows come back grouped and ordered exactly like the per-database queries.
+    """
+    statements = ["SET NOCOUNT ON;"]
+    for key, select, source, order in CATALOG_QUERIES:
+        parts = [
+            f"SELECT {i} AS db_ordinal, ROW_NUMBER() OVER (ORDER BY {order}) AS row_ordinal, "
+            f"{select} {source.format(db=db)}"
+            for i, db in enumerate(dbs)
+        ]
+        statements.append("\nUNION ALL\n".join(parts) + "\nORDER BY db_ordinal, row_ordinal;")
+    return "\n".join(statements)
+
+
+def object_record(o):
+    return {'name': o.name, 'created_at': str(o.create_date), 'modified_at': str(o.modify_date)}
+
+
+def table_record(t):
+    return {
+        'schema': t.TABLE_SCHEMA,
+        'name': t.TABLE_NAME,
+        'created_at': str(t.create_date),
+        'modified_at': str(t.modify_date),
+        'columns': [],
+        'foreign_keys': []
+    }
+
+
+def column_record(c):
+    return {
+        'column_name': c.COLUMN_NAME,
+        'data_type': c.DATA_TYPE,
+        'max_length': c.CHARACTER_MAXIMUM_LENGTH,
+        'precision': c.NUMERIC_PRECISION,
+        'scale': c.NUMERIC_SCALE,
+        'nullable': c.IS_NULLABLE,
+        'default': c.COLUMN_DEFAULT
+    }
+
+
+def foreign_key_record(f):
+    return {
+        'constraint_name': f.CONSTRAINT_NAME,
+        'column': f.COLUMN_NAME,
+        'foreign_schema': f.FOREIGN_SCHEMA,
+        'foreign_table': f.FOREIGN_TABLE,
+        'foreign_column': f.FOREIGN_COLUMN
+    }
 
 
-def fetch_sql_server_metadata(conn):
+def apply_catalog_rows(catalog, db, key, rows):
+    """Turn the rows of one catalog query into the catalog entry for `key` of database `db`."""
+    db_meta = catalog.database(db)
+    if key == "tables":
+        db_meta['tables'] = []
+        for t in rows:
+            catalog.add_table(db, table_record(t))
+    elif key == "columns":
+        # hash lookup per column; rows of views and other non-table objects are skipped
+        for c in rows:
+            catalog.add_column(db, c.TABLE_SCHEMA, c.TABLE_NAME, column_record(c))
+    elif key == "foreign_keys":
+        for f in rows:
+            catalog.add_foreign_key(db, f.TABLE_SCHEMA, f.TABLE_NAME, foreign_key_record(f))
+    else:
+        db_meta[key] = [object_record(o) for o in rows]
+    return db_meta
+
+
+def fetch_database_metadata(cursor, db, db_meta):
+    """Read tables, columns, foreign keys, views, procedures, functions, triggers and data volume into db_meta."""
+    catalog = Catalog()
+    catalog.add_database(db, db_meta)
+    for key, _, _, _ in CATALOG_QUERIES:
+        with span(key, db) as s:
+            cursor.execute(build_catalog_query(db, key))
+            rows = cursor.fetchall()
+            s.rows = len(rows)
+            apply_catalog_rows(catalog, db, key, rows)
+    fetch_data_volume(cursor, db, db_meta)
+    return db_meta
+
+
+def fetch_database_metadata_batched(cursor, db, db_meta):
+    """
+    Same as fetch_database_metadata, but the catalog is read in a single round
+    trip using one multi-result-set batch (plus one for the data volume).
+    """
+    catalog = Catalog()
+    catalog.add_database(db, db_meta)
+    with span("batch", db):
+        cursor.execute(build_catalog_batch(db))
+    for i, (key, _, _, _) in enumerate(CATALOG_QUERIES):
+        with span(key, db) as s:
+            if i and not cursor.nextset():
+                raise RuntimeError(f"Catalog batch for {db} returned no result set for {key}")
+            rows = cursor.fetchall()
+            s.rows = len(rows)
+            apply_catalog_rows(catalog, db, key, rows)
+    fetch_data_volume(cursor, db, db_meta)
+    return db_meta
+
+
+def export_metadata(metadata, namespace=DEFAULT_NAMESPACE):
+    """Save the extracted metadata as a compressed snapshot and return its snapshot id."""
+    return get_snapshot_store(namespace).save(metadata)
+
+
+def fetch_sql_server_metadata(conn, namespace=DEFAULT_NAMESPACE):
     metadata = {}
 
     try:
@@ -66,142 +243,310 @@ def fetch_sql_server_metadata(conn):
         cursor = conn.cursor()
 
         # ---------- 1️⃣ List all databases ----------
-        cursor.execute("SELECT name FROM sys.databases WHERE database_id > 4")
-        dbs = [row.name for row in cursor.fetchall()]
-        print("=== Databases Found ===")
-        for db in dbs:
-            print(f"📘 {db}")
-        print()
+        dbs = list_databases(cursor)
+        logger.info("=== Databases Found: %s ===", len(dbs))
+        if logger.isEnabledFor(logging.DEBUG):
+            for db in dbs:
+                logger.debug("📘 %s", db)
 
         # ---------- 2️⃣ Loop through each database ----------
         for db in dbs:
-            print(f"\n🔹 Fetching metadata for database: {db}")
+            logger.info("🔹 Fetching metadata for database: %s", db)
             metadata[db] = {}
 
             try:
-                # ---------- Tables ----------
-                table_query = f"""
-                SELECT 
-                    t.TABLE_SCHEMA,
-                    t.TABLE_NAME,
-                    s.create_date,
-                    s.modify_date
-                FROM [{db}].INFORMATION_SCHEMA.TABLES t
-                JOIN [{db}].sys.tables s 
-                    ON t.TABLE_NAME = s.name
-                WHERE t.TABLE_TYPE = 'BASE TABLE'
-                ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME;
-                """
-                cursor.execute(table_query)
-                tables = cursor.fetchall()
-
-                metadata[db]['tables'] = []
-                for t in tables:
-                    metadata[db]['tables'].append({
-                        'schema': t.TABLE_SCHEMA,
-                        'name': t.TABLE_NAME,
-                        'created_at': str(t.create_date),
-                        'modified_at': str(t.modify_date),
-                        'columns': []
-                    })
-
-                # ---------- Columns ----------
-                col_query = f"""
-                SELECT 
-                    TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, 
-                    CHARACTER_MAXIMUM_LENGTH, IS_NULLABLE, COLUMN_DEFAULT
-                FROM [{db}].INFORMATION_SCHEMA.COLUMNS
-                ORDER BY TABLE_SCHEMA, TABLE_NAME;
-                """
-                cursor.execute(col_query)
-                columns = cursor.fetchall()
-                for c in columns:
-                    for tbl in metadata[db]['tables']:
-                        if tbl['name'] == c.TABLE_NAME and tbl['schema'] == c.TABLE_SCHEMA:
-                            tbl['columns'].append({
-                                'column_name': c.COLUMN_NAME,
-                                'data_type': c.DATA_TYPE,
-                                'max_length': c.CHARACTER_MAXIMUM_LENGTH,
-                                'nullable': c.IS_NULLABLE,
-                                'default': c.COLUMN_DEFAULT
-                            })
-                            break
-
-                # ---------- Views ----------
-                view_query = f"""
-                SELECT 
-                    name, create_date, modify_date
-                FROM [{db}].sys.views
-                ORDER BY name;
-                """
-                cursor.execute(view_query)
-                metadata[db]['views'] = [
-                    {'name': v.name, 'created_at': str(v.create_date), 'modified_at': str(v.modify_date)}
-                    for v in cursor.fetchall()
-                ]
-
-                # ---------- Stored Procedures ----------
-                proc_query = f"""
-                SELECT 
-                    name, create_date, modify_date
-                FROM [{db}].sys.procedures
-                ORDER BY name;
-                """
-                cursor.execute(proc_query)
-                metadata[db]['procedures'] = [
-                    {'name': p.name, 'created_at': str(p.create_date), 'modified_at': str(p.modify_date)}
-                    for p in cursor.fetchall()
-                ]
-
-                # ---------- Functions ----------
-                func_query = f"""
-                SELECT 
-                    name, create_date, modify_date
-                FROM [{db}].sys.objects
-                WHERE type_desc LIKE '%FUNCTION%'
-                ORDER BY name;
-                """
-                cursor.execute(func_query)
-                metadata[db]['functions'] = [
-                    {'name': f.name, 'created_at': str(f.create_date), 'modified_at': str(f.modify_date)}
-                    for f in cursor.fetchall()
-                ]
-
-                # ---------- Triggers ----------
-                trigger_query = f"""
-                SELECT 
-                    name, create_date, modify_date
-                FROM [{db}].sys.triggers
-                ORDER BY name;
-                """
-                cursor.execute(trigger_query)
-                metadata[db]['triggers'] = [
-                    {'name': tr.name, 'created_at': str(tr.create_date), 'modified_at': str(tr.modify_date)}
-                    for tr in cursor.fetchall()
-                ]
-
+                with span("database", db):
+                    fetch_database_metadata(cursor, db, metadata[db])
             except Exception as inner_e:
-                print(f"⚠️ Could not read metadata for {db}: {inner_e}")
+                logger.warning("⚠️ Could not read metadata for %s: %s", db, inner_e)
 
-        print("\n✅ Metadata extraction complete!\n")
+        logger.info("✅ Metadata extraction complete!")
 
-        file_name = f"sqlserver_metadata_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(file_name, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=4)
-        print(f"📁 Metadata exported to: {file_name}")
+        export_metadata(metadata, namespace)
         return metadata
     except Exception as e:
-        print("❌ Connection failed:", e)
+        logger.error("❌ Connection failed: %s", e)
+    # the caller owns conn (a pooled connection is returned to its pool there)
+    return metadata
+
+
+# Rows pulled per fetchmany() call by iter_sql_server_metadata
+STREAM_BATCH_SIZE = 1000
+
+# Tables with their columns in one ordered result, so each table can be emitted
+# as soon as its last column row has been read.
+STREAM_TABLE_COLUMNS_QUERY = """
+SELECT
+    t.TABLE_SCHEMA, t.TABLE_NAME, s.object_id, s.create_date, s.modify_date,
+    c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH, c.NUMERIC_PRECISION, c.NUMERIC_SCALE,
+    c.IS_NULLABLE, c.COLUMN_DEFAULT
+FROM [{db}].INFORMATION_SCHEMA.TABLES t
+JOIN [{db}].sys.tables s
+    ON t.TABLE_NAME = s.name
+LEFT JOIN [{db}].INFORMATION_SCHEMA.COLUMNS c
+    ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+WHERE t.TABLE_TYPE = 'BASE TABLE'
+ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME, s.object_id, c.ORDINAL_POSITION;
+"""
+
+
+def _iter_rows(cursor, batch_size=STREAM_BATCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _iter_tables(cursor, db):
+    table = None
+    current = None
+    for row in _iter_rows(cursor):
+        key = (row.TABLE_SCHEMA, row.TABLE_NAME, row.object_id)
+        if key != current:
+            if table is not None:
+                yield table
+            table = table_record(row)
+            current = key
+        if row.COLUMN_NAME is not None:
+            table['columns'].append(column_record(row))
+    if table is not None:
+        yield table
 
+
+def iter_sql_server_metadata(conn):
+    """
+    Yield the server metadata one record at a time instead of building the whole dict.
+
+    Records are dicts with a "type" of "database", "table", "view", "procedure",
+    "function", "trigger", "database_end", "error" or "end". Object records carry
+    the same dict the non-streaming extractors put in metadata[db] under "data";
+    "database_end" carries the database data volume totals.
+    Rows are read with fetchmany(), so memory stays bounded by one batch, one
+    table and the foreign keys of one database (read first, so every table
+    record carries its own) no matter how large the server is. The connection
+    is left open.
+    """
+    cursor = conn.cursor()
+    dbs = list_databases(cursor)
+    for db in dbs:
+        yield {"type": "database", "database": db}
+        try:
+            volumes, source = read_data_volume(cursor, db)
+            totals = new_volume_totals(source)
+        except Exception as e:
+            logger.warning("⚠️ Could not read data volume for %s: %s", db, e)
+            volumes, totals = {}, {"error": str(e)}
+            cursor = conn.cursor()
+        try:
+            cursor.execute(build_catalog_query(db, "foreign_keys"))
+            foreign_keys = {}
+            for f in _iter_rows(cursor):
+                foreign_keys.setdefault((f.TABLE_SCHEMA, f.TABLE_NAME), []).append(foreign_key_record(f))
+            cursor.execute(STREAM_TABLE_COLUMNS_QUERY.format(db=db))
+            for table in _iter_tables(cursor, db):
+                table['foreign_keys'] = foreign_keys.get((table['schema'], table['name']), [])
+                if volumes:
+                    add_table_volume(totals, table, volumes)
+                yield {"type": "table", "database": db, "data": table}
+
+            for key in OBJECT_KEYS:
+                cursor.execute(build_catalog_query(db, key))
+                record_type = key[:-1]  # views -> view, ...
+                for row in _iter_rows(cursor):
+                    yield {"type": record_type, "database": db, "data": object_record(row)}
+        except Exception as e:
+            logger.warning("⚠️ Could not read metadata for %s: %s", db, e)
+            yield {"type": "error", "database": db, "message": str(e)}
+            cursor = conn.cursor()
+        yield {"type": "database_end", "database": db, "data_volume": totals}
+    yield {"type": "end", "databases": len(dbs)}
+
+
+def iter_metadata_records(metadata):
+    """
+    Yield the records iter_sql_server_metadata() produces, from an already
+    extracted metadata dict or an iterable of (database, db_meta) pairs.
+    """
+    dbs = 0
+    for db, db_meta in metadata.items() if isinstance(metadata, dict) else metadata:
+        dbs += 1
+        yield {"type": "database", "database": db}
+        for key in ["tables"] + OBJECT_KEYS:
+            for data in db_meta.get(key, []):
+                yield {"type": key[:-1], "database": db, "data": data}
+        yield {"type": "database_end", "database": db, "data_volume": db_meta.get('data_volume')}
+    yield {"type": "end", "databases": dbs}
+
+
+def collect_metadata_records(records, metadata):
+    """
+    Pass the records of iter_sql_server_metadata() through unchanged while
+    building the dict fetch_sql_server_metadata() returns into `metadata`.
+    """
+    for record in records:
+        kind = record["type"]
+        if kind == "database":
+            metadata[record["database"]] = {key: [] for key in ["tables"] + OBJECT_KEYS}
+        elif kind == "database_end":
+            metadata[record["database"]]["data_volume"] = record["data_volume"]
+        elif kind not in ("error", "end"):
+            metadata[record["database"]][f"{kind}s"].append(record["data"])
+        yield record
+
+
+def fetch_sql_server_metadata_parallel(connect, max_workers=DEFAULT_METADATA_WORKERS, batched=False,
+                                       namespace=DEFAULT_NAMESPACE):
+    """
+    Fetch metadata for all databases using a bounded pool of worker connections.
+
+    `connect` is a zero-argument callable returning a new pyodbc connection; each
+    worker thread opens (at most) one connection and reuses it for every database
+    it handles, since pyodbc connections must not be shared between threads.
+
+    Returns (metadata, errors): metadata has the same shape as
+    fetch_sql_server_metadata(), errors maps database name -> error message for
+    every database that could not be read. One failing database does not stop
+    the others. With batched=True each database is read with a single
+    round trip (see fetch_database_metadata_batched).
+    """
+    metadata = {}
+    errors = {}
+    read_database = fetch_database_metadata_batched if batched else fetch_database_metadata
+    max_workers = max(1, int(max_workers or 1))
+
+    list_conn = connect()
+    try:
+        dbs = list_databases(list_conn.cursor())
+    finally:
+        list_conn.close()
+    logger.info("=== Databases Found: %s (workers=%s) ===", len(dbs), max_workers)
+
+    local = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+
+    def _worker_connection():
+        worker_conn = getattr(local, "conn", None)
+        if worker_conn is None:
+            worker_conn = connect()
+            local.conn = worker_conn
+            with opened_lock:
+                opened.append(worker_conn)
+        return worker_conn
+
+    def _fetch_one(db):
+        db_meta = {}
+        try:
+            with span("database", db):
+                read_database(_worker_connection().cursor(), db, db_meta)
+        except Exception:
+            # drop the worker connection so a broken link is not reused for the next database; a pooled
+            # connection is discarded, since closing it would only return it to the pool
+            broken = getattr(local, "conn", None)
+            local.conn = None
+            if broken is not None:
+                try:
+                    getattr(broken, "discard", broken.close)()
+                except Exception:
+                    pass
+            raise
+        return db_meta
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # each task runs in a copy of the caller's context, so its spans reach the caller's trace
+            futures = {pool.submit(contextvars.copy_context().run, _fetch_one, db): db for db in dbs}
+            for future in as_completed(futures):
+                db = futures[future]
+                try:
+                    metadata[db] = future.result()
+                    logger.info("🔹 Fetched metadata for database: %s", db)
+                except Exception as e:
+                    metadata[db] = {}
+                    errors[db] = str(e)
+                    logger.warning("⚠️ Could not read metadata for %s: %s", db, e)
     finally:
+        for worker_conn in opened:
+            try:
+                worker_conn.close()
+            except Exception:
+                pass
+
+    # keep the sys.databases order so the output matches the sequential extractor
+    metadata = {db: metadata[db] for db in dbs}
+    logger.info("✅ Metadata extraction complete!")
+
+    export_metadata(metadata, namespace)
+    return metadata, errors
+
+
+def fetch_sql_server_metadata_batched(conn, cross_database=False, namespace=DEFAULT_NAMESPACE):
+    """
+    Fetch metadata for all databases with one round trip per database.
+
+    With cross_database=True every catalog query for the whole server is sent as
+    one UNION ALL batch (one round trip in total); if that batch fails, e.g.
+    because one database is offline or not accessible, it falls back to the
+    per-database batches so the remaining databases are still read.
+
+    Returns (metadata, errors) like fetch_sql_server_metadata_parallel().
+    The connection is left open.
+    """
+    metadata = {}
+    errors = {}
+    cursor = conn.cursor()
+    dbs = list_databases(cursor)
+    logger.info("=== Databases Found: %s ===", len(dbs))
+
+    if cross_database and dbs:
+        try:
+            metadata = _fetch_cross_database(conn.cursor(), dbs)
+        except Exception as e:
+            logger.warning("⚠️ Cross-database batch failed, falling back to per-database batches: %s", e)
+            metadata = {}
+
+    for db in dbs:
+        if db in metadata:
+            continue
+        metadata[db] = {}
         try:
-            conn.close()
-            return metadata
-        except:
-            pass
+            with span("database", db):
+                fetch_database_metadata_batched(conn.cursor(), db, metadata[db])
+            logger.info("🔹 Fetched metadata for database: %s", db)
+        except Exception as e:
+            errors[db] = str(e)
+            logger.warning("⚠️ Could not read metadata for %s: %s", db, e)
+
+    metadata = {db: metadata[db] for db in dbs}
+    logger.info("✅ Metadata extraction complete!")
+
+    export_metadata(metadata, namespace)
+    return metadata, errors
+
+
+def _fetch_cross_database(cursor, dbs):
+    catalog = Catalog()
+    for db in dbs:
+        catalog.add_database(db)
+    with span("batch"):
+        cursor.execute(build_cross_database_batch(dbs))
+    for i, (key, _, _, _) in enumerate(CATALOG_QUERIES):
+        with span(key) as s:
+            if i and not cursor.nextset():
+                raise RuntimeError(f"Cross-database batch returned no result set for {key}")
+            grouped = {}
+            for row in cursor.fetchall():
+                grouped.setdefault(row.db_ordinal, []).append(row)
+                s.rows += 1
+            for ordinal, db in enumerate(dbs):
+                apply_catalog_rows(catalog, db, key, grouped.get(ordinal, []))
+    for db in dbs:
+        fetch_data_volume(cursor, db, catalog.database(db))
+    return catalog.to_dict()
 
 
 
 if __name__ == "__main__":
     # fetch_sql_server_metadata()
-    connect_sql_server()
\ No newline at end of file
+    connect_sql_server()
@@ -0,0 +1,59 @@
+from connection.Remote_sql_server import export_metadata, fetch_database_metadata_batched, list_databases
+from connection.snapshot_store import DEFAULT_NAMESPACE
+
+
+def summarize_metadata(metadata):
+    """Per-database object counts plus server totals for an assessment report."""
+    databases = {}
+    totals = {"databases": 0, "tables": 0, "columns": 0, "views": 0,
+              "procedures": 0, "functions": 0, "triggers": 0, "rows": 0, "reserved_kb": 0}
+    for db, db_meta in metadata.items():
+        tables = db_meta.get('tables', [])
+        counts = {
+            "tables": len(tables),
+            "columns": sum(len(t.get('columns', [])) for t in tables),
+            "views": len(db_meta.get('views', [])),
+            "procedures": len(db_meta.get('procedures', [])),
+            "functions": len(db_meta.get('functions', [])),
+            "triggers": len(db_meta.get('triggers', [])),
+            # 0 when the data volume could not be read
+            "rows": db_meta.get('data_volume', {}).get('rows', 0),
+            "reserved_kb": db_meta.get('data_volume', {}).get('reserved_kb', 0),
+        }
+        databases[db] = counts
+        totals["databases"] += 1
+        for key, value in counts.items():
+            totals[key] += value
+    return {"databases": databases, "totals": totals}
+
+
+def run_sql_server_assessment(ctx, connect, namespace=DEFAULT_NAMESPACE):
+    """
+    Job function: extract the metadata of every database and summarize it.
+
+    Runs on a job worker thread with its own connection from `connect`, reports
+    progress per database and stops between databases when the job is cancelled.
+    The metadata is saved as a snapshot; the job result holds the summary, the
+    snapshot id and any per-database errors.
+    """
+    conn = connect()
+    try:
+        ctx.report(0, "Listing databases")
+        dbs = list_databases(conn.cursor())
+        metadata = {}
+        errors = {}
+        for i, db in enumerate(dbs):
+            ctx.check_cancelled()
+            ctx.report(100.0 * i / max(len(dbs), 1), f"Reading {db} ({i + 1}/{len(dbs)})")
+            metadata[db] = {}
+            try:
+                fetch_database_metadata_batched(conn.cursor(), db, metadata[db])
+            except Exception as e:
+                errors[db] = str(e)
+        ctx.check_cancelled()
+    finally:
+        conn.close()
+
+    ctx.report(99, "Saving snapshot")
+    snapshot_id = export_metadata(metadata, namespace)
+    return {"summary": summarize_metadata(metadata), "snapshot_id": snapshot_id, "errors": errors}
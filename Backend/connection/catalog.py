@@ -0,0 +1,90 @@
+class Catalog:
+    """
+    In-memory SQL Server catalog indexed db -> schema -> table -> column.
+
+    The catalog owns the same nested dicts the extractors have always returned
+    ({db: {"tables": [...], "views": [...], ...}}), so to_dict() is free and the
+    frontend JSON does not change. Next to them it keeps hash indexes, so
+    attaching a column to its table and lookups by name are O(1) instead of a
+    scan over every table of the database.
+    """
+
+    def __init__(self, metadata=None):
+        self.metadata = {}
+        self._tables = {}   # db -> {schema: {table name: table record}}
+        self._columns = {}  # (db, schema, table) -> {column name: column record}
+        for db, db_meta in (metadata or {}).items():
+            self.add_database(db, db_meta)
+
+    # ---------- Building ----------
+    def add_database(self, db, db_meta=None):
+        """Register a database (optionally with an existing metadata dict) and index its tables."""
+        db_meta = {} if db_meta is None else db_meta
+        self.metadata[db] = db_meta
+        self._tables[db] = {}
+        for table in db_meta.get('tables', []):
+            self._index_table(db, table)
+        return db_meta
+
+    def add_table(self, db, table):
+        """Append a table record ({'schema', 'name', ..., 'columns': []}) to a database."""
+        self.metadata[db].setdefault('tables', []).append(table)
+        self._index_table(db, table)
+        return table
+
+    def add_column(self, db, schema, table_name, column):
+        """Attach a column record to its table; returns False if the table is not in the catalog."""
+        table = self.get_table(db, schema, table_name)
+        if table is None:
+            return False
+        table['columns'].append(column)
+        self._columns[(db, schema, table_name)].setdefault(column['column_name'], column)
+        return True
+
+    def add_foreign_key(self, db, schema, table_name, foreign_key):
+        """Attach a foreign key column pair to its table; returns False if the table is not in the catalog."""
+        table = self.get_table(db, schema, table_name)
+        if table is None:
+            return False
+        table.setdefault('foreign_keys', []).append(foreign_key)
+        return True
+
+    def _index_table(self, db, table):
+        schemas = self._tables[db].setdefault(table['schema'], {})
+        # the first record wins, matching the old linear scan that stopped at the first match
+        if table['name'] in schemas:
+            return
+        schemas[table['name']] = table
+        columns = self._columns[(db, table['schema'], table['name'])] = {}
+        for column in table.setdefault('columns', []):
+            columns.setdefault(column['column_name'], column)
+
+    # ---------- Lookups ----------
+    def databases(self):
+        return list(self.metadata)
+
+    def database(self, db):
+        return self.metadata.get(db)
+
+    def schemas(self, db):
+        return list(self._tables.get(db, {}))
+
+    def get_table(self, db, schema, table_name):
+        return self._tables.get(db, {}).get(schema, {}).get(table_name)
+
+    def list_tables(self, db, schema=None):
+        if schema is None:
+            return self.metadata.get(db, {}).get('tables', [])
+        return list(self._tables.get(db, {}).get(schema, {}).values())
+
+    def list_columns(self, db, schema, table_name):
+        table = self.get_table(db, schema, table_name)
+        return table['columns'] if table is not None else []
+
+    def get_column(self, db, schema, table_name, column_name):
+        return self._columns.get((db, schema, table_name), {}).get(column_name)
+
+    # ---------- Serialization ----------
+    def to_dict(self):
+        """Return the catalog in the JSON shape served to the frontend."""
+        return self.metadata
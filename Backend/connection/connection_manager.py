@@ -0,0 +1,248 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Defaults for every pool unless the connection is registered with other values
+DEFAULT_POOL_SIZE = 8
+DEFAULT_IDLE_TIMEOUT = 300     # seconds an idle connection is kept open
+DEFAULT_BORROW_TIMEOUT = 30    # seconds borrow() waits when the pool is exhausted
+VALIDATION_QUERY = "SELECT 1"
+
+
+class PoolExhausted(TimeoutError):
+    """No connection became available within the borrow timeout."""
+
+
+class PooledConnection:
+    """
+    Borrowed connection. Behaves like the driver connection, but close()
+    returns it to its pool instead of closing it, so extractors that close
+    the connection they were given no longer break later requests.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    def cursor(self):
+        return self._raw.cursor()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+    def discard(self):
+        """Close the underlying connection instead of returning it (e.g. after a network error)."""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw, broken=True)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of driver connections for one source.
+
+    `connect` is a zero-argument callable returning a new connection. Idle
+    connections are validated with a cheap query when borrowed, closed after
+    `idle_timeout` seconds unused, and at most `max_size` connections are open
+    at once; borrow() waits up to `borrow_timeout` seconds for one to free up.
+    """
+
+    def __init__(self, connect, max_size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 borrow_timeout=DEFAULT_BORROW_TIMEOUT, validation_query=VALIDATION_QUERY):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.borrow_timeout = borrow_timeout
+        self.validation_query = validation_query
+        self._idle = deque()  # (connection, released at)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _validate(self, raw):
+        try:
+            cursor = raw.cursor()
+            cursor.execute(self.validation_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _evict_idle_locked(self, now):
+        # idle deque is oldest-first, so expired connections sit at the left end
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def borrow(self, timeout=None):
+        timeout = self.borrow_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                expired = self._evict_idle_locked(time.monotonic())
+                raw = None
+                create = False
+                if self._idle:
+                    raw = self._idle.pop()[0]  # most recently used first
+                    self._in_use += 1
+                elif self._in_use + len(self._idle) < self.max_size:
+                    self._in_use += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhausted(f"No connection available within {timeout}s (max_size={self.max_size})")
+                    self._cond.wait(remaining)
+                    continue
+            for old in expired:
+                self._close_quietly(old)
+
+            if create:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                return PooledConnection(self, raw)
+            if self._validate(raw):
+                return PooledConnection(self, raw)
+            # stale connection: drop it and try again
+            self._close_quietly(raw)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+
+    def release(self, raw, broken=False):
+        with self._cond:
+            self._in_use -= 1
+            keep = not broken and not self._closed
+            if keep:
+                self._idle.append((raw, time.monotonic()))
+            expired = self._evict_idle_locked(time.monotonic())
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(raw)
+        for old in expired:
+            self._close_quietly(old)
+
+    @contextmanager
+    def connection(self):
+        conn = self.borrow()
+        try:
+            yield conn
+        except Exception:
+            conn.discard()
+            raise
+        finally:
+            conn.close()
+
+    def evict_idle(self):
+        with self._cond:
+            expired = self._evict_idle_locked(time.monotonic())
+        for old in expired:
+            self._close_quietly(old)
+        return len(expired)
+
+    def close(self):
+        """Close idle connections now; connections in use are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for raw in idle:
+            self._close_quietly(raw)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        with self._cond:
+            return {"max_size": self.max_size, "in_use": self._in_use, "idle": len(self._idle)}
+
+
+class ConnectionEntry:
+    def __init__(self, name, pool, server=None, info=None):
+        self.name = name
+        self.pool = pool
+        self.server = server
+        self.info = info or {}
+        self.created_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            "id": self.name,
+            "server": self.server,
+            "active": not self.pool.closed,
+            "created_at": self.created_at,
+            "pool": self.pool.stats(),
+            **self.info,
+        }
+
+
+class ConnectionRegistry:
+    """Named connections, one ConnectionPool each; safe to use from request and job threads."""
+
+    def __init__(self, reap_interval=60):
+        self._lock = threading.Lock()
+        self._entries = {}
+        if reap_interval:
+            reaper = threading.Thread(target=self._reap, args=(reap_interval,), daemon=True,
+                                      name="liftr-pool-reaper")
+            reaper.start()
+
+    def _reap(self, interval):
+        while True:
+            time.sleep(interval)
+            for entry in self.list_entries():
+                entry.pool.evict_idle()
+
+    def register(self, name, connect, server=None, info=None, **pool_options):
+        """Add or replace a named connection; a replaced pool is closed."""
+        entry = ConnectionEntry(name, ConnectionPool(connect, **pool_options), server, info)
+        with self._lock:
+            old = self._entries.get(name)
+            self._entries[name] = entry
+        if old is not None:
+            old.pool.close()
+        return entry
+
+    def get(self, name):
+        with self._lock:
+            return self._entries.get(name)
+
+    def remove(self, name):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+        if entry is None:
+            return False
+        entry.pool.close()
+        return True
+
+    def list_entries(self):
+        with self._lock:
+            return list(self._entries.values())
+
+    def list(self):
+        return [entry.to_dict() for entry in self.list_entries()]
@@ -0,0 +1,698 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+from functools import partial
+
+from connection.ddl import quote_ident
+from connection.migration_state import CHUNK_BOUNDS, CHUNK_DONE, RUN_FAILED, RUN_SUCCEEDED, get_state_store
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the source per fetchmany() call (one buffer chunk)
+DEFAULT_COPY_BATCH_ROWS = int(os.environ.get("LIFTR_COPY_BATCH_ROWS", "10000"))
+# Encoded chunks held between the source reader and the COPY writer; a full
+# buffer blocks the reader, so memory stays at about batch size x this number
+DEFAULT_COPY_BUFFER_BATCHES = int(os.environ.get("LIFTR_COPY_BUFFER_BATCHES", "8"))
+# Bytes psycopg2 asks for per read() while sending COPY data
+COPY_READ_SIZE = 1024 * 1024
+
+# COPY text format: backslash, tab, newline and carriage return are escaped, NULL is \N
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _text(value):
+    return value.translate(_ESCAPES)
+
+
+def _other(value):
+    return str(value).translate(_ESCAPES)
+
+
+def _bytea(value):
+    # hex bytea input; the backslash itself is escaped in the text format
+    return "\\\\x" + bytes(value).hex()
+
+
+_ENCODERS = {
+    str: _text,
+    int: str,
+    float: repr,
+    Decimal: str,
+    bool: lambda value: "t" if value else "f",
+    bytes: _bytea,
+    bytearray: _bytea,
+    memoryview: _bytea,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    dtime: dtime.isoformat,
+    uuid.UUID: str,
+}
+
+
+def encode_copy_rows(rows):
+    """Encode a batch of source rows as PostgreSQL COPY text-format bytes."""
+    encoders = _ENCODERS
+    lines = [
+        "\t".join("\\N" if value is None else encoders.get(type(value), _other)(value) for value in row)
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+class CopyAborted(Exception):
+    """The COPY writer stopped, so the source reader has nowhere to send rows."""
+
+
+class CopyBuffer:
+    """
+    Bounded queue of encoded chunks between a source reader thread and COPY.
+
+    The reader put()s chunks and blocks while the buffer is full, so a slow
+    target slows the source down instead of letting rows pile up in memory.
+    psycopg2's copy_expert reads the other end as a file through read().
+    Time spent waiting on each side is kept to show which side is the
+    bottleneck.
+    """
+
+    _END = object()
+
+    def __init__(self, max_chunks=DEFAULT_COPY_BUFFER_BATCHES):
+        self._queue = queue.Queue(maxsize=max(1, int(max_chunks)))
+        self._aborted = threading.Event()
+        self._pending = memoryview(b"")
+        self._eof = False
+        self.reader_wait = 0.0   # source side blocked on a full buffer
+        self.writer_wait = 0.0   # COPY blocked on an empty buffer
+        self.error = None
+
+    # ---------- Source side ----------
+    def put(self, chunk):
+        start = time.perf_counter()
+        while True:
+            if self._aborted.is_set():
+                raise CopyAborted()
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self.reader_wait += time.perf_counter() - start
+
+    def finish(self):
+        self.put(self._END)
+
+    def fail(self, error):
+        """Hand a reader error to the writer (its next read() raises it)."""
+        self.error = error
+        try:
+            self.put(error)
+        except CopyAborted:
+            pass
+
+    # ---------- COPY side ----------
+    def abort(self):
+        """Stop the reader, e.g. because COPY failed."""
+        self._aborted.set()
+
+    def read(self, size=-1):
+        if not self._pending:
+            if self._eof:
+                return b""
+            start = time.perf_counter()
+            item = self._queue.get()
+            self.writer_wait += time.perf_counter() - start
+            if item is self._END:
+                self._eof = True
+                return b""
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            self._pending = memoryview(item)
+        n = len(self._pending) if size is None or size < 0 else min(size, len(self._pending))
+        data = self._pending[:n].tobytes()
+        self._pending = self._pending[n:]
+        return data
+
+
+def bracket(name):
+    """SQL Server quoted identifier."""
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def source_table_name(db, table):
+    return f"{bracket(db)}.{bracket(table['schema'])}.{bracket(table['name'])}"
+
+
+def target_table_name(table, schema_map=None, lowercase=True):
+    schema = (schema_map or {}).get(table["schema"], table["schema"])
+    return f"{quote_ident(schema, lowercase)}.{quote_ident(table['name'], lowercase)}"
+
+
+def throughput(stats):
+    """Add rows/s and MB/s to a stats dict with rows, bytes and seconds."""
+    seconds = max(stats["seconds"], 1e-9)
+    stats["rows_per_sec"] = round(stats["rows"] / seconds, 1)
+    stats["mb_per_sec"] = round(stats["bytes"] / seconds / (1024 * 1024), 3)
+    return stats
+
+
+def copy_table(source_conn, target_conn, db, table, schema_map=None, lowercase=True,
+               batch_size=DEFAULT_COPY_BATCH_ROWS, buffer_batches=DEFAULT_COPY_BUFFER_BATCHES, check=None,
+               where=None, params=(), replace=None):
+    """
+    Copy one table from SQL Server to PostgreSQL with COPY ... FROM STDIN.
+
+    `table` is a table record of fetch_sql_server_metadata() ({"schema",
+    "name", "columns"}) and the target table must already exist (see
+    connection.ddl). A reader thread fetches `batch_size` rows at a time from
+    `source_conn` (pyodbc) and encodes them into a CopyBuffer of
+    `buffer_batches` chunks while `target_conn` (psycopg2) streams the buffer
+    into COPY, so no table is ever held in memory as a whole and no row is
+    inserted on its own. `check` is called between batches and may raise to
+    stop the copy (e.g. JobContext.check_cancelled). `where`/`params` limit
+    the copy to part of the table (one chunk, see chunk_where). `replace`,
+    a (where, params) pair from target_chunk_where, first deletes those
+    target rows in the same transaction as the COPY, so a chunk that may have
+    reached the target already can be copied again without duplicates.
+
+    Returns the table's stats: rows, bytes (COPY text sent), its CRC-32
+    checksum, seconds, rows/s, MB/s and the time each side spent waiting for
+    the other.
+    """
+    columns = [c["column_name"] for c in table.get("columns", [])]
+    if not columns:
+        raise ValueError(f"Table {table['schema']}.{table['name']} has no columns in the catalog")
+    select_sql = "SELECT {} FROM {}".format(", ".join(bracket(c) for c in columns), source_table_name(db, table))
+    if where:
+        select_sql += f" WHERE {where}"
+    target = target_table_name(table, schema_map, lowercase)
+    copy_sql = "COPY {} ({}) FROM STDIN".format(target, ", ".join(quote_ident(c, lowercase) for c in columns))
+
+    buffer = CopyBuffer(buffer_batches)
+    stats = {"table": f"{table['schema']}.{table['name']}", "target": target, "rows": 0, "bytes": 0}
+    crc = 0
+
+    def read_source():
+        nonlocal crc
+        cursor = source_conn.cursor()
+        try:
+            cursor.execute(select_sql, *params)
+            while True:
+                if check is not None:
+                    check()
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                chunk = encode_copy_rows(rows)
+                stats["rows"] += len(rows)
+                stats["bytes"] += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+                buffer.put(chunk)
+            buffer.finish()
+        except CopyAborted:
+            pass
+        except BaseException as e:
+            buffer.fail(e)
+
+    start = time.perf_counter()
+    reader = threading.Thread(target=read_source, name="liftr-copy-reader", daemon=True)
+    autocommit = target_conn.autocommit
+    with span("copy", db, extractor="copy") as s:
+        reader.start()
+        try:
+            # the chunks are encoded as UTF-8 whatever the session default is
+            target_conn.set_client_encoding("UTF8")
+            cursor = target_conn.cursor()
+            if replace is not None:
+                target_conn.autocommit = False
+                delete_where, delete_params = replace
+                delete_sql = f"DELETE FROM {target}" + (f" WHERE {delete_where}" if delete_where else "")
+                cursor.execute(delete_sql, delete_params or None)
+            cursor.copy_expert(copy_sql, buffer, size=COPY_READ_SIZE)
+            if not target_conn.autocommit:
+                target_conn.commit()
+        except BaseException as e:
+            buffer.abort()
+            reader.join()
+            if not target_conn.autocommit:
+                target_conn.rollback()
+            # COPY only reports that read() failed; the reader's exception says why
+            if buffer.error is not None and buffer.error is not e:
+                raise buffer.error from e
+            raise
+        finally:
+            target_conn.autocommit = autocommit
+        reader.join()
+        s.rows = stats["rows"]
+
+    stats["checksum"] = f"{crc:08x}"
+    stats["seconds"] = round(time.perf_counter() - start, 4)
+    stats["source_wait_seconds"] = round(buffer.writer_wait, 4)
+    stats["target_wait_seconds"] = round(buffer.reader_wait, 4)
+    logger.info("📦 Copied %s: %s rows in %.1fs", stats["table"], stats["rows"], stats["seconds"])
+    return throughput(stats)
+
+
+# ---------- Parallel chunked copy ----------
+
+# Rows per chunk a large table is split into before its throughput is known
+DEFAULT_CHUNK_ROWS = int(os.environ.get("LIFTR_COPY_CHUNK_ROWS", "1000000"))
+# Seconds an adaptive key-range chunk should take once throughput is known
+DEFAULT_CHUNK_SECONDS = float(os.environ.get("LIFTR_COPY_CHUNK_SECONDS", "30"))
+# Chunks of one table copied at the same time
+DEFAULT_COPY_WORKERS = int(os.environ.get("LIFTR_COPY_WORKERS", "4"))
+# Connections open at the same time against one source server, shared by all copy jobs
+DEFAULT_SOURCE_CONNECTIONS = int(os.environ.get("LIFTR_COPY_CONNECTIONS_PER_SOURCE", "8"))
+
+INTEGER_TYPES = {"bigint", "int", "smallint", "tinyint"}
+# key types whose values sort the same in SQL Server and PostgreSQL, so a key range selects the
+# same rows on both; strings (collations) and uniqueidentifier (byte order) do not
+ORDERED_KEY_TYPES = INTEGER_TYPES | {
+    "decimal", "numeric", "money", "smallmoney", "float", "real",
+    "date", "time", "datetime", "datetime2", "smalldatetime", "datetimeoffset",
+}
+
+# first column of the primary key (? = three-part table name)
+PRIMARY_KEY_QUERY = """
+SELECT c.name AS column_name, t.name AS type_name
+FROM {db}.sys.indexes i
+JOIN {db}.sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id AND ic.key_ordinal = 1
+JOIN {db}.sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+JOIN {db}.sys.types t ON t.user_type_id = c.user_type_id
+WHERE i.object_id = OBJECT_ID(?) AND i.is_primary_key = 1;
+"""
+
+# partitioning column and boundary values of the heap or clustered index, in boundary order
+PARTITION_QUERY = """
+SELECT c.name AS column_name, t.name AS type_name, pf.boundary_value_on_right, prv.value
+FROM {db}.sys.indexes i
+JOIN {db}.sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+JOIN {db}.sys.partition_functions pf ON pf.function_id = ps.function_id
+JOIN {db}.sys.index_columns ic
+    ON ic.object_id = i.object_id AND ic.index_id = i.index_id AND ic.partition_ordinal = 1
+JOIN {db}.sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+JOIN {db}.sys.types t ON t.user_type_id = c.user_type_id
+LEFT JOIN {db}.sys.partition_range_values prv ON prv.function_id = pf.function_id
+WHERE i.object_id = OBJECT_ID(?) AND i.index_id IN (0, 1)
+ORDER BY prv.boundary_id;
+"""
+
+KEY_RANGE_QUERY = "SELECT MIN({column}) AS low, MAX({column}) AS high FROM {table};"
+
+# upper key of each of ? equally sized slices (for keys that are not integers)
+KEY_SLICES_QUERY = """
+SELECT MAX(k) AS upper
+FROM (SELECT {column} AS k, NTILE(?) OVER (ORDER BY {column}) AS tile FROM {table}) slices
+GROUP BY tile
+ORDER BY tile;
+"""
+
+_source_limits = {}
+_source_limits_lock = threading.Lock()
+
+
+def source_limit(server, limit=DEFAULT_SOURCE_CONNECTIONS):
+    """Semaphore bounding the copy connections to one source server; the first caller's limit wins."""
+    with _source_limits_lock:
+        if server not in _source_limits:
+            _source_limits[server] = threading.BoundedSemaphore(max(1, int(limit)))
+        return _source_limits[server]
+
+
+def _range_where(key, chunk, placeholder):
+    parts = []
+    params = []
+    if chunk.get("lower") is not None:
+        parts.append(f"{key} >= {placeholder}" if chunk.get("lower_inclusive", True) else f"{key} > {placeholder}")
+        params.append(chunk["lower"])
+    if chunk.get("upper") is not None:
+        parts.append(f"{key} <= {placeholder}" if chunk.get("upper_inclusive") else f"{key} < {placeholder}")
+        params.append(chunk["upper"])
+    where = " AND ".join(parts)
+    if chunk.get("include_null") and where:
+        where = f"({where} OR {key} IS NULL)"
+    return where or None, tuple(params)
+
+
+def chunk_where(column, chunk):
+    """WHERE clause and parameters selecting one chunk's key range (None for the whole table)."""
+    if column is None:
+        return None, ()
+    return _range_where(bracket(column), chunk, "?")
+
+
+def target_chunk_where(column, chunk, lowercase=True):
+    """
+    chunk_where for the same rows in the PostgreSQL target table (psycopg2
+    placeholders). Only valid for plans whose key orders alike on both
+    engines (see range_replaceable).
+    """
+    if column is None:
+        return None, ()
+    return _range_where(quote_ident(column, lowercase), chunk, "%s")
+
+
+def range_replaceable(plan):
+    """
+    True if a chunk of `plan` can be replaced on the target by its key range:
+    the whole table, an integer key range, or a key of ORDERED_KEY_TYPES.
+    Plans saved without their key type are assumed not to be.
+    """
+    return plan["column"] is None or plan["kind"] == "key_range" or plan.get("type") in ORDERED_KEY_TYPES
+
+
+def plan_chunks(cursor, db, table, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Decide how to split a table into chunks that can be copied independently.
+
+    Returns {"kind", "column", ...}:
+    - "partitions": one chunk per partition of a partitioned table, aligned
+      with the partition function's boundaries;
+    - "key_range": an integer primary key, cut into ranges on demand by
+      ChunkScheduler (low, high and the initial step);
+    - "key_slices": another single-column key, cut into equal row counts with
+      NTILE;
+    - "single": the whole table as one chunk (small tables, no usable key).
+    Split plans carry the key's SQL Server "type". The row count comes from
+    the catalog's data volume.
+    """
+    name = source_table_name(db, table)
+    rows = (table.get("data_volume") or {}).get("rows")
+    single = {"kind": "single", "column": None, "chunks": [{}]}
+
+    cursor.execute(PARTITION_QUERY.format(db=bracket(db)), name)
+    partitions = cursor.fetchall()
+    if partitions and partitions[0].value is not None:
+        right = bool(partitions[0].boundary_value_on_right)
+        chunks = []
+        lower = None
+        for upper in [p.value for p in partitions] + [None]:
+            chunks.append({"lower": lower, "upper": upper, "lower_inclusive": right, "upper_inclusive": not right})
+            lower = upper
+        # NULL partitioning keys live in the first partition
+        chunks[0]["include_null"] = True
+        return {"kind": "partitions", "column": partitions[0].column_name, "type": partitions[0].type_name,
+                "chunks": chunks}
+
+    if rows is not None and rows <= chunk_rows:
+        return single
+    cursor.execute(PRIMARY_KEY_QUERY.format(db=bracket(db)), name)
+    key = cursor.fetchone()
+    if key is None:
+        return single
+    column = key.column_name
+
+    if key.type_name in INTEGER_TYPES:
+        cursor.execute(KEY_RANGE_QUERY.format(column=bracket(column), table=name))
+        bounds = cursor.fetchone()
+        if bounds is None or bounds.low is None:
+            return single
+        slices = -(-rows // chunk_rows) if rows else DEFAULT_COPY_WORKERS * 4
+        step = max(1, (bounds.high - bounds.low + 1) // max(1, slices))
+        return {"kind": "key_range", "column": column, "type": key.type_name, "low": bounds.low,
+                "high": bounds.high, "step": step}
+
+    if not rows:
+        return single
+    cursor.execute(KEY_SLICES_QUERY.format(column=bracket(column), table=name), -(-rows // chunk_rows))
+    uppers = [r.upper for r in cursor.fetchall()]
+    chunks = []
+    lower = None
+    for upper in uppers:
+        chunks.append({"lower": lower, "upper": upper, "lower_inclusive": False, "upper_inclusive": True})
+        lower = upper
+    # open-ended last chunk: rows added after planning are not lost
+    chunks[-1]["upper"] = None
+    return {"kind": "key_slices", "column": column, "type": key.type_name, "chunks": chunks}
+
+
+class ChunkScheduler:
+    """
+    Hands out the chunks of one table to copy workers.
+
+    Planned chunks (partitions, key slices) are handed out as they are. An
+    integer key range is cut on demand instead: each chunk starts where the
+    previous one ended and its width is re-estimated from the rows/s and the
+    rows per key of the chunks finished so far, so chunks take about
+    `target_seconds` each however dense or fast the table turns out to be.
+
+    `resume` lists the chunks an interrupted run already took (with their
+    "id" and "status"): done chunks are not handed out again, the others are
+    handed out first with "replace" set, and key ranges continue after the
+    highest key already taken. `on_start` is called with every chunk before
+    next() returns it, under the scheduler's lock, so a journal sees chunks in
+    the order their key ranges were cut.
+    """
+
+    def __init__(self, plan, target_seconds=DEFAULT_CHUNK_SECONDS, resume=None, on_start=None):
+        self.plan = plan
+        self.target_seconds = target_seconds
+        self.on_start = on_start
+        self._lock = threading.Lock()
+        resume = resume or []
+        taken = {c["id"] for c in resume}
+        self._redo = deque(
+            {**{k: c[k] for k in CHUNK_BOUNDS if k in c}, "id": c["id"], "replace": True}
+            for c in resume if c["status"] != CHUNK_DONE
+        )
+        self._queue = deque(dict(c, id=i) for i, c in enumerate(plan.get("chunks", [])) if i not in taken)
+        self._position = plan.get("low")
+        if plan["kind"] == "key_range" and resume:
+            uppers = [c["upper"] for c in resume]
+            self._position = plan["high"] + 1 if None in uppers else max(uppers)
+        self._step = plan.get("step")
+        self._next_id = max(taken) + 1 if taken else 0
+        self._stopped = False
+        self._rows = 0
+        self._seconds = 0.0
+        self._keys = 0
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+
+    def next(self):
+        """The next chunk ({"id", "lower", "upper", ...}) or None when the table is done."""
+        with self._lock:
+            if self._stopped:
+                return None
+            if self._redo:
+                chunk = self._redo.popleft()
+            elif self.plan["kind"] == "key_range":
+                high = self.plan["high"]
+                if self._position > high:
+                    return None
+                lower = self._position
+                upper = min(lower + self._step, high + 1)
+                self._position = upper
+                chunk = {"lower": lower, "upper": upper, "lower_inclusive": True, "upper_inclusive": False}
+                if upper > high:
+                    # the last range is open-ended so keys above the planned maximum are copied too
+                    chunk["upper"] = None
+            elif self._queue:
+                chunk = self._queue.popleft()
+            else:
+                return None
+            if "id" not in chunk:
+                chunk["id"] = self._next_id
+                self._next_id += 1
+            if self.on_start is not None:
+                self.on_start(chunk)
+            return chunk
+
+    def record(self, chunk, rows, seconds):
+        """Feed back a finished chunk; adjusts the width of the next key ranges."""
+        if self.plan["kind"] != "key_range" or chunk.get("upper") is None:
+            return
+        with self._lock:
+            self._rows += rows
+            self._seconds += seconds
+            self._keys += chunk["upper"] - chunk["lower"]
+            if not self._rows or self._seconds <= 0:
+                return
+            rate = self._rows / self._seconds
+            density = self._rows / self._keys
+            wanted = int(rate * self.target_seconds / density)
+            # move gradually so one odd chunk does not swing the size
+            self._step = max(1, min(max(wanted, self._step // 4), self._step * 4))
+
+
+def copy_table_parallel(source_connect, target, db, table, workers=DEFAULT_COPY_WORKERS,
+                        chunk_rows=DEFAULT_CHUNK_ROWS, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                        target_database=None, source_key=None, check=None, state=None, run_id=None, **options):
+    """
+    Copy one table as independent chunks on up to `workers` connection pairs.
+
+    The table is split by plan_chunks (partition-aligned, key ranges or
+    slices); each worker holds one source connection from `source_connect`
+    and one target session from the PostgresSource `target`, and copies
+    chunks with copy_table until none are left. Source connections count
+    against source_limit(source_key), target sessions against the target's
+    per-host limit. A failing chunk stops the other workers after their
+    current chunk and its error is raised; chunks already copied stay copied.
+
+    With a MigrationStateStore `state` and a `run_id` the plan and every
+    chunk are journaled, and a table the run has started before is resumed
+    from its saved plan: done chunks are skipped and chunks that were in
+    flight are copied again, replacing their key range on the target. When
+    the key does not order alike on both engines (range_replaceable) a key
+    range could delete other rows than the chunk copies, so the table is
+    emptied on the target and copied again as a whole instead.
+
+    Returns the table's stats with one entry per chunk copied by this call.
+    """
+    start = time.perf_counter()
+    name = f"{table['schema']}.{table['name']}"
+    plan, recorded = None, {}
+    if state is not None:
+        _, plan, recorded = state.table_state(run_id, name)
+    if plan is None:
+        plan_conn = source_connect()
+        try:
+            plan = plan_chunks(plan_conn.cursor(), db, table, chunk_rows)
+        finally:
+            plan_conn.close()
+        if state is not None:
+            state.save_plan(run_id, name, plan)
+    if any(c["status"] != CHUNK_DONE for c in recorded.values()) and not range_replaceable(plan):
+        logger.warning("⚠️ %s is split on a %s key; copying it again as a whole", name, plan.get("type"))
+        with target.session(target_database, statement_timeout_ms=0) as conn:
+            conn.cursor().execute(
+                "DELETE FROM " + target_table_name(table, options.get("schema_map"), options.get("lowercase", True))
+            )
+        state.reset_chunks(run_id, name)
+        recorded = {}
+    on_start = partial(state.chunk_started, run_id, name) if state is not None else None
+    scheduler = ChunkScheduler(plan, chunk_seconds, resume=list(recorded.values()), on_start=on_start)
+    skipped = [c for c in recorded.values() if c["status"] == CHUNK_DONE]
+    workers = 1 if plan["kind"] == "single" else max(1, int(workers or 1))
+    if plan.get("chunks"):
+        workers = min(workers, len(plan["chunks"]))
+    limit = source_limit(source_key) if source_key is not None else None
+    results = []
+    results_lock = threading.Lock()
+
+    def acquire_source_slot():
+        while not limit.acquire(timeout=1):
+            if check is not None:
+                check()
+
+    def work():
+        if limit is not None:
+            acquire_source_slot()
+        try:
+            source_conn = source_connect()
+            try:
+                with target.session(target_database, statement_timeout_ms=0) as target_conn:
+                    while True:
+                        chunk = scheduler.next()
+                        if chunk is None:
+                            break
+                        where, params = chunk_where(plan["column"], chunk)
+                        replace = None
+                        if chunk.get("replace"):
+                            replace = target_chunk_where(plan["column"], chunk, options.get("lowercase", True))
+                        try:
+                            stats = copy_table(source_conn, target_conn, db, table, check=check,
+                                               where=where, params=params, replace=replace, **options)
+                        except BaseException:
+                            scheduler.stop()
+                            raise
+                        if state is not None:
+                            state.chunk_done(run_id, name, chunk, stats)
+                        scheduler.record(chunk, stats["rows"], stats["seconds"])
+                        with results_lock:
+                            results.append({**chunk, "rows": stats["rows"], "bytes": stats["bytes"],
+                                            "checksum": stats["checksum"], "seconds": stats["seconds"]})
+            finally:
+                source_conn.close()
+        finally:
+            if limit is not None:
+                limit.release()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="liftr-copy") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, work) for _ in range(workers)]
+    for future in futures:
+        future.result()
+
+    results.sort(key=lambda c: c["id"])
+    if state is not None:
+        state.table_done(run_id, name, sum(c["rows"] or 0 for c in skipped) + sum(c["rows"] for c in results))
+    stats = {
+        "table": name,
+        "target": target_table_name(table, options.get("schema_map"), options.get("lowercase", True)),
+        "plan": plan["kind"],
+        "column": plan["column"],
+        "workers": workers,
+        "rows": sum(c["rows"] for c in results),
+        "bytes": sum(c["bytes"] for c in results),
+        "seconds": round(time.perf_counter() - start, 4),
+        "chunks": results,
+        "chunks_skipped": len(skipped),
+    }
+    logger.info("📦 Copied %s in %s chunks (%s): %s rows in %.1fs",
+                stats["table"], len(results), plan["kind"], stats["rows"], stats["seconds"])
+    return throughput(stats)
+
+
+def copy_database(ctx, source_connect, target, db, tables, target_database=None, source_key=None, run_id=None,
+                  **options):
+    """
+    Job function: copy the given tables of one SQL Server database into PostgreSQL.
+
+    `source_connect` returns a pyodbc connection, `target` is a PostgresSource
+    (its sessions have no statement timeout since a COPY can run for hours).
+    Tables are copied one after the other, each split into chunks copied in
+    parallel (see copy_table_parallel; `source_key` names the source server
+    for its connection cap). A failing table is recorded and the rest
+    continue. With a `run_id` (see MigrationStateStore.create_run) progress
+    is checkpointed and calling this again with the same run id resumes it:
+    finished tables are skipped and the others continue chunk by chunk.
+    Returns per-table stats, errors and the totals.
+    """
+    state = get_state_store() if run_id is not None else None
+    results = []
+    errors = {}
+    skipped = []
+    try:
+        for i, table in enumerate(tables):
+            name = f"{table['schema']}.{table['name']}"
+            ctx.check_cancelled()
+            if state is not None and state.table_state(run_id, name)[0] == RUN_SUCCEEDED:
+                skipped.append(name)
+                continue
+            ctx.report(100.0 * i / max(len(tables), 1), f"Copying {name} ({i + 1}/{len(tables)})")
+            try:
+                results.append(copy_table_parallel(
+                    source_connect, target, db, table, target_database=target_database,
+                    source_key=source_key, check=ctx.check_cancelled, state=state, run_id=run_id, **options,
+                ))
+            except Exception as e:
+                if ctx.cancelled:
+                    raise
+                errors[name] = str(e).strip()
+                logger.warning("⚠️ Could not copy %s: %s", name, e)
+    except BaseException as e:
+        if state is not None:
+            state.set_run_status(run_id, RUN_FAILED, "Cancelled" if ctx.cancelled else str(e).strip())
+        raise
+    if state is not None:
+        state.set_run_status(run_id, RUN_FAILED if errors else RUN_SUCCEEDED,
+                             "; ".join(f"{name}: {error}" for name, error in errors.items()) or None)
+
+    totals = {"tables": len(results), "rows": 0, "bytes": 0, "seconds": 0.0}
+    for stats in results:
+        for key in ("rows", "bytes", "seconds"):
+            totals[key] += stats[key]
+    return {"run_id": run_id, "tables": results, "skipped": skipped, "errors": errors, "totals": throughput(totals)}
@@ -0,0 +1,393 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from connection.data_copy import (
+    bracket,
+    chunk_where,
+    plan_chunks,
+    range_replaceable,
+    source_limit,
+    source_table_name,
+    target_chunk_where,
+    target_table_name,
+)
+from connection.ddl import quote_ident
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Rows per range compared in one pass before anything is known to differ
+DEFAULT_VALIDATION_CHUNK_ROWS = int(os.environ.get("LIFTR_VALIDATION_CHUNK_ROWS", "1000000"))
+# A mismatched range is not split further once it holds at most this many source rows
+DEFAULT_LEAF_ROWS = int(os.environ.get("LIFTR_VALIDATION_LEAF_ROWS", "10000"))
+# Sub-ranges a mismatched range is split into per drill-down step
+DEFAULT_FANOUT = 8
+# Drill-down stops after this many splits (e.g. a range of one repeated key)
+MAX_DEPTH = 16
+# Ranges compared at the same time (each holds a source connection and a target session)
+DEFAULT_VALIDATION_WORKERS = int(os.environ.get("LIFTR_VALIDATION_WORKERS", "4"))
+
+# Approximate or opaque types whose text form differs between the engines;
+# they are left out of the row hash and reported as unchecked.
+UNCHECKED_TYPES = {"float", "real", "xml", "sql_variant", "hierarchyid", "geography", "geometry"}
+
+# Every row is hashed from the same text on both sides: each column rendered
+# by the expressions below, NULL as CHAR(30) and columns separated by CHAR(31),
+# encoded as UTF-8 (SQL Server needs a UTF-8 collation, i.e. 2019 or later).
+# The MD5 of that text is folded into two sums of signed 32-bit words, which
+# do not depend on row order, so a range compares with two numbers and a count.
+SQL_SERVER_UTF8 = "Latin1_General_100_BIN2_UTF8"
+
+# column expression templates by SQL Server type; {c} is the quoted column
+_SQL_SERVER_TEXT = {
+    "bit": "CONVERT(VARCHAR(1), {c})",
+    "decimal": "CONVERT(VARCHAR(64), {c})",
+    "numeric": "CONVERT(VARCHAR(64), {c})",
+    "money": "CONVERT(VARCHAR(64), CAST({c} AS DECIMAL(19,4)))",
+    "smallmoney": "CONVERT(VARCHAR(64), CAST({c} AS DECIMAL(10,4)))",
+    "char": f"RTRIM(CONVERT(VARCHAR(MAX), {{c}} COLLATE {SQL_SERVER_UTF8}))",
+    "nchar": f"RTRIM(CONVERT(VARCHAR(MAX), {{c}} COLLATE {SQL_SERVER_UTF8}))",
+    "varchar": f"CONVERT(VARCHAR(MAX), {{c}} COLLATE {SQL_SERVER_UTF8})",
+    "nvarchar": f"CONVERT(VARCHAR(MAX), {{c}} COLLATE {SQL_SERVER_UTF8})",
+    "text": f"CONVERT(VARCHAR(MAX), CAST({{c}} AS NVARCHAR(MAX)) COLLATE {SQL_SERVER_UTF8})",
+    "ntext": f"CONVERT(VARCHAR(MAX), CAST({{c}} AS NVARCHAR(MAX)) COLLATE {SQL_SERVER_UTF8})",
+    "date": "CONVERT(VARCHAR(10), {c}, 23)",
+    # milliseconds, truncated: the copy goes through Python datetimes (microseconds)
+    "time": "LEFT(CONVERT(VARCHAR(16), CAST({c} AS TIME(7))), 12)",
+    # datetime is already in milliseconds (.000/.003/.007); a DATETIME2 cast would give .0066667
+    "datetime": "CONVERT(VARCHAR(23), {c}, 121)",
+    "datetime2": "LEFT(CONVERT(VARCHAR(27), CAST({c} AS DATETIME2(7)), 121), 23)",
+    "smalldatetime": "LEFT(CONVERT(VARCHAR(27), CAST({c} AS DATETIME2(7)), 121), 23)",
+    "datetimeoffset": "LEFT(CONVERT(VARCHAR(27), CAST(SWITCHOFFSET({c}, '+00:00') AS DATETIME2(7)), 121), 23)",
+    "uniqueidentifier": "LOWER(CONVERT(VARCHAR(36), {c}))",
+    "binary": "CONVERT(VARCHAR(MAX), CAST({c} AS VARBINARY(MAX)), 2)",
+    "varbinary": "CONVERT(VARCHAR(MAX), {c}, 2)",
+    "image": "CONVERT(VARCHAR(MAX), CAST({c} AS VARBINARY(MAX)), 2)",
+    "timestamp": "CONVERT(VARCHAR(MAX), CAST({c} AS VARBINARY(MAX)), 2)",
+    "rowversion": "CONVERT(VARCHAR(MAX), CAST({c} AS VARBINARY(MAX)), 2)",
+}
+_SQL_SERVER_DEFAULT_TEXT = "CONVERT(VARCHAR(64), {c})"
+
+# the same text from the PostgreSQL column connection.ddl created for each SQL Server type
+_POSTGRES_TEXT = {
+    "bit": "CASE WHEN {c} THEN '1' ELSE '0' END",
+    "date": "to_char({c}, 'YYYY-MM-DD')",
+    "time": "to_char({c}, 'HH24:MI:SS.MS')",
+    "datetime": "to_char({c}, 'YYYY-MM-DD HH24:MI:SS.MS')",
+    "datetime2": "to_char({c}, 'YYYY-MM-DD HH24:MI:SS.MS')",
+    "smalldatetime": "to_char({c}, 'YYYY-MM-DD HH24:MI:SS.MS')",
+    "datetimeoffset": "to_char({c} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.MS')",
+    "binary": "upper(encode({c}, 'hex'))",
+    "varbinary": "upper(encode({c}, 'hex'))",
+    "image": "upper(encode({c}, 'hex'))",
+    "timestamp": "upper(encode({c}, 'hex'))",
+    "rowversion": "upper(encode({c}, 'hex'))",
+}
+_POSTGRES_DEFAULT_TEXT = "{c}::text"
+
+SOURCE_AGGREGATE_QUERY = """
+SELECT COUNT_BIG(*) AS row_count,
+       SUM(CAST(CAST(SUBSTRING(h, 1, 4) AS INT) AS BIGINT)) AS hash_a,
+       SUM(CAST(CAST(SUBSTRING(h, 5, 4) AS INT) AS BIGINT)) AS hash_b
+FROM (SELECT HASHBYTES('MD5', {row}) AS h FROM {table}{where}) hashed;
+"""
+
+TARGET_AGGREGATE_QUERY = """
+SELECT count(*),
+       sum(('x' || substr(h, 1, 8))::bit(32)::int::bigint),
+       sum(('x' || substr(h, 9, 8))::bit(32)::int::bigint)
+FROM (SELECT md5({row}) AS h FROM {table}{where}) hashed;
+"""
+
+RANGE_BOUNDS_QUERY = "SELECT MIN({column}) AS low, MAX({column}) AS high FROM {table}{where};"
+
+# upper key of each of ? equally sized slices of a range
+RANGE_SLICES_QUERY = """
+SELECT MAX(k) AS upper
+FROM (SELECT {column} AS k, NTILE(?) OVER (ORDER BY {column}) AS tile FROM {table}{where}) slices
+GROUP BY tile
+ORDER BY tile;
+"""
+
+
+def checked_columns(table):
+    """(columns hashed, names of columns left out) of a catalog table record."""
+    checked = []
+    unchecked = []
+    for column in table.get("columns", []):
+        if str(column.get("data_type") or "").lower() in UNCHECKED_TYPES:
+            unchecked.append(column["column_name"])
+        else:
+            checked.append(column)
+    return checked, unchecked
+
+
+def sql_server_row_text(columns):
+    parts = []
+    for column in columns:
+        template = _SQL_SERVER_TEXT.get(str(column.get("data_type") or "").lower(), _SQL_SERVER_DEFAULT_TEXT)
+        parts.append(f"ISNULL({template.format(c=bracket(column['column_name']))}, CHAR(30))")
+    return " + CHAR(31) + ".join(parts) or "''"
+
+
+def postgres_row_text(columns, lowercase=True):
+    parts = []
+    for column in columns:
+        template = _POSTGRES_TEXT.get(str(column.get("data_type") or "").lower(), _POSTGRES_DEFAULT_TEXT)
+        parts.append(f"coalesce({template.format(c=quote_ident(column['column_name'], lowercase))}, chr(30))")
+    return " || chr(31) || ".join(parts) or "''"
+
+
+def _where(clause):
+    return f" WHERE {clause}" if clause else ""
+
+
+class TableValidator:
+    """
+    Queries comparing one table on both sides, range by range.
+
+    Built once per table from its catalog record; compare() returns the row
+    count and hash aggregate of a chunk on each side and split() cuts a
+    mismatched chunk into smaller ones (see plan_chunks for the chunk shape).
+    """
+
+    def __init__(self, db, table, column, integer_key, schema_map=None, lowercase=True):
+        self.db = db
+        self.column = column
+        self.integer_key = integer_key
+        self.lowercase = lowercase
+        columns, self.unchecked = checked_columns(table)
+        self.source_table = source_table_name(db, table)
+        self.target_table = target_table_name(table, schema_map, lowercase)
+        self.source_sql = SOURCE_AGGREGATE_QUERY.format(row=sql_server_row_text(columns), table=self.source_table,
+                                                        where="{where}")
+        self.target_sql = TARGET_AGGREGATE_QUERY.format(row=postgres_row_text(columns, lowercase),
+                                                        table=self.target_table, where="{where}")
+
+    def compare(self, source_cursor, target_cursor, chunk):
+        """((rows, hash_a, hash_b) of the source, the same of the target) for one chunk."""
+        where, params = chunk_where(self.column, chunk)
+        source_cursor.execute(self.source_sql.replace("{where}", _where(where)), *params)
+        source = tuple(int(v or 0) for v in source_cursor.fetchone())
+        where, params = target_chunk_where(self.column, chunk, self.lowercase)
+        target_cursor.execute(self.target_sql.replace("{where}", _where(where)), params or None)
+        target = tuple(int(v or 0) for v in target_cursor.fetchone())
+        return source, target
+
+    def split(self, source_cursor, chunk, fanout=DEFAULT_FANOUT):
+        """Sub-chunks covering the same rows as `chunk`, or [] if it cannot be split."""
+        if self.column is None:
+            return []
+        where, params = chunk_where(self.column, {**chunk, "include_null": False})
+        column = bracket(self.column)
+        if self.integer_key:
+            source_cursor.execute(RANGE_BOUNDS_QUERY.format(column=column, table=self.source_table,
+                                                            where=_where(where)), *params)
+            bounds = source_cursor.fetchone()
+            if bounds is None or bounds.low is None or bounds.low == bounds.high:
+                return []
+            step = max(1, -(-(bounds.high - bounds.low + 1) // fanout))
+            uppers = list(range(bounds.low + step, bounds.high + 1, step))
+            lower_inclusive = True
+        else:
+            source_cursor.execute(RANGE_SLICES_QUERY.format(column=column, table=self.source_table,
+                                                            where=_where(where)), fanout, *params)
+            uppers = list(dict.fromkeys(r.upper for r in source_cursor.fetchall()))[:-1]
+            lower_inclusive = False
+        if not uppers:
+            return []
+        # the first and last sub-chunks keep the parent's outer bounds (and its NULLs)
+        children = []
+        lower = chunk.get("lower")
+        first_inclusive = chunk.get("lower_inclusive", True)
+        for upper in uppers:
+            children.append({"lower": lower, "upper": upper, "lower_inclusive": first_inclusive,
+                             "upper_inclusive": not lower_inclusive})
+            lower = upper
+            first_inclusive = lower_inclusive
+        children.append({"lower": lower, "upper": chunk.get("upper"), "lower_inclusive": first_inclusive,
+                         "upper_inclusive": chunk.get("upper_inclusive")})
+        if chunk.get("include_null"):
+            children[0]["include_null"] = True
+        return children
+
+
+def validation_chunks(plan):
+    """Planned chunks of a table; an integer key range is cut into fixed steps."""
+    if plan["kind"] != "key_range":
+        return [dict(c) for c in plan["chunks"]]
+    chunks = []
+    lower = plan["low"]
+    while lower <= plan["high"]:
+        upper = lower + plan["step"]
+        chunks.append({"lower": lower, "upper": upper, "lower_inclusive": True, "upper_inclusive": False})
+        lower = upper
+    # the last range is open-ended so keys added after planning are compared too
+    chunks[-1]["upper"] = None
+    return chunks
+
+
+def validate_table(source_connect, target, db, table, workers=DEFAULT_VALIDATION_WORKERS,
+                   chunk_rows=DEFAULT_VALIDATION_CHUNK_ROWS, leaf_rows=DEFAULT_LEAF_ROWS, fanout=DEFAULT_FANOUT,
+                   target_database=None, source_key=None, schema_map=None, lowercase=True, check=None):
+    """
+    Compare one copied table between SQL Server and PostgreSQL inside the databases.
+
+    The table is cut into key ranges like a copy (see plan_chunks) and each
+    range is reduced to a row count and a row-order independent hash on both
+    sides, so only three numbers per range leave each server. Ranges that
+    differ are split into `fanout` sub-ranges and compared again, down to
+    about `leaf_rows` source rows; ranges that match are never looked at
+    again. `workers` ranges are compared at once, each worker holding one
+    source connection (counted against source_limit(source_key)) and one
+    target session. A table whose key does not sort alike on both engines
+    (see range_replaceable) is compared as one range.
+
+    Returns {"table", "match", "source_rows", "target_rows", "mismatches"
+    (the smallest differing ranges with both sides' row counts),
+    "unchecked_columns", "ranges_compared", ...}.
+    """
+    start = time.perf_counter()
+    name = f"{table['schema']}.{table['name']}"
+    rows = (table.get("data_volume") or {}).get("rows") or 0
+    plan_conn = source_connect()
+    try:
+        plan = plan_chunks(plan_conn.cursor(), db, table, chunk_rows)
+        if plan["kind"] == "single" and rows > leaf_rows:
+            # smaller than one chunk: plan it in halves so a mismatch can still be drilled into
+            plan = plan_chunks(plan_conn.cursor(), db, table, max(leaf_rows, -(-rows // 2)))
+    finally:
+        plan_conn.close()
+    if not range_replaceable(plan):
+        # a key range of this type can select other rows in PostgreSQL (collation, uniqueidentifier
+        # byte order), so the table is compared as a whole: one count and hash, no drill-down
+        logger.info("🔎 %s is keyed on %s; comparing it as a whole", name, plan.get("type"))
+        plan = {"kind": "single", "column": None, "chunks": [{}]}
+    integer_key = plan["kind"] == "key_range"
+    validator = TableValidator(db, table, plan["column"], integer_key, schema_map, lowercase)
+
+    tasks = deque((chunk, 0) for chunk in validation_chunks(plan))
+    cond = threading.Condition()
+    state = {"active": 0, "failed": False, "compared": 0, "source_rows": 0, "target_rows": 0}
+    mismatches = []
+    workers = 1 if plan["kind"] == "single" else max(1, min(int(workers or 1), len(tasks)))
+    limit = source_limit(source_key) if source_key is not None else None
+
+    def take():
+        with cond:
+            while not tasks and state["active"] and not state["failed"]:
+                cond.wait(1)
+                if check is not None:
+                    check()
+            if not tasks or state["failed"]:
+                return None
+            state["active"] += 1
+            return tasks.popleft()
+
+    def work():
+        if limit is not None:
+            while not limit.acquire(timeout=1):
+                if check is not None:
+                    check()
+        try:
+            source_conn = source_connect()
+            try:
+                with target.session(target_database, statement_timeout_ms=0) as target_conn:
+                    source_cursor, target_cursor = source_conn.cursor(), target_conn.cursor()
+                    while True:
+                        task = take()
+                        if task is None:
+                            break
+                        chunk, depth = task
+                        children = []
+                        try:
+                            if check is not None:
+                                check()
+                            source, target_side = validator.compare(source_cursor, target_cursor, chunk)
+                            if source != target_side and source[0] > leaf_rows and depth < MAX_DEPTH:
+                                children = validator.split(source_cursor, chunk, fanout)
+                        except BaseException:
+                            with cond:
+                                state["failed"] = True
+                                state["active"] -= 1
+                                cond.notify_all()
+                            raise
+                        with cond:
+                            state["active"] -= 1
+                            state["compared"] += 1
+                            if depth == 0:
+                                state["source_rows"] += source[0]
+                                state["target_rows"] += target_side[0]
+                            if source != target_side and not children:
+                                mismatches.append({**chunk, "depth": depth, "source_rows": source[0],
+                                                   "target_rows": target_side[0]})
+                            tasks.extend((child, depth + 1) for child in children)
+                            cond.notify_all()
+            finally:
+                source_conn.close()
+        finally:
+            if limit is not None:
+                limit.release()
+
+    with span("validate", db, extractor="validation") as s:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="liftr-validate") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, work) for _ in range(workers)]
+        for future in futures:
+            future.result()
+        s.rows = state["source_rows"]
+
+    mismatches.sort(key=lambda m: (m.get("lower") is not None, m.get("lower") or 0))
+    result = {
+        "table": name,
+        "target": validator.target_table,
+        "match": not mismatches,
+        "plan": plan["kind"],
+        "column": plan["column"],
+        "source_rows": state["source_rows"],
+        "target_rows": state["target_rows"],
+        "ranges_compared": state["compared"],
+        "mismatches": mismatches,
+        "unchecked_columns": validator.unchecked,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+    logger.info("🔎 Validated %s: %s (%s ranges, %s mismatched)", name, "match" if result["match"] else "MISMATCH",
+                result["ranges_compared"], len(mismatches))
+    return result
+
+
+def validate_database(ctx, source_connect, target, db, tables, target_database=None, source_key=None, **options):
+    """
+    Job function: validate the given copied tables of one SQL Server database.
+
+    `tables` are table records of fetch_sql_server_metadata(); their columns
+    decide what is hashed. Tables are validated one after the other (each in
+    parallel ranges, see validate_table). A table that cannot be validated is
+    recorded under errors and the rest continue.
+    """
+    results = []
+    errors = {}
+    for i, table in enumerate(tables):
+        name = f"{table['schema']}.{table['name']}"
+        ctx.check_cancelled()
+        ctx.report(100.0 * i / max(len(tables), 1), f"Validating {name} ({i + 1}/{len(tables)})")
+        try:
+            results.append(validate_table(source_connect, target, db, table, target_database=target_database,
+                                          source_key=source_key, check=ctx.check_cancelled, **options))
+        except Exception as e:
+            if ctx.cancelled:
+                raise
+            errors[name] = str(e).strip()
+            logger.warning("⚠️ Could not validate %s: %s", name, e)
+
+    summary = {
+        "tables": len(results),
+        "matched": sum(1 for r in results if r["match"]),
+        "mismatched": [r["table"] for r in results if not r["match"]],
+        "failed": len(errors),
+    }
+    return {"tables": results, "errors": errors, "summary": summary}
@@ -0,0 +1,125 @@
+import logging
+
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Row counts and space per table/index come from sys.dm_db_partition_stats, one
+# aggregated query per database, so no user table is ever scanned. The DMV needs
+# VIEW DATABASE STATE; without it the same numbers are read from
+# sys.partitions/sys.allocation_units, which only need metadata visibility.
+
+# One row per index (index_id 0 = heap, 1 = clustered) of every user table.
+# data_kb follows sp_spaceused: in-row data pages plus LOB and row-overflow pages.
+DATA_VOLUME_QUERY = """
+SELECT s.name AS schema_name, t.name AS table_name,
+       i.index_id, i.name AS index_name, i.type_desc AS index_type,
+       SUM(ps.row_count) AS row_count,
+       SUM(ps.reserved_page_count) * 8 AS reserved_kb,
+       SUM(ps.used_page_count) * 8 AS used_kb,
+       SUM(ps.in_row_data_page_count + ps.lob_used_page_count + ps.row_overflow_used_page_count) * 8 AS data_kb,
+       COUNT(*) AS partitions
+FROM [{db}].sys.dm_db_partition_stats ps
+JOIN [{db}].sys.tables t ON t.object_id = ps.object_id
+JOIN [{db}].sys.schemas s ON s.schema_id = t.schema_id
+JOIN [{db}].sys.indexes i ON i.object_id = ps.object_id AND i.index_id = ps.index_id
+WHERE t.is_ms_shipped = 0
+GROUP BY s.name, t.name, i.index_id, i.name, i.type_desc
+ORDER BY s.name, t.name, i.index_id;
+"""
+
+# Same columns from sys.allocation_units; every partition has exactly one IN_ROW_DATA
+# (type 1) unit, so its rows are counted once.
+DATA_VOLUME_FALLBACK_QUERY = """
+SELECT s.name AS schema_name, t.name AS table_name,
+       i.index_id, i.name AS index_name, i.type_desc AS index_type,
+       SUM(CASE WHEN a.type = 1 THEN p.rows ELSE 0 END) AS row_count,
+       SUM(a.total_pages) * 8 AS reserved_kb,
+       SUM(a.used_pages) * 8 AS used_kb,
+       SUM(CASE WHEN a.type = 1 THEN a.data_pages ELSE a.used_pages END) * 8 AS data_kb,
+       SUM(CASE WHEN a.type = 1 THEN 1 ELSE 0 END) AS partitions
+FROM [{db}].sys.tables t
+JOIN [{db}].sys.schemas s ON s.schema_id = t.schema_id
+JOIN [{db}].sys.indexes i ON i.object_id = t.object_id
+JOIN [{db}].sys.partitions p ON p.object_id = i.object_id AND p.index_id = i.index_id
+JOIN [{db}].sys.allocation_units a ON a.container_id = p.partition_id
+WHERE t.is_ms_shipped = 0
+GROUP BY s.name, t.name, i.index_id, i.name, i.type_desc
+ORDER BY s.name, t.name, i.index_id;
+"""
+
+def group_data_volume(rows):
+    """Fold per-index rows into {(schema, table): volume dict} (rows/data from the heap or clustered index)."""
+    tables = {}
+    for r in rows:
+        volume = tables.setdefault((r.schema_name, r.table_name), {
+            "rows": 0, "reserved_kb": 0, "used_kb": 0, "data_kb": 0, "index_kb": 0,
+            "partitions": 0, "indexes": [],
+        })
+        volume["reserved_kb"] += r.reserved_kb or 0
+        volume["used_kb"] += r.used_kb or 0
+        if r.index_id in (0, 1):
+            volume["rows"] = r.row_count or 0
+            volume["data_kb"] = r.data_kb or 0
+            volume["partitions"] = r.partitions or 0
+        volume["index_kb"] = volume["used_kb"] - volume["data_kb"]
+        volume["indexes"].append({
+            "name": r.index_name,
+            "type": r.index_type,
+            "rows": r.row_count or 0,
+            "reserved_kb": r.reserved_kb or 0,
+            "used_kb": r.used_kb or 0,
+            "partitions": r.partitions or 0,
+        })
+    return tables
+
+
+def new_volume_totals(source):
+    return {"source": source, "tables": 0, "rows": 0, "reserved_kb": 0, "used_kb": 0, "data_kb": 0, "index_kb": 0}
+
+
+def add_table_volume(totals, table, tables):
+    """Set "data_volume" on one table record and add it to the database totals."""
+    volume = tables.get((table['schema'], table['name']))
+    if volume is None:
+        return
+    table['data_volume'] = volume
+    totals["tables"] += 1
+    for key in ("rows", "reserved_kb", "used_kb", "data_kb", "index_kb"):
+        totals[key] += volume[key]
+
+
+def read_data_volume(cursor, db):
+    """Return ({(schema, table): volume}, source name), falling back to the allocation units if the DMV fails."""
+    with span("data_volume", db) as s:
+        try:
+            cursor.execute(DATA_VOLUME_QUERY.format(db=db))
+            rows, source = cursor.fetchall(), "dm_db_partition_stats"
+        except Exception:
+            cursor.execute(DATA_VOLUME_FALLBACK_QUERY.format(db=db))
+            rows, source = cursor.fetchall(), "allocation_units"
+        s.rows = len(rows)
+    return group_data_volume(rows), source
+
+
+def fetch_data_volume(cursor, db, db_meta):
+    """
+    Attach the data volume of every table of one database to db_meta.
+
+    Each table record gets "data_volume" (rows, reserved/used/data/index KB and
+    one entry per index) and db_meta gets the database totals under the same
+    key. Missing permissions are not fatal: if neither query can be read the
+    error is recorded as db_meta["data_volume"]["error"] and the rest of the
+    metadata is kept.
+    """
+    try:
+        tables, source = read_data_volume(cursor, db)
+    except Exception as e:
+        logger.warning("⚠️ Could not read data volume for %s: %s", db, e)
+        db_meta['data_volume'] = {"error": str(e)}
+        return db_meta['data_volume']
+    totals = new_volume_totals(source)
+    for table in db_meta.get('tables', []):
+        add_table_volume(totals, table, tables)
+    db_meta['data_volume'] = totals
+    return totals
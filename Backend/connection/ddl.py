@@ -0,0 +1,194 @@
+import logging
+import re
+from functools import lru_cache
+
+from connection.schema_diff import canonical_default
+
+logger = logging.getLogger(__name__)
+
+# SQL Server type -> (PostgreSQL type, how the column's size is applied):
+# "length" adds (max_length) and turns -1 (MAX) into TEXT/BYTEA, "numeric"
+# adds (precision, scale) when the metadata has them, None keeps the type as is.
+TYPE_MAP = {
+    "bigint": ("BIGINT", None),
+    "int": ("INTEGER", None),
+    "smallint": ("SMALLINT", None),
+    "tinyint": ("SMALLINT", None),
+    "bit": ("BOOLEAN", None),
+    "decimal": ("NUMERIC", "numeric"),
+    "numeric": ("NUMERIC", "numeric"),
+    "money": ("NUMERIC(19,4)", None),
+    "smallmoney": ("NUMERIC(10,4)", None),
+    "float": ("DOUBLE PRECISION", None),
+    "real": ("REAL", None),
+    "char": ("CHAR", "length"),
+    "nchar": ("CHAR", "length"),
+    "varchar": ("VARCHAR", "length"),
+    "nvarchar": ("VARCHAR", "length"),
+    "text": ("TEXT", None),
+    "ntext": ("TEXT", None),
+    "date": ("DATE", None),
+    "time": ("TIME", None),
+    "datetime": ("TIMESTAMP(3)", None),
+    "datetime2": ("TIMESTAMP", None),
+    "smalldatetime": ("TIMESTAMP(0)", None),
+    "datetimeoffset": ("TIMESTAMPTZ", None),
+    "uniqueidentifier": ("UUID", None),
+    "binary": ("BYTEA", None),
+    "varbinary": ("BYTEA", None),
+    "image": ("BYTEA", None),
+    "timestamp": ("BYTEA", None),
+    "rowversion": ("BYTEA", None),
+    "xml": ("XML", None),
+    "sql_variant": ("TEXT", None),
+    "hierarchyid": ("TEXT", None),
+}
+
+# SQL Server default functions with a PostgreSQL equivalent
+DEFAULT_FUNCTIONS = {
+    "getdate()": "CURRENT_TIMESTAMP",
+    "sysdatetime()": "CURRENT_TIMESTAMP",
+    "current_timestamp": "CURRENT_TIMESTAMP",
+    "getutcdate()": "(now() AT TIME ZONE 'utc')",
+    "sysutcdatetime()": "(now() AT TIME ZONE 'utc')",
+    "sysdatetimeoffset()": "now()",
+    "newid()": "gen_random_uuid()",
+    "newsequentialid()": "gen_random_uuid()",
+    "user_name()": "CURRENT_USER",
+    "suser_sname()": "CURRENT_USER",
+}
+
+RESERVED_WORDS = {
+    "all", "analyse", "analyze", "and", "any", "array", "as", "asc", "both", "case", "cast", "check",
+    "collate", "column", "constraint", "create", "current_date", "current_role", "current_time",
+    "current_timestamp", "current_user", "default", "desc", "distinct", "do", "else", "end", "except",
+    "false", "fetch", "for", "foreign", "from", "grant", "group", "having", "in", "initially",
+    "intersect", "into", "leading", "limit", "localtime", "localtimestamp", "not", "null", "offset",
+    "on", "only", "or", "order", "placing", "primary", "references", "returning", "select",
+    "session_user", "some", "symmetric", "table", "then", "to", "trailing", "true", "union", "unique",
+    "user", "using", "variadic", "when", "where", "window", "with",
+}
+
+_PLAIN_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_$]*$")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+_STRING = re.compile(r"^N?'(?:[^']|'')*'$", re.DOTALL)
+
+
+@lru_cache(maxsize=65536)
+def quote_ident(name, lowercase=True):
+    """PostgreSQL identifier, double-quoted only when it has to be."""
+    if lowercase:
+        name = name.lower()
+    if _PLAIN_IDENTIFIER.match(name) and name not in RESERVED_WORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=None)
+def map_type(data_type, max_length=None, precision=None, scale=None):
+    """PostgreSQL column type for a SQL Server type; unknown types become TEXT (logged once per type)."""
+    name = str(data_type or "").lower()
+    mapped = TYPE_MAP.get(name)
+    if mapped is None:
+        logger.warning("⚠️ No PostgreSQL type for SQL Server type %s, using TEXT", data_type)
+        return "TEXT"
+    pg_type, sizing = mapped
+    if sizing == "length" and max_length is not None:
+        if max_length == -1:
+            return "TEXT"
+        return f"{pg_type}({max_length})"
+    if sizing == "numeric" and precision is not None:
+        return f"{pg_type}({precision},{scale or 0})"
+    return pg_type
+
+
+@lru_cache(maxsize=65536)
+def map_default(default, pg_type):
+    """PostgreSQL DEFAULT expression for a SQL Server default, or None if it cannot be translated safely."""
+    value = canonical_default(default)
+    if value is None or value == "":
+        return None
+    function = DEFAULT_FUNCTIONS.get(value.lower())
+    if function is not None:
+        return function
+    if _NUMBER.match(value):
+        if pg_type == "BOOLEAN":
+            return "TRUE" if float(value) else "FALSE"
+        return value
+    if _STRING.match(value):
+        return value[1:] if value.startswith("N") else value
+    if value.lower() == "null":
+        return "NULL"
+    logger.warning("⚠️ Default %s has no PostgreSQL translation and is left out", default)
+    return None
+
+
+def column_type_clause(data_type, max_length=None, nullable=None, default=None, precision=None, scale=None):
+    """Type, NOT NULL and DEFAULT part of a column definition."""
+    pg_type = map_type(data_type, max_length, precision, scale)
+    parts = [pg_type]
+    if nullable == "NO":
+        parts.append("NOT NULL")
+    default = map_default(default, pg_type)
+    if default is not None:
+        parts.append(f"DEFAULT {default}")
+    return " ".join(parts)
+
+
+def iter_ddl(db_meta, schema_map=None, lowercase=True, transaction=True, if_not_exists=True):
+    """
+    Yield the PostgreSQL DDL of one SQL Server database as text chunks.
+
+    db_meta is one database of fetch_sql_server_metadata() ({"tables": [...]}).
+    Emits CREATE SCHEMA for every schema followed by one CREATE TABLE per
+    table; with transaction=True the script is wrapped in BEGIN/COMMIT so it is
+    applied all or nothing. schema_map renames schemas (e.g. {"dbo": "public"}).
+    Chunks can be joined into one script or written to a file as they come.
+    """
+    schema_map = schema_map or {}
+    exists = " IF NOT EXISTS" if if_not_exists else ""
+    tables = db_meta.get("tables", [])
+
+    if transaction:
+        yield "BEGIN;\n\n"
+    schemas = dict.fromkeys(quote_ident(schema_map.get(t["schema"], t["schema"]), lowercase) for t in tables)
+    created = [schema for schema in schemas if schema != "public"]
+    for schema in created:
+        yield f"CREATE SCHEMA{exists} {schema};\n"
+    if created:
+        yield "\n"
+
+    # estates repeat a few column shapes many times, so each clause is built once per shape
+    clauses = {}
+    for table in tables:
+        schema = quote_ident(schema_map.get(table["schema"], table["schema"]), lowercase)
+        definitions = []
+        for column in table.get("columns", []):
+            get = column.get
+            shape = (get("data_type"), get("max_length"), get("nullable"), get("default"),
+                     get("precision"), get("scale"))
+            clause = clauses.get(shape)
+            if clause is None:
+                clause = clauses[shape] = column_type_clause(*shape)
+            definitions.append(f"{quote_ident(column['column_name'], lowercase)} {clause}")
+        body = "(\n    " + ",\n    ".join(definitions) + "\n)" if definitions else "()"
+        yield f"CREATE TABLE{exists} {schema}.{quote_ident(table['name'], lowercase)} {body};\n\n"
+    if transaction:
+        yield "COMMIT;\n"
+
+
+def generate_ddl(metadata, databases=None, **options):
+    """{database: DDL script} for every (or the given) database of a metadata dict; see iter_ddl for options."""
+    return {
+        db: "".join(iter_ddl(db_meta, **options))
+        for db, db_meta in metadata.items()
+        if databases is None or db in databases
+    }
+
+
+def write_ddl(path, db_meta, **options):
+    """Stream the DDL of one database into a file and return the number of tables written."""
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in iter_ddl(db_meta, **options):
+            f.write(chunk)
+    return len(db_meta.get("tables", []))
@@ -0,0 +1,213 @@
+import time
+
+
+def _iter_tables(db_meta):
+    """(schema, table, foreign keys) of one database of either catalog shape (see schema_diff._iter_tables)."""
+    if "schemas" in db_meta:
+        for schema, schema_meta in db_meta["schemas"].items():
+            for name, table in (schema_meta.get("tables") or {}).items():
+                yield schema, name, table.get("foreign_keys") or []
+    else:
+        for table in db_meta.get("tables", []):
+            yield table["schema"], table["name"], table.get("foreign_keys") or []
+
+
+def table_name(key):
+    return f"{key[0]}.{key[1]}"
+
+
+class TableGraph:
+    """
+    Foreign key dependency graph of the tables of one database.
+
+    Tables are numbered in catalog order and kept as adjacency lists of
+    numbers: children[i] are the tables that reference table i (and so must be
+    loaded after it), parents[i] the tables it references. Each edge is stored
+    once however many column pairs or constraints back it; the constraint
+    names are kept per edge so a cycle can be reported as the constraints to
+    defer. Foreign keys to tables outside the catalog are listed in `missing`.
+    Every algorithm below is iterative and linear in tables + edges.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.index = {}
+        for i, key in enumerate(self.keys):
+            # the first record wins, like connection.catalog.Catalog
+            self.index.setdefault(key, i)
+        self.children = [[] for _ in self.keys]
+        self.parents = [[] for _ in self.keys]
+        self.constraints = {}      # (parent, child) -> constraint names
+        self.self_references = {}  # table -> constraint names
+        self.missing = []
+
+    @classmethod
+    def from_metadata(cls, db_meta):
+        """Graph of one database of a SQL Server or PostgreSQL metadata dict."""
+        tables = list(_iter_tables(db_meta))
+        graph = cls((schema, name) for schema, name, _ in tables)
+        for schema, name, foreign_keys in tables:
+            child = graph.index[(schema, name)]
+            for fk in foreign_keys:
+                parent = graph.index.get((fk.get("foreign_schema"), fk.get("foreign_table")))
+                if parent is None:
+                    graph.missing.append({"constraint_name": fk.get("constraint_name"), "table": f"{schema}.{name}",
+                                          "references": f"{fk.get('foreign_schema')}.{fk.get('foreign_table')}"})
+                    continue
+                graph.add_edge(parent, child, fk.get("constraint_name"))
+        return graph
+
+    def add_edge(self, parent, child, constraint=None):
+        if parent == child:
+            names = self.self_references.setdefault(child, [])
+        else:
+            names = self.constraints.get((parent, child))
+            if names is None:
+                names = self.constraints[(parent, child)] = []
+                self.children[parent].append(child)
+                self.parents[child].append(parent)
+        if constraint is not None and constraint not in names:
+            names.append(constraint)
+
+    @property
+    def edge_count(self):
+        return len(self.constraints)
+
+    def strongly_connected_components(self):
+        """
+        Tarjan's algorithm without recursion (catalogs can chain thousands of tables).
+
+        Returns (components, component of each table); components are lists of
+        table numbers, parents' components before their children's.
+        """
+        n = len(self.keys)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        component = [-1] * n
+        components = []
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, i = work[-1]
+                children = self.children[node]
+                if i < len(children):
+                    work[-1] = (node, i + 1)
+                    child = children[i]
+                    if index[child] == -1:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, 0))
+                    elif on_stack[child] and index[child] < low[node]:
+                        low[node] = index[child]
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = len(components)
+                        members.append(member)
+                        if member == node:
+                            break
+                    members.sort()
+                    components.append(members)
+        # Tarjan finishes a component after everything reachable from it, i.e. children first
+        components.reverse()
+        last = len(components) - 1
+        component = [last - c for c in component]
+        return components, component
+
+    def waves(self):
+        """
+        Kahn's algorithm over the components: lists of tables that can load at the same time.
+
+        Wave 0 references nothing, every later wave only references earlier
+        waves or (for a cycle) tables of its own component. Returns (waves as
+        lists of table numbers, components with a cycle, component of each table).
+        """
+        components, component = self.strongly_connected_components()
+        indegree = [0] * len(components)
+        edges = [set() for _ in components]
+        for parent, child in self.constraints:
+            a, b = component[parent], component[child]
+            if a != b and b not in edges[a]:
+                edges[a].add(b)
+                indegree[b] += 1
+
+        waves = []
+        current = [c for c in range(len(components)) if not indegree[c]]
+        while current:
+            waves.append(sorted(member for c in current for member in components[c]))
+            following = []
+            for c in current:
+                for d in edges[c]:
+                    indegree[d] -= 1
+                    if not indegree[d]:
+                        following.append(d)
+            current = following
+        cycles = [members for members in components
+                  if len(members) > 1 or members[0] in self.self_references]
+        return waves, cycles, component
+
+    def deferred_constraints(self, component):
+        """Foreign keys inside a cycle: they have to be DEFERRABLE or added after the load."""
+        deferred = []
+        for (parent, child), names in self.constraints.items():
+            if component[parent] == component[child]:
+                for name in names or [None]:
+                    deferred.append({"constraint_name": name, "table": table_name(self.keys[child]),
+                                     "references": table_name(self.keys[parent])})
+        for table, names in self.self_references.items():
+            for name in names or [None]:
+                deferred.append({"constraint_name": name, "table": table_name(self.keys[table]),
+                                 "references": table_name(self.keys[table])})
+        return deferred
+
+
+def load_plan(db_meta):
+    """
+    Load order of one database's tables: parents before the tables that reference them.
+
+    Returns {"tables", "edges", "order", "waves" (lists of "schema.table"
+    that can load in parallel, in order), "cycles", "deferred_constraints"
+    (foreign keys to defer so each cycle can load), "missing_references",
+    "seconds"}.
+    """
+    start = time.perf_counter()
+    graph = TableGraph.from_metadata(db_meta)
+    waves, cycles, component = graph.waves()
+    names = [table_name(key) for key in graph.keys]
+    waves = [[names[i] for i in wave] for wave in waves]
+    return {
+        "tables": len(names),
+        "edges": graph.edge_count,
+        "order": [name for wave in waves for name in wave],
+        "waves": waves,
+        "cycles": [[names[i] for i in members] for members in cycles],
+        "deferred_constraints": graph.deferred_constraints(component),
+        "missing_references": graph.missing,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def order_tables(tables):
+    """SQL Server table records sorted into load order (parents first, catalog order within a wave)."""
+    graph = TableGraph.from_metadata({"tables": tables})
+    waves, _, _ = graph.waves()
+    return [tables[i] for wave in waves for i in wave]
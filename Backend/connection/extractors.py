@@ -0,0 +1,149 @@
+import abc
+import importlib
+import importlib.util
+import threading
+
+
+class DriverUnavailable(RuntimeError):
+    """The database driver a source type needs is not installed."""
+
+
+class SourceExtractor(abc.ABC):
+    """
+    One kind of source database the app can connect to and read a catalog from.
+
+    Subclasses name the driver module they need; it is imported the first time
+    a connection of that type is opened (load_driver), so starting the app or
+    importing the extractors never pays for, or fails on, a driver that is not
+    used. open() turns a connect request body into a source object with a
+    zero-argument connect(), fetch_metadata() reads every database of a source
+    and returns (metadata, errors).
+    """
+
+    name = None
+    label = None
+    driver = None  # module imported on first use
+
+    def __init__(self):
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def load_driver(self):
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    try:
+                        self._driver = importlib.import_module(self.driver)
+                    except ImportError as e:
+                        raise DriverUnavailable(
+                            f"{self.driver} is required for {self.label} connections but could not be imported: {e}"
+                        ) from e
+        return self._driver
+
+    def driver_available(self):
+        """True if the driver is installed (checked without importing it)."""
+        return self._driver is not None or importlib.util.find_spec(self.driver) is not None
+
+    @abc.abstractmethod
+    def open(self, data):
+        """Source object for a connect request body; raises ValueError for missing fields."""
+
+    @abc.abstractmethod
+    def fetch_metadata(self, source, max_workers=None, **options):
+        """Read every database of `source`; returns (metadata, errors)."""
+
+    def to_dict(self):
+        return {"name": self.name, "label": self.label, "driver": self.driver,
+                "driver_available": self.driver_available()}
+
+
+def build_sql_server_conn_str(data):
+    """ODBC connection string from a connect request body; raises ValueError for missing fields."""
+    server = data.get("server")
+    auth_type = (data.get("auth_type") or data.get("authType") or "no").lower()
+    username = data.get("username")
+    password = data.get("password")
+
+    if not server:
+        raise ValueError("Server name is required")
+
+    driver = "{ODBC Driver 18 for SQL Server}"
+    if auth_type == "no":
+        if not username or not password:
+            raise ValueError("Username and password required")
+        return f"DRIVER={driver};SERVER={server};UID={username};PWD={password};Encrypt=no;"
+    return f"DRIVER={driver};SERVER={server};Trusted_Connection=yes;"
+
+
+class SqlServerSource:
+    def __init__(self, pyodbc, conn_str, server, info, timeout=5):
+        self._pyodbc = pyodbc
+        self.conn_str = conn_str
+        self.server = server
+        self.info = info
+        self.timeout = timeout
+
+    def connect(self):
+        return self._pyodbc.connect(self.conn_str, timeout=self.timeout)
+
+
+class SqlServerExtractor(SourceExtractor):
+    name = "sqlserver"
+    label = "SQL Server"
+    driver = "pyodbc"
+
+    def open(self, data):
+        conn_str = build_sql_server_conn_str(data)
+        info = {
+            "auth_type": (data.get("auth_type") or data.get("authType") or "no").lower(),
+            "username": data.get("username"),
+        }
+        return SqlServerSource(self.load_driver(), conn_str, data.get("server"), info)
+
+    def fetch_metadata(self, source, max_workers=None, **options):
+        from connection.Remote_sql_server import DEFAULT_METADATA_WORKERS, fetch_sql_server_metadata_parallel
+        connect = getattr(source, "connect", source)
+        return fetch_sql_server_metadata_parallel(connect, max_workers=max_workers or DEFAULT_METADATA_WORKERS,
+                                                  **options)
+
+
+class PostgresExtractor(SourceExtractor):
+    name = "postgres"
+    label = "PostgreSQL"
+    driver = "psycopg2"
+
+    def open(self, data):
+        from connection.postgres import PostgresSource
+        host = data.get("host") or data.get("server")
+        if not host or not data.get("username"):
+            raise ValueError("Host and username are required")
+        self.load_driver()
+        return PostgresSource(
+            host, data.get("username"), data.get("password"),
+            port=data.get("port"), database=data.get("database"),
+        )
+
+    def fetch_metadata(self, source, max_workers=None, **options):
+        from connection.postgres import DEFAULT_PG_WORKERS, get_metadata
+        return get_metadata(source, max_workers=max_workers or DEFAULT_PG_WORKERS, **options)
+
+
+EXTRACTORS = {}
+
+
+def register_extractor(extractor):
+    """Make a source type available under extractor.name (a later registration replaces it)."""
+    EXTRACTORS[extractor.name] = extractor
+    return extractor
+
+
+def get_extractor(name):
+    """Registered extractor for a source type; raises ValueError for unknown types."""
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown source type: {name}") from None
+
+
+register_extractor(SqlServerExtractor())
+register_extractor(PostgresExtractor())
@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime
+
+from connection.catalog import Catalog
+from connection.data_volume import fetch_data_volume
+from connection.snapshot_store import DEFAULT_NAMESPACE
+from connection.Remote_sql_server import (
+    CATALOG_QUERIES,
+    apply_catalog_rows,
+    build_catalog_query,
+    column_record,
+    export_metadata,
+    fetch_database_metadata_batched,
+    list_databases,
+    table_record,
+)
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Cheap per-database change marker: number of catalog objects and their latest
+# modify_date. Adding, altering or dropping a table, view, procedure, function or
+# trigger moves one of the two (ALTER TABLE also bumps the table's modify_date).
+WATERMARK_QUERY = """
+SELECT {ordinal} AS db_ordinal, COUNT(*) AS object_count, MAX(modify_date) AS max_modify
+FROM (
+    SELECT modify_date FROM [{db}].sys.objects
+    WHERE type IN ('U', 'V', 'P', 'PC', 'X', 'RF', 'TR', 'TA') OR type_desc LIKE '%FUNCTION%'
+    UNION ALL
+    SELECT modify_date FROM [{db}].sys.triggers WHERE parent_class = 0
+) o
+"""
+
+# Columns of the tables modified at or after the previous watermark only.
+CHANGED_COLUMNS_QUERY = """
+SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE,
+    CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, IS_NULLABLE, COLUMN_DEFAULT
+FROM [{db}].INFORMATION_SCHEMA.COLUMNS
+WHERE TABLE_NAME IN (SELECT name FROM [{db}].sys.tables WHERE modify_date >= ?)
+ORDER BY TABLE_SCHEMA, TABLE_NAME;
+"""
+
+
+def new_refresh_state():
+    """Empty refresh state: the last metadata snapshot plus per-database watermarks."""
+    return {"metadata": {}, "watermarks": {}}
+
+
+def build_watermark_query(dbs):
+    return "\nUNION ALL\n".join(WATERMARK_QUERY.format(ordinal=i, db=db) for i, db in enumerate(dbs)) + ";"
+
+
+def _watermark(row):
+    return {
+        "modified_at": str(row.max_modify) if row.max_modify is not None else None,
+        "objects": row.object_count,
+    }
+
+
+def fetch_watermarks(conn, dbs):
+    """
+    Read the watermark of every database in one round trip.
+
+    If the combined query fails (an offline or inaccessible database breaks the
+    whole UNION ALL) every database is queried on its own so the others still
+    get a watermark. Returns (watermarks, errors).
+    """
+    watermarks = {}
+    errors = {}
+    if not dbs:
+        return watermarks, errors
+    with span("watermarks") as s:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(build_watermark_query(dbs))
+            for row in cursor.fetchall():
+                watermarks[dbs[row.db_ordinal]] = _watermark(row)
+        except Exception:
+            for db in dbs:
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(build_watermark_query([db]))
+                    watermarks[db] = _watermark(cursor.fetchone())
+                except Exception as e:
+                    errors[db] = str(e)
+        s.rows = len(watermarks)
+        if errors:
+            s.error = f"{len(errors)} database(s) failed"
+    return watermarks, errors
+
+
+def refresh_database_metadata(cursor, db, previous, since):
+    """
+    Re-read one changed database in a single batch.
+
+    Object lists (tables, foreign keys, views, procedures, functions, triggers)
+    are re-listed so additions and drops are picked up, but columns are only fetched for
+    tables modified at or after `since`; every other table keeps the columns
+    from `previous` (a Catalog of the last snapshot).
+    """
+    if since:
+        column_query = CHANGED_COLUMNS_QUERY.format(db=db)
+        params = (datetime.fromisoformat(since),)
+    else:
+        column_query = build_catalog_query(db, "columns")
+        params = ()
+    statements = [build_catalog_query(db, "tables"), column_query]
+    statements += [build_catalog_query(db, key) for key, _, _, _ in CATALOG_QUERIES[2:]]
+    cursor.execute("SET NOCOUNT ON;\n" + "\n".join(statements), *params)
+
+    catalog = Catalog()
+    db_meta = catalog.add_database(db)
+
+    # ---------- Tables (reuse columns of unchanged tables) ----------
+    db_meta['tables'] = []
+    changed = set()
+    for t in cursor.fetchall():
+        rec = table_record(t)
+        key = (rec['schema'], rec['name'])
+        cached = previous.get_table(db, *key)
+        if cached is not None and cached['modified_at'] == rec['modified_at'] \
+                and catalog.get_table(db, *key) is None:
+            rec['columns'] = list(cached['columns'])
+        else:
+            changed.add(key)
+        catalog.add_table(db, rec)
+
+    # ---------- Columns of changed tables ----------
+    if not cursor.nextset():
+        raise RuntimeError(f"Refresh batch for {db} returned no result set for columns")
+    for c in cursor.fetchall():
+        if (c.TABLE_SCHEMA, c.TABLE_NAME) in changed:
+            catalog.add_column(db, c.TABLE_SCHEMA, c.TABLE_NAME, column_record(c))
+
+    # ---------- Foreign keys, views, procedures, functions, triggers ----------
+    for key, _, _, _ in CATALOG_QUERIES[2:]:
+        if not cursor.nextset():
+            raise RuntimeError(f"Refresh batch for {db} returned no result set for {key}")
+        apply_catalog_rows(catalog, db, key, cursor.fetchall())
+    fetch_data_volume(cursor, db, db_meta)
+    return db_meta
+
+
+def _keep_cached(db, old_metadata, old_watermarks, metadata, watermarks):
+    # keep the last good snapshot and watermark so a transient failure does not force a full re-read
+    metadata[db] = old_metadata.get(db, {})
+    if db in old_watermarks and db in old_metadata:
+        watermarks[db] = old_watermarks[db]
+
+
+def refresh_sql_server_metadata(conn, state=None, namespace=DEFAULT_NAMESPACE):
+    """
+    Bring a cached metadata snapshot up to date.
+
+    Databases whose watermark is unchanged are reused as-is, new databases are
+    read in full, dropped ones are removed, and changed ones are re-read with
+    refresh_database_metadata(). When nothing changed this costs two round trips
+    for the whole server. Returns (state, summary); `state` can be passed back on
+    the next call. A database that fails keeps its cached metadata and is
+    retried next time. A new snapshot is saved only when something changed.
+    Data volume is only re-read for databases that are read again, so row
+    counts of unchanged databases are those of the cached snapshot.
+    """
+    state = state or new_refresh_state()
+    old_metadata = state["metadata"]
+    old_watermarks = state["watermarks"]
+    previous = Catalog(old_metadata)
+
+    dbs = list_databases(conn.cursor())
+    current, errors = fetch_watermarks(conn, dbs)
+
+    metadata = {}
+    watermarks = {}
+    summary = {
+        "full": [],
+        "incremental": [],
+        "unchanged": [],
+        "dropped": [db for db in old_metadata if db not in dbs],
+        "errors": errors,
+    }
+    for db in dbs:
+        if db in errors:
+            _keep_cached(db, old_metadata, old_watermarks, metadata, watermarks)
+            continue
+
+        mark = current[db]
+        last = old_watermarks.get(db)
+        try:
+            if last is None or db not in old_metadata:
+                metadata[db] = {}
+                with span("database", db):
+                    fetch_database_metadata_batched(conn.cursor(), db, metadata[db])
+                summary["full"].append(db)
+            elif last == mark:
+                metadata[db] = old_metadata[db]
+                summary["unchanged"].append(db)
+            else:
+                with span("refresh", db):
+                    metadata[db] = refresh_database_metadata(conn.cursor(), db, previous, last["modified_at"])
+                summary["incremental"].append(db)
+            watermarks[db] = mark
+        except Exception as e:
+            logger.warning("⚠️ Could not refresh metadata for %s: %s", db, e)
+            errors[db] = str(e)
+            _keep_cached(db, old_metadata, old_watermarks, metadata, watermarks)
+
+    logger.info(
+        "🔄 Metadata refresh: %s full, %s incremental, %s unchanged, %s dropped, %s failed",
+        len(summary['full']), len(summary['incremental']), len(summary['unchanged']),
+        len(summary['dropped']), len(errors),
+    )
+    if summary["full"] or summary["incremental"] or summary["dropped"]:
+        export_metadata(metadata, namespace)
+    return {"metadata": metadata, "watermarks": watermarks}, summary
@@ -0,0 +1,541 @@
+"""
+Synthetic data for the instacart.sales_schema database of Postgres_data_insert.py.
+
+Fills its tables with a chosen scale factor (scale 1 is about 6.5 million
+rows, most of them orders and order items) so extraction, copy and
+validation can be measured locally against realistic data. Every foreign key
+points at a generated row, order dates fall inside the partitions of
+sales_schema.orders and the output only depends on the scale and the seed:
+the same arguments always produce the same rows. Tables are loaded parents
+first with COPY ... FROM STDIN in streamed batches, so no table is held in
+memory and no row is inserted on its own.
+
+Create the schema with Postgres_data_insert.py first, then run from the
+Backend directory (the password comes from PGPASSWORD):
+    python -m connection.instacart_data_gen --scale 0.1 --truncate
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from connection.data_copy import (COPY_READ_SIZE, DEFAULT_COPY_BATCH_ROWS, DEFAULT_COPY_BUFFER_BATCHES,
+                                  CopyAborted, CopyBuffer, encode_copy_rows, throughput)
+from connection.dependency_graph import TableGraph
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "instacart"
+SCHEMA = "sales_schema"
+# Partition bounds of sales_schema.orders in Postgres_data_insert.py, used when they cannot be read
+DEFAULT_ORDER_PARTITIONS = [(date(2025, 1, 1), date(2025, 2, 1)), (date(2025, 2, 1), date(2025, 3, 1))]
+
+# Rows of the tables generated directly at scale 1; the others follow from their parents
+# (addresses, lines, payments, ... per customer, order or product)
+BASE_ROWS = {
+    "customers": 100_000,
+    "products": 25_000,
+    "suppliers": 1_000,
+    "drivers": 2_000,
+    "employees": 500,
+    "orders": 1_000_000,
+    "reviews": 250_000,
+    "audit_log": 50_000,
+}
+# Lookup tables keep their size whatever the scale
+FIXED_ROWS = {"categories": 50, "warehouses": 25, "discounts": 30}
+
+ORDER_STATUSES = [("delivered", 70), ("shipped", 10), ("paid", 8), ("pending", 7), ("cancelled", 5)]
+PAYMENT_METHODS = ["card", "card", "card", "paypal", "apple_pay", "google_pay", "gift_card"]
+EMPLOYEE_ROLES = ["shopper", "shopper", "shopper", "support", "warehouse", "manager", "analyst"]
+AUDIT_OPERATIONS = ["INSERT", "UPDATE", "DELETE"]
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Karen",
+    "Daniel", "Lisa", "Matthew", "Nancy", "Anthony", "Sandra", "Mark", "Ashley", "Wei", "Priya",
+    "Ahmed", "Fatima", "Hiroshi", "Yuki", "Olga", "Ivan", "Lucia", "Mateo", "Amara", "Kwame",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Nguyen", "Patel", "Kim", "Chen", "Singh", "Okafor", "Tanaka", "Kowalski", "Novak", "O'Brien",
+]
+CITIES = [
+    ("New York", "NY"), ("Los Angeles", "CA"), ("Chicago", "IL"), ("Houston", "TX"), ("Phoenix", "AZ"),
+    ("Philadelphia", "PA"), ("San Antonio", "TX"), ("San Diego", "CA"), ("Dallas", "TX"), ("San Jose", "CA"),
+    ("Austin", "TX"), ("Seattle", "WA"), ("Denver", "CO"), ("Boston", "MA"), ("Portland", "OR"),
+    ("Atlanta", "GA"), ("Miami", "FL"), ("Minneapolis", "MN"), ("Detroit", "MI"), ("Nashville", "TN"),
+]
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Park Blvd", "Pine St", "Elm St", "Lake Rd",
+           "Hill St", "Sunset Blvd", "River Rd", "Church St", "Market St", "Broadway", "Washington Ave"]
+DEPARTMENTS = ["Produce", "Dairy & Eggs", "Bakery", "Meat & Seafood", "Frozen", "Pantry", "Snacks", "Beverages",
+               "Deli", "Breakfast", "Canned Goods", "Dry Goods & Pasta", "Household", "Personal Care", "Babies",
+               "Pets", "International", "Alcohol", "Bulk", "Health"]
+PRODUCT_ADJECTIVES = ["Organic", "Fresh", "Classic", "Low Fat", "Gluten Free", "Family Size", "Smoked", "Roasted",
+                      "Whole Grain", "Sparkling", "Unsweetened", "Spicy", "Vanilla", "Honey", "Sea Salt"]
+PRODUCT_NOUNS = ["Bananas", "Milk", "Sourdough Bread", "Chicken Breast", "Ice Cream", "Olive Oil", "Tortilla Chips",
+                 "Orange Juice", "Hummus", "Granola", "Black Beans", "Penne", "Paper Towels", "Shampoo", "Yogurt",
+                 "Cheddar", "Almonds", "Coffee", "Salmon", "Spinach", "Peanut Butter", "Rice", "Eggs", "Apples"]
+REVIEW_PHRASES = ["Great quality", "Arrived fresh", "Would buy again", "Not as described", "Good value",
+                  "Packaging was damaged", "Tastes great", "A bit pricey", "Kids love it", "Delivered on time"]
+
+_MASK = (1 << 64) - 1
+
+
+def _mix(seed, n):
+    """SplitMix64 of (seed, n): the structure of the data (who ordered what, when) as a pure function of ids."""
+    z = (seed + (n + 1) * 0x9E3779B97F4A7C15) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def _weighted(choices):
+    """Lookup list of 100 entries for (value, percent) pairs."""
+    table = [value for value, percent in choices for _ in range(percent)]
+    assert len(table) == 100
+    return table
+
+
+GeneratedTable = namedtuple("GeneratedTable", "name columns parents rows identity")
+
+
+def order_partitions(cursor, schema=SCHEMA):
+    """[(from, to)] date ranges of the partitions of <schema>.orders, or DEFAULT_ORDER_PARTITIONS."""
+    cursor.execute(
+        """
+        SELECT pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        JOIN pg_namespace n ON n.oid = p.relnamespace
+        WHERE n.nspname = %s AND p.relname = 'orders';
+        """,
+        (schema,),
+    )
+    ranges = []
+    for (bound,) in cursor.fetchall():
+        match = re.search(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)", bound or "")
+        if match:
+            ranges.append((date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))))
+    if not ranges:
+        logger.warning("⚠️ No date partitions found on %s.orders, using %s", schema, DEFAULT_ORDER_PARTITIONS)
+        return list(DEFAULT_ORDER_PARTITIONS)
+    return sorted(ranges)
+
+
+class InstacartGenerator:
+    """
+    Deterministic rows for every table of sales_schema at a scale factor.
+
+    Which customer placed an order, its date, status and lines are pure
+    functions of the order id (see _mix), so child tables such as order_items
+    or payments are generated in their own pass and still agree with their
+    parent: order totals are the sum of their lines and payments pay those
+    totals. Orders are numbered in date order over the days covered by
+    `partitions` so each lands in an existing partition. Names, addresses and
+    other free text come from one random.Random per table seeded with the
+    table name, so tables can be generated in any order or in parallel.
+    """
+
+    def __init__(self, scale=1.0, seed=42, partitions=None):
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        self.scale = scale
+        self.seed = seed
+        self.counts = {name: max(1, int(round(rows * scale))) for name, rows in BASE_ROWS.items()}
+        self.counts.update(FIXED_ROWS)
+        days = []
+        for start, end in partitions or DEFAULT_ORDER_PARTITIONS:
+            days.extend(start + timedelta(days=i) for i in range((end - start).days))
+        if not days:
+            raise ValueError("The order partitions cover no day")
+        self.order_days = days
+        self.statuses = _weighted(ORDER_STATUSES)
+        self.prices = [self._price(p) for p in range(self.counts["products"] + 1)]
+
+    def _random(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def _key(self, salt):
+        return _mix(self.seed, salt)
+
+    def _price(self, product_id):
+        return Decimal(99 + _mix(self._key(1), product_id) % 2400) / 100
+
+    # ---------- Structure shared by orders and their children ----------
+    def order_date(self, order_id):
+        return self.order_days[(order_id - 1) * len(self.order_days) // self.counts["orders"]]
+
+    def order_customer(self, order_id):
+        return 1 + _mix(self._key(2), order_id) % self.counts["customers"]
+
+    def order_status(self, order_id):
+        return self.statuses[_mix(self._key(3), order_id) % 100]
+
+    def order_lines(self, order_id):
+        """[(product_id, quantity)] of an order: 1 to 5 distinct products."""
+        h = _mix(self._key(4), order_id)
+        products = self.counts["products"]
+        lines = []
+        seen = set()
+        for i in range(1 + h % 5):
+            product = 1 + _mix(h, i) % products
+            if product in seen:
+                continue
+            seen.add(product)
+            lines.append((product, 1 + (h >> (8 + 3 * i)) % 4))
+        return lines
+
+    def order_total(self, order_id):
+        return sum((self.prices[product] * quantity for product, quantity in self.order_lines(order_id)),
+                   Decimal("0.00"))
+
+    # ---------- Tables ----------
+    def tables(self):
+        """GeneratedTable for every table: name, columns, parent tables, row iterator factory, identity column."""
+        return [
+            GeneratedTable("customers", ["customer_id", "first_name", "last_name", "email", "phone", "created_at"],
+                           [], self.customers, "customer_id"),
+            GeneratedTable("customer_addresses", ["address_id", "customer_id", "street", "city", "state",
+                                                  "postal_code", "country"],
+                           ["customers"], self.customer_addresses, "address_id"),
+            GeneratedTable("categories", ["category_id", "category_name"], [], self.categories, "category_id"),
+            GeneratedTable("products", ["product_id", "product_name", "category_id", "price", "created_at"],
+                           [], self.products, "product_id"),
+            GeneratedTable("orders", ["order_id", "customer_id", "order_date", "status", "total"],
+                           ["customers"], self.orders, "order_id"),
+            GeneratedTable("order_items", ["order_item_id", "order_id", "order_date", "product_id", "quantity",
+                                           "price"],
+                           ["orders", "products"], self.order_items, "order_item_id"),
+            GeneratedTable("payments", ["payment_id", "order_id", "order_date", "amount", "payment_method",
+                                        "paid_at"],
+                           ["orders"], self.payments, "payment_id"),
+            GeneratedTable("inventory", ["inventory_id", "product_id", "quantity", "last_updated"],
+                           ["products"], self.inventory, "inventory_id"),
+            GeneratedTable("suppliers", ["supplier_id", "supplier_name", "contact_name", "phone"],
+                           [], self.suppliers, "supplier_id"),
+            GeneratedTable("supplier_products", ["supplier_id", "product_id"],
+                           ["suppliers", "products"], self.supplier_products, None),
+            GeneratedTable("drivers", ["driver_id", "driver_name", "phone"], [], self.drivers, "driver_id"),
+            GeneratedTable("deliveries", ["delivery_id", "order_id", "order_date", "driver_id", "delivered_at"],
+                           ["orders", "drivers"], self.deliveries, "delivery_id"),
+            GeneratedTable("warehouses", ["warehouse_id", "warehouse_name", "location"],
+                           [], self.warehouses, "warehouse_id"),
+            GeneratedTable("warehouse_stock", ["id", "warehouse_id", "product_id", "quantity"],
+                           ["warehouses", "products"], self.warehouse_stock, "id"),
+            GeneratedTable("discounts", ["discount_id", "description", "discount_percent"],
+                           [], self.discounts, "discount_id"),
+            GeneratedTable("order_discounts", ["id", "order_id", "order_date", "discount_id"],
+                           ["orders", "discounts"], self.order_discounts, "id"),
+            GeneratedTable("employees", ["employee_id", "employee_name", "role"], [], self.employees, "employee_id"),
+            # audit_id is left to its sequence: the products trigger writes audit rows of its own
+            GeneratedTable("audit_log", ["table_name", "operation", "changed_at"], [], self.audit_log, None),
+            GeneratedTable("reviews", ["review_id", "customer_id", "product_id", "rating", "review_text",
+                                       "created_at"],
+                           ["customers", "products"], self.reviews, "review_id"),
+        ]
+
+    def _phone(self, rnd):
+        return f"+1-{rnd.randint(201, 989)}-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)}"
+
+    def _timestamp(self, rnd, start, days):
+        return datetime.combine(start, datetime.min.time()) + timedelta(seconds=rnd.randrange(days * 86400))
+
+    def customers(self):
+        rnd = self._random("customers")
+        since = date(2023, 1, 1)
+        for customer_id in range(1, self.counts["customers"] + 1):
+            first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+            email = f"{first}.{last}.{customer_id}@example.com".lower().replace("'", "")
+            yield (customer_id, first, last, email, self._phone(rnd), self._timestamp(rnd, since, 730))
+
+    def customer_addresses(self):
+        rnd = self._random("customer_addresses")
+        address_id = 0
+        for customer_id in range(1, self.counts["customers"] + 1):
+            for _ in range(1 + (rnd.random() < 0.4)):
+                address_id += 1
+                city, state = rnd.choice(CITIES)
+                yield (address_id, customer_id, f"{rnd.randint(1, 9999)} {rnd.choice(STREETS)}", city, state,
+                       f"{rnd.randint(10000, 99999)}", "USA")
+
+    def categories(self):
+        for category_id in range(1, self.counts["categories"] + 1):
+            department = DEPARTMENTS[(category_id - 1) % len(DEPARTMENTS)]
+            round_ = (category_id - 1) // len(DEPARTMENTS)
+            yield (category_id, department if not round_ else f"{department} {round_ + 1}")
+
+    def products(self):
+        rnd = self._random("products")
+        since = date(2024, 1, 1)
+        for product_id in range(1, self.counts["products"] + 1):
+            name = f"{rnd.choice(PRODUCT_ADJECTIVES)} {rnd.choice(PRODUCT_NOUNS)} #{product_id}"
+            yield (product_id, name, rnd.randint(1, self.counts["categories"]), self.prices[product_id],
+                   self._timestamp(rnd, since, 366))
+
+    def orders(self):
+        for order_id in range(1, self.counts["orders"] + 1):
+            yield (order_id, self.order_customer(order_id), self.order_date(order_id), self.order_status(order_id),
+                   self.order_total(order_id))
+
+    def order_items(self):
+        item_id = 0
+        prices = self.prices
+        for order_id in range(1, self.counts["orders"] + 1):
+            order_date = self.order_date(order_id)
+            for product_id, quantity in self.order_lines(order_id):
+                item_id += 1
+                yield (item_id, order_id, order_date, product_id, quantity, prices[product_id])
+
+    def payments(self):
+        rnd = self._random("payments")
+        payment_id = 0
+        for order_id in range(1, self.counts["orders"] + 1):
+            if self.order_status(order_id) in ("pending", "cancelled"):
+                continue
+            payment_id += 1
+            order_date = self.order_date(order_id)
+            yield (payment_id, order_id, order_date, self.order_total(order_id), rnd.choice(PAYMENT_METHODS),
+                   self._timestamp(rnd, order_date, 1))
+
+    def inventory(self):
+        rnd = self._random("inventory")
+        for product_id in range(1, self.counts["products"] + 1):
+            yield (product_id, product_id, rnd.randint(0, 500), self._timestamp(rnd, self.order_days[-1], 1))
+
+    def suppliers(self):
+        rnd = self._random("suppliers")
+        for supplier_id in range(1, self.counts["suppliers"] + 1):
+            yield (supplier_id, f"{rnd.choice(LAST_NAMES)} Foods {supplier_id}",
+                   f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}", self._phone(rnd))
+
+    def supplier_products(self):
+        rnd = self._random("supplier_products")
+        suppliers = self.counts["suppliers"]
+        for product_id in range(1, self.counts["products"] + 1):
+            for supplier_id in sorted(set(rnd.randint(1, suppliers) for _ in range(1 + rnd.randrange(3)))):
+                yield (supplier_id, product_id)
+
+    def drivers(self):
+        rnd = self._random("drivers")
+        for driver_id in range(1, self.counts["drivers"] + 1):
+            yield (driver_id, f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}", self._phone(rnd))
+
+    def deliveries(self):
+        rnd = self._random("deliveries")
+        delivery_id = 0
+        for order_id in range(1, self.counts["orders"] + 1):
+            status = self.order_status(order_id)
+            if status not in ("shipped", "delivered"):
+                continue
+            delivery_id += 1
+            order_date = self.order_date(order_id)
+            delivered_at = self._timestamp(rnd, order_date + timedelta(days=1), 2) if status == "delivered" else None
+            yield (delivery_id, order_id, order_date, rnd.randint(1, self.counts["drivers"]), delivered_at)
+
+    def warehouses(self):
+        for warehouse_id in range(1, self.counts["warehouses"] + 1):
+            city, state = CITIES[(warehouse_id - 1) % len(CITIES)]
+            yield (warehouse_id, f"{city} Fulfillment Center {warehouse_id}", f"{city}, {state}")
+
+    def warehouse_stock(self):
+        rnd = self._random("warehouse_stock")
+        warehouses = self.counts["warehouses"]
+        stock_id = 0
+        for product_id in range(1, self.counts["products"] + 1):
+            for warehouse_id in sorted(set(rnd.randint(1, warehouses) for _ in range(1 + rnd.randrange(3)))):
+                stock_id += 1
+                yield (stock_id, warehouse_id, product_id, rnd.randint(0, 1000))
+
+    def discounts(self):
+        for discount_id in range(1, self.counts["discounts"] + 1):
+            percent = Decimal(5 * (1 + (discount_id - 1) % 8))
+            yield (discount_id, f"{percent}% off promotion {discount_id}", percent)
+
+    def order_discounts(self):
+        rnd = self._random("order_discounts")
+        row_id = 0
+        for order_id in range(1, self.counts["orders"] + 1):
+            if _mix(self._key(5), order_id) % 5:
+                continue
+            row_id += 1
+            yield (row_id, order_id, self.order_date(order_id), rnd.randint(1, self.counts["discounts"]))
+
+    def employees(self):
+        rnd = self._random("employees")
+        for employee_id in range(1, self.counts["employees"] + 1):
+            yield (employee_id, f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}", rnd.choice(EMPLOYEE_ROLES))
+
+    def audit_log(self):
+        rnd = self._random("audit_log")
+        names = [table.name for table in self.tables() if table.name != "audit_log"]
+        start, days = self.order_days[0], len(self.order_days)
+        for _ in range(self.counts["audit_log"]):
+            yield (rnd.choice(names), rnd.choice(AUDIT_OPERATIONS), self._timestamp(rnd, start, days))
+
+    def reviews(self):
+        rnd = self._random("reviews")
+        start, days = self.order_days[0], len(self.order_days)
+        for review_id in range(1, self.counts["reviews"] + 1):
+            rating = rnd.choice((1, 2, 3, 4, 4, 5, 5, 5))
+            text = None if rnd.random() < 0.2 else f"{rnd.choice(REVIEW_PHRASES)}. {rnd.choice(REVIEW_PHRASES)}."
+            yield (review_id, rnd.randint(1, self.counts["customers"]), rnd.randint(1, self.counts["products"]),
+                   rating, text, self._timestamp(rnd, start, days))
+
+
+def load_waves(tables):
+    """Generated tables grouped into waves that can load at the same time, parents first."""
+    graph = TableGraph((SCHEMA, t.name) for t in tables)
+    for child, table in enumerate(tables):
+        for parent in table.parents:
+            # a parent left out of the load is assumed to be loaded already
+            if (SCHEMA, parent) in graph.index:
+                graph.add_edge(graph.index[(SCHEMA, parent)], child)
+    waves, _, _ = graph.waves()
+    return [[tables[i] for i in wave] for wave in waves]
+
+
+def load_table(conn, table, schema=SCHEMA, batch_size=DEFAULT_COPY_BATCH_ROWS,
+               buffer_batches=DEFAULT_COPY_BUFFER_BATCHES, check=None):
+    """
+    Stream one generated table into PostgreSQL with COPY ... FROM STDIN.
+
+    A generator thread encodes `batch_size` rows at a time into a CopyBuffer
+    while `conn` (psycopg2) sends the buffer, like connection.data_copy's
+    copy_table with the generator in place of the source. Returns rows,
+    bytes, seconds, rows/s and MB/s.
+    """
+    target = f"{schema}.{table.name}"
+    copy_sql = f"COPY {target} ({', '.join(table.columns)}) FROM STDIN"
+    buffer = CopyBuffer(buffer_batches)
+    stats = {"table": target, "rows": 0, "bytes": 0}
+
+    def generate():
+        try:
+            batch = []
+            for row in table.rows():
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if check is not None:
+                        check()
+                    chunk = encode_copy_rows(batch)
+                    stats["rows"] += len(batch)
+                    stats["bytes"] += len(chunk)
+                    buffer.put(chunk)
+                    batch = []
+            if batch:
+                chunk = encode_copy_rows(batch)
+                stats["rows"] += len(batch)
+                stats["bytes"] += len(chunk)
+                buffer.put(chunk)
+            buffer.finish()
+        except CopyAborted:
+            pass
+        except BaseException as e:
+            buffer.fail(e)
+
+    start = time.perf_counter()
+    writer = threading.Thread(target=generate, name="liftr-datagen", daemon=True)
+    writer.start()
+    try:
+        conn.set_client_encoding("UTF8")
+        cursor = conn.cursor()
+        cursor.copy_expert(copy_sql, buffer, size=COPY_READ_SIZE)
+        if table.identity is not None:
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(MAX({table.identity}), 1)) "
+                           f"FROM {target};", (target, table.identity))
+    except BaseException as e:
+        buffer.abort()
+        writer.join()
+        if buffer.error is not None and buffer.error is not e:
+            raise buffer.error from e
+        raise
+    writer.join()
+    stats["seconds"] = round(time.perf_counter() - start, 4)
+    logger.info("📦 Generated %s: %s rows in %.1fs", target, stats["rows"], stats["seconds"])
+    return throughput(stats)
+
+
+def generate_database(source, database=DATABASE, scale=1.0, seed=42, workers=4, truncate=False,
+                      disable_triggers=False, tables=None, batch_size=DEFAULT_COPY_BATCH_ROWS):
+    """
+    Fill sales_schema of `database` on a PostgreSQL server (a connection.postgres.PostgresSource).
+
+    The tables must exist and be empty unless `truncate` empties them first
+    (RESTART IDENTITY, CASCADE). Each wave of tables that only reference
+    earlier waves is loaded with up to `workers` COPY sessions at a time.
+    `disable_triggers` sets session_replication_role = replica on the load
+    sessions (superuser only), which skips the foreign key checks and the
+    products audit trigger for a faster load. `tables` limits the load to
+    the named tables (their parents must already be loaded). Every table is
+    analyzed afterwards. Returns per-table stats and the totals.
+    """
+    with source.session(database) as conn:
+        cursor = conn.cursor()
+        partitions = order_partitions(cursor)
+        generator = InstacartGenerator(scale, seed, partitions)
+        selected = [t for t in generator.tables() if tables is None or t.name in tables]
+        if truncate:
+            cursor.execute("TRUNCATE {} RESTART IDENTITY CASCADE;".format(
+                ", ".join(f"{SCHEMA}.{t.name}" for t in selected)))
+
+    def load(table):
+        with source.session(database, statement_timeout_ms=0) as conn:
+            if disable_triggers:
+                conn.cursor().execute("SET session_replication_role = replica;")
+            return load_table(conn, table, batch_size=batch_size)
+
+    start = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        for wave in load_waves(selected):
+            results.extend(pool.map(load, wave))
+
+    with source.session(database, statement_timeout_ms=0) as conn:
+        cursor = conn.cursor()
+        for table in selected:
+            cursor.execute(f"ANALYZE {SCHEMA}.{table.name};")
+
+    totals = {"tables": len(results), "rows": sum(r["rows"] for r in results),
+              "bytes": sum(r["bytes"] for r in results), "seconds": round(time.perf_counter() - start, 4)}
+    return {"scale": scale, "seed": seed, "partitions": [[str(a), str(b)] for a, b in partitions],
+            "tables": results, "totals": throughput(totals)}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from connection.postgres import DEFAULT_PORT, PostgresSource
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("PGHOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PGPORT", DEFAULT_PORT)))
+    parser.add_argument("--user", default=os.environ.get("PGUSER", "postgres"))
+    parser.add_argument("--database", default=DATABASE)
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 is about 6.5 million rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=4, help="tables loaded at the same time")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_COPY_BATCH_ROWS)
+    parser.add_argument("--truncate", action="store_true", help="empty the tables first")
+    parser.add_argument("--disable-triggers", action="store_true",
+                        help="skip foreign key checks and triggers while loading (superuser only)")
+    parser.add_argument("--tables", nargs="*", help="only these tables")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # the password comes from PGPASSWORD (or ~/.pgpass), never from the command line
+    source = PostgresSource(args.host, args.user, os.environ.get("PGPASSWORD"), port=args.port)
+    result = generate_database(source, args.database, scale=args.scale, seed=args.seed, workers=args.workers,
+                               truncate=args.truncate, disable_triggers=args.disable_triggers,
+                               tables=args.tables, batch_size=args.batch_rows)
+    print(json.dumps(result["totals"], indent=4))
@@ -0,0 +1,261 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# SQLite file holding the progress of copy runs unless LIFTR_MIGRATION_STATE says otherwise
+MIGRATION_STATE_PATH = os.environ.get(
+    "LIFTR_MIGRATION_STATE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migration_state.sqlite3"),
+)
+
+RUN_RUNNING = "running"
+RUN_SUCCEEDED = "succeeded"
+RUN_FAILED = "failed"
+CHUNK_STARTED = "started"
+CHUNK_DONE = "done"
+# keys of a chunk dict that say which rows it covers
+CHUNK_BOUNDS = ("lower", "upper", "lower_inclusive", "upper_inclusive", "include_null")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    tables TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    job_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_tables (
+    run_id TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    plan TEXT,
+    status TEXT NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, table_name)
+);
+CREATE TABLE IF NOT EXISTS run_chunks (
+    run_id TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    bounds TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rows INTEGER,
+    bytes INTEGER,
+    checksum TEXT,
+    last_key TEXT,
+    seconds REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, table_name, chunk_id)
+);
+"""
+
+# key values of a chunk keep their type through JSON so a resumed chunk selects the same rows
+_TAGGED = {
+    "$datetime": datetime.fromisoformat,
+    "$date": date.fromisoformat,
+    "$time": dtime.fromisoformat,
+    "$decimal": Decimal,
+    "$uuid": uuid.UUID,
+    "$bytes": base64.b64decode,
+}
+
+
+def _tag(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, dtime):
+        return {"$time": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"$uuid": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$bytes": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"Cannot store {type(value).__name__} in the migration state")
+
+
+def _untag(obj):
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _TAGGED:
+            return _TAGGED[tag](value)
+    return obj
+
+
+def dumps(value):
+    return json.dumps(value, default=_tag, separators=(",", ":"))
+
+
+def loads(text):
+    return None if text is None else json.loads(text, object_hook=_untag)
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+class MigrationStateStore:
+    """
+    Progress of copy runs in a local SQLite file, so a run can be resumed.
+
+    A run records what it copies (source and target connection ids, database,
+    options and the table records). Each table keeps its chunk plan, and each
+    chunk is journaled twice: when a worker takes it ("started", with its key
+    bounds) and when its COPY has committed ("done", with rows, bytes, the
+    checksum of the data sent and the last key it covered). A resumed run
+    skips done chunks and copies started ones again, replacing whatever part
+    of them reached the target. Writes are serialized by one lock and each
+    is committed on its own, so the file is consistent after any crash.
+    """
+
+    def __init__(self, path=MIGRATION_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # state files written before runs recorded their job
+        if "job_id" not in {r["name"] for r in self._conn.execute("PRAGMA table_info(runs)")}:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN job_id TEXT")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---------- Runs ----------
+    def create_run(self, info, tables, run_id=None):
+        """Record a new run and return its id; `tables` are the table records it copies."""
+        run_id = run_id or uuid.uuid4().hex
+        now = _now()
+        self._execute(
+            "INSERT INTO runs (run_id, info, tables, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, dumps(info), dumps(tables), RUN_RUNNING, now, now),
+        )
+        return run_id
+
+    def set_run_status(self, run_id, status, error=None):
+        self._execute("UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                      (status, error, _now(), run_id))
+
+    def set_run_job(self, run_id, job_id):
+        """Record the job that is copying the run now."""
+        self._execute("UPDATE runs SET job_id = ?, updated_at = ? WHERE run_id = ?", (job_id, _now(), run_id))
+
+    def get_run(self, run_id, with_tables=False):
+        """Run record with per-table progress, or None; with_tables adds the table records."""
+        rows = self._execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            return None
+        run = self._run_dict(rows[0])
+        if with_tables:
+            run["table_records"] = loads(rows[0]["tables"])
+        progress = self._execute(
+            """
+            SELECT t.table_name, t.status, t.rows, json_extract(t.plan, '$.kind') AS plan,
+                   COUNT(c.chunk_id) AS chunks, SUM(c.status = ?) AS chunks_done, SUM(c.rows) AS rows_copied
+            FROM run_tables t
+            LEFT JOIN run_chunks c ON c.run_id = t.run_id AND c.table_name = t.table_name
+            WHERE t.run_id = ?
+            GROUP BY t.table_name
+            ORDER BY t.rowid
+            """,
+            (CHUNK_DONE, run_id),
+        )
+        run["tables"] = [
+            {"table": r["table_name"], "status": r["status"], "plan": r["plan"], "chunks": r["chunks"],
+             "chunks_done": r["chunks_done"] or 0, "rows": r["rows_copied"] or 0}
+            for r in progress
+        ]
+        return run
+
+    def list_runs(self):
+        return [self._run_dict(r) for r in self._execute("SELECT * FROM runs ORDER BY created_at")]
+
+    @staticmethod
+    def _run_dict(row):
+        return {"run_id": row["run_id"], **loads(row["info"]), "status": row["status"], "error": row["error"],
+                "job_id": row["job_id"], "created_at": row["created_at"], "updated_at": row["updated_at"]}
+
+    # ---------- Tables ----------
+    def table_state(self, run_id, table_name):
+        """(status, plan, {chunk id: chunk}) of a table, or (None, None, {}) if the run has not reached it."""
+        rows = self._execute("SELECT status, plan FROM run_tables WHERE run_id = ? AND table_name = ?",
+                             (run_id, table_name))
+        if not rows:
+            return None, None, {}
+        chunks = {}
+        for r in self._execute(
+            "SELECT chunk_id, bounds, status, rows, checksum FROM run_chunks WHERE run_id = ? AND table_name = ?",
+            (run_id, table_name),
+        ):
+            chunks[r["chunk_id"]] = {**loads(r["bounds"]), "id": r["chunk_id"], "status": r["status"],
+                                     "rows": r["rows"], "checksum": r["checksum"]}
+        return rows[0]["status"], loads(rows[0]["plan"]), chunks
+
+    def save_plan(self, run_id, table_name, plan):
+        self._execute(
+            """
+            INSERT INTO run_tables (run_id, table_name, plan, status, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (run_id, table_name) DO UPDATE SET plan = excluded.plan, updated_at = excluded.updated_at
+            """,
+            (run_id, table_name, dumps(plan), RUN_RUNNING, _now()),
+        )
+
+    def reset_chunks(self, run_id, table_name):
+        """Forget a table's chunks, so its plan is copied again from the start."""
+        self._execute("DELETE FROM run_chunks WHERE run_id = ? AND table_name = ?", (run_id, table_name))
+
+    def table_done(self, run_id, table_name, rows):
+        self._execute("UPDATE run_tables SET status = ?, rows = ?, updated_at = ? WHERE run_id = ? AND table_name = ?",
+                      (RUN_SUCCEEDED, rows, _now(), run_id, table_name))
+
+    # ---------- Chunks ----------
+    def chunk_started(self, run_id, table_name, chunk):
+        bounds = {k: chunk[k] for k in CHUNK_BOUNDS if k in chunk}
+        self._execute(
+            """
+            INSERT INTO run_chunks (run_id, table_name, chunk_id, bounds, status, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (run_id, table_name, chunk_id) DO UPDATE SET status = excluded.status,
+                updated_at = excluded.updated_at
+            """,
+            (run_id, table_name, chunk["id"], dumps(bounds), CHUNK_STARTED, _now()),
+        )
+
+    def chunk_done(self, run_id, table_name, chunk, stats):
+        self._execute(
+            """
+            UPDATE run_chunks SET status = ?, rows = ?, bytes = ?, checksum = ?, last_key = ?, seconds = ?,
+                updated_at = ?
+            WHERE run_id = ? AND table_name = ? AND chunk_id = ?
+            """,
+            (CHUNK_DONE, stats["rows"], stats["bytes"], stats.get("checksum"), dumps(chunk.get("upper")),
+             stats["seconds"], _now(), run_id, table_name, chunk["id"]),
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Shared MigrationStateStore of this process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MigrationStateStore()
+        return _store
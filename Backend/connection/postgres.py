@@ -1,223 +1,330 @@
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-
-
-def get_metadata():
-    all_metadata = {}
-
-    conn = psycopg2.connect(
-        host="localhost",
-        database="postgres",
-        user="postgres",
-        password="123456",
-        port=5432
-    )
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-    cursor = conn.cursor()
-
-    # 1. Get list of databases
-    cursor.execute("SELECT datname FROM pg_database WHERE datistemplate=false;")
-    databases = [db[0] for db in cursor.fetchall()]
-
-    for db in databases:
-        print(f"\n📌 Reading metadata from DB: {db}")
-        all_metadata[db] = {}
-
-        db_conn = psycopg2.connect(
-            host="localhost",
-            database=db,
-            user="postgres",
-            password="123456",
-            port=5432
-        )
-        db_cursor = db_conn.cursor()
-
-        # 2. Get schemas
-        db_cursor.execute("""
-            SELECT schema_name 
-            FROM information_schema.schemata
-            WHERE schema_name NOT LIKE 'pg_%'
-            AND schema_name <> 'information_schema';
-        """)
-        schemas = [s[0] for s in db_cursor.fetchall()]
-
-        all_metadata[db]["schemas"] = {}
-
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 5432
+# databases read at the same time by one extraction
+DEFAULT_PG_WORKERS = 4
+# connections open at the same time against one PostgreSQL server, shared by every extraction
+DEFAULT_PER_HOST_LIMIT = int(os.environ.get("LIFTR_PG_CONNECTIONS_PER_HOST", "8"))
+DEFAULT_CONNECT_TIMEOUT = 10           # seconds to establish a connection
+DEFAULT_STATEMENT_TIMEOUT_MS = 60000   # per catalog query, enforced by the server
+DEFAULT_HOST_WAIT_TIMEOUT = 300        # seconds to wait for a free per-host slot
+
+
+def _query(cursor, phase, db, sql, params=None):
+    """Run one catalog query inside a timing span and return its rows."""
+    with span(phase, db, extractor="postgres") as s:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        s.rows = len(rows)
+    return rows
+
+
+SCHEMAS_QUERY = """
+    SELECT schema_name
+    FROM information_schema.schemata
+    WHERE schema_name NOT LIKE 'pg_%'
+    AND schema_name <> 'information_schema';
+"""
+
+# Every query below runs once per database for all of its schemas (%s is the
+# list of schema names) instead of once per schema or per table. Each row
+# starts with the schema and table (or just the schema) it belongs to; the
+# joins and filters are otherwise the same as the old per-table queries, so
+# every table ends up with exactly the rows it used to get.
+TABLES_QUERY = """
+    SELECT table_schema, table_name
+    FROM information_schema.tables
+    WHERE table_schema::text = ANY(%s) AND table_type = 'BASE TABLE';
+"""
+
+# (key in the table metadata, query, row -> record), in output order
+TABLE_QUERIES = [
+    ("columns", """
+        SELECT table_schema, table_name, column_name, data_type, is_nullable, column_default
+        FROM information_schema.columns
+        WHERE table_schema::text = ANY(%s)
+        ORDER BY table_schema, table_name, ordinal_position;
+    """, lambda row: {
+        "column_name": row[2],
+        "data_type": row[3],
+        "nullable": row[4],
+        "default": row[5]
+    }),
+    ("primary_keys", """
+        SELECT tc.table_schema, tc.table_name, kcu.column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON tc.constraint_name=kcu.constraint_name
+        WHERE tc.constraint_type='PRIMARY KEY'
+        AND tc.table_schema::text = ANY(%s);
+    """, lambda row: row[2]),
+    ("foreign_keys", """
+        SELECT tc.table_schema, tc.table_name,
+               tc.constraint_name, kcu.column_name,
+               ccu.table_schema AS foreign_schema,
+               ccu.table_name AS foreign_table,
+               ccu.column_name AS foreign_column
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON tc.constraint_name = kcu.constraint_name
+        JOIN information_schema.constraint_column_usage ccu
+            ON tc.constraint_name = ccu.constraint_name
+        WHERE tc.constraint_type='FOREIGN KEY'
+        AND tc.table_schema::text = ANY(%s);
+    """, lambda row: {
+        "constraint_name": row[2],
+        "column": row[3],
+        "foreign_schema": row[4],
+        "foreign_table": row[5],
+        "foreign_column": row[6],
+    }),
+    ("indexes", """
+        SELECT schemaname, tablename, indexname, indexdef
+        FROM pg_indexes
+        WHERE schemaname::text = ANY(%s);
+    """, lambda row: {"index_name": row[2], "definition": row[3]}),
+    ("triggers", """
+        SELECT event_object_schema, event_object_table,
+               trigger_name, event_manipulation, action_statement
+        FROM information_schema.triggers
+        WHERE event_object_schema::text = ANY(%s);
+    """, lambda row: {"trigger_name": row[2], "event": row[3], "action": row[4]}),
+    # check constraints owned by the table's own schema (the old conrelid = 'schema.table'::regclass)
+    ("check_constraints", """
+        SELECT n.nspname, c.relname, con.conname, pg_get_constraintdef(con.oid)
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE con.contype='c'
+        AND con.connamespace = n.oid
+        AND n.nspname::text = ANY(%s);
+    """, lambda row: {"name": row[2], "definition": row[3]}),
+    ("partitions", """
+        SELECT n.nspname, c.relname, i.inhrelid::regclass::text
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhparent
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname::text = ANY(%s);
+    """, lambda row: row[2]),
+]
+
+# (key in the schema metadata, query, row -> record), in output order
+SCHEMA_QUERIES = [
+    ("functions", """
+        SELECT specific_schema, routine_name, routine_type, data_type
+        FROM information_schema.routines
+        WHERE specific_schema::text = ANY(%s);
+    """, lambda row: {"name": row[1], "type": row[2], "return_type": row[3]}),
+    ("procedures", """
+        SELECT nspname, proname
+        FROM pg_proc
+        JOIN pg_namespace ON pg_proc.pronamespace = pg_namespace.oid
+        WHERE nspname::text = ANY(%s) AND prokind='p';
+    """, lambda row: row[1]),
+    ("views", """
+        SELECT table_schema, table_name, view_definition
+        FROM information_schema.views
+        WHERE table_schema::text = ANY(%s);
+    """, lambda row: {"name": row[1], "definition": row[2]}),
+]
+
+
+def fetch_database_metadata(cursor, db):
+    """
+    Read the metadata of one database with a fixed number of set-based queries.
+
+    Returns {"schemas": {schema: {"tables": {...}, "functions", "procedures",
+    "views"}}}, the same structure the per-table extractor produced, but the
+    rows of all tables come back together and are grouped in memory, so the
+    number of round trips no longer grows with the number of tables.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    schemas = [s[0] for s in _query(cursor, "schemas", db, SCHEMAS_QUERY)]
+    db_meta = {"schemas": {schema: {"tables": {}} for schema in schemas}}
+
+    tables = {}
+    for schema, table in _query(cursor, "tables", db, TABLES_QUERY, (schemas,)):
+        if debug:
+            logger.debug("      • Table: %s.%s", schema, table)
+        table_meta = {key: [] for key, _, _ in TABLE_QUERIES}
+        db_meta["schemas"][schema]["tables"][table] = table_meta
+        tables[(schema, table)] = table_meta
+
+    for key, query, record in TABLE_QUERIES:
+        for row in _query(cursor, key, db, query, (schemas,)):
+            table_meta = tables.get((row[0], row[1]))
+            if table_meta is not None:
+                table_meta[key].append(record(row))
+
+    for key, query, record in SCHEMA_QUERIES:
+        grouped = {schema: [] for schema in schemas}
+        for row in _query(cursor, key, db, query, (schemas,)):
+            if row[0] in grouped:
+                grouped[row[0]].append(record(row))
         for schema in schemas:
-            print(f"  ➤ Schema: {schema}")
-            schema_meta = {}
-            all_metadata[db]["schemas"][schema] = schema_meta
-
-            # 3. Tables
-            db_cursor.execute("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = %s AND table_type = 'BASE TABLE';
-            """, (schema,))
-
-            tables = [t[0] for t in db_cursor.fetchall()]
-            schema_meta["tables"] = {}
-
-            for table in tables:
-                print(f"      • Table: {table}")
-                table_meta = {}
-                schema_meta["tables"][table] = table_meta
-
-                full_table = f"{schema}.{table}"
-
-                # Columns
-                db_cursor.execute("""
-                    SELECT column_name, data_type, is_nullable, column_default
-                    FROM information_schema.columns
-                    WHERE table_schema=%s AND table_name=%s;
-                """, (schema, table))
-
-                table_meta["columns"] = [
-                    {
-                        "column_name": row[0],
-                        "data_type": row[1],
-                        "nullable": row[2],
-                        "default": row[3]
-                    }
-                    for row in db_cursor.fetchall()
-                ]
-
-                # Primary Keys
-                db_cursor.execute("""
-                    SELECT kcu.column_name
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage kcu
-                        ON tc.constraint_name=kcu.constraint_name
-                    WHERE tc.constraint_type='PRIMARY KEY'
-                    AND tc.table_schema=%s
-                    AND tc.table_name=%s;
-                """, (schema, table))
-
-                table_meta["primary_keys"] = [pk[0] for pk in db_cursor.fetchall()]
-
-                # Foreign Keys
-                db_cursor.execute("""
-                    SELECT tc.constraint_name, kcu.column_name,
-                           ccu.table_schema AS foreign_schema,
-                           ccu.table_name AS foreign_table,
-                           ccu.column_name AS foreign_column
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage ccu
-                        ON tc.constraint_name = ccu.constraint_name
-                    WHERE tc.constraint_type='FOREIGN KEY'
-                    AND tc.table_schema=%s
-                    AND tc.table_name=%s;
-                """, (schema, table))
-
-                table_meta["foreign_keys"] = [
-                    {
-                        "constraint_name": row[0],
-                        "column": row[1],
-                        "foreign_schema": row[2],
-                        "foreign_table": row[3],
-                        "foreign_column": row[4],
-                    }
-                    for row in db_cursor.fetchall()
-                ]
-
-                # Indexes
-                db_cursor.execute("""
-                    SELECT indexname, indexdef
-                    FROM pg_indexes
-                    WHERE schemaname=%s AND tablename=%s;
-                """, (schema, table))
-
-                table_meta["indexes"] = [
-                    {"index_name": row[0], "definition": row[1]}
-                    for row in db_cursor.fetchall()
-                ]
-
-                # Triggers
-                db_cursor.execute("""
-                    SELECT trigger_name, event_manipulation, action_statement
-                    FROM information_schema.triggers
-                    WHERE event_object_schema=%s
-                    AND event_object_table=%s;
-                """, (schema, table))
-
-                table_meta["triggers"] = [
-                    {"trigger_name": row[0], "event": row[1], "action": row[2]}
-                    for row in db_cursor.fetchall()
-                ]
-
-                # Check Constraints (fixed)
-                db_cursor.execute("""
-                    SELECT conname, pg_get_constraintdef(oid)
-                    FROM pg_constraint
-                    WHERE contype='c'
-                    AND connamespace = (
-                        SELECT oid FROM pg_namespace WHERE nspname=%s
-                    )
-                    AND conrelid = %s::regclass;
-                """, (schema, full_table))
-
-                table_meta["check_constraints"] = [
-                    {"name": row[0], "definition": row[1]}
-                    for row in db_cursor.fetchall()
-                ]
-
-                # Partitions (also requires schema.table)
-                db_cursor.execute("""
-                    SELECT inhrelid::regclass::text
-                    FROM pg_inherits
-                    WHERE inhparent = %s::regclass;
-                """, (full_table,))
-
-                table_meta["partitions"] = [p[0] for p in db_cursor.fetchall()]
-
-            # Functions
-            db_cursor.execute("""
-                SELECT routine_name, routine_type, data_type
-                FROM information_schema.routines
-                WHERE specific_schema=%s;
-            """, (schema,))
-            schema_meta["functions"] = [
-                {"name": r[0], "type": r[1], "return_type": r[2]}
-                for r in db_cursor.fetchall()
-            ]
-
-            # Procedures
-            db_cursor.execute("""
-                SELECT proname
-                FROM pg_proc
-                JOIN pg_namespace ON pg_proc.pronamespace = pg_namespace.oid
-                WHERE nspname=%s AND prokind='p';
-            """, (schema,))
-            schema_meta["procedures"] = [p[0] for p in db_cursor.fetchall()]
-
-            # Views
-            db_cursor.execute("""
-                SELECT table_name, view_definition
-                FROM information_schema.views
-                WHERE table_schema=%s;
-            """, (schema,))
-            schema_meta["views"] = [
-                {"name": v[0], "definition": v[1]}
-                for v in db_cursor.fetchall()
-            ]
-
-        db_conn.close()
-
-    conn.close()
-    return all_metadata
-
-
-# Run the metadata extractor
-data = get_metadata()
-
-import json
-filename = "postgres_metadata.json"
-
-with open(filename, "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=4)
-
-print(f"Metadata saved successfully to {filename}")
-
-print(json.dumps(data, indent=4))
+            db_meta["schemas"][schema][key] = grouped[schema]
+
+    return db_meta
+
+
+
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def host_limit(host, port, limit=DEFAULT_PER_HOST_LIMIT):
+    """Semaphore bounding the open connections to one server; the first caller's limit wins."""
+    key = (host, int(port or DEFAULT_PORT))
+    with _host_limits_lock:
+        if key not in _host_limits:
+            _host_limits[key] = threading.BoundedSemaphore(max(1, int(limit)))
+        return _host_limits[key]
+
+
+class PostgresSource:
+    """
+    Connection settings of one PostgreSQL server.
+
+    Every database needs its own connection in PostgreSQL, so connect(db)
+    opens a fresh one for the given database. Connections are autocommit
+    (the extractor only reads the catalog), time out after `connect_timeout`
+    seconds and have a server-side statement_timeout so a stuck catalog query
+    cannot hold a worker forever. At most `per_host_limit` connections are
+    open to the same host:port at a time, across all extractions.
+    """
+
+    def __init__(self, host, user, password=None, port=DEFAULT_PORT, database="postgres",
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, statement_timeout_ms=DEFAULT_STATEMENT_TIMEOUT_MS,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, host_wait_timeout=DEFAULT_HOST_WAIT_TIMEOUT):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.port = int(port or DEFAULT_PORT)
+        self.database = database or "postgres"
+        self.connect_timeout = connect_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.host_wait_timeout = host_wait_timeout
+        self.limit = host_limit(self.host, self.port, per_host_limit)
+
+    def connect(self, database=None, statement_timeout_ms=None):
+        """Autocommit connection to `database`; statement_timeout_ms=0 disables the timeout (bulk loads)."""
+        import psycopg2
+
+        if statement_timeout_ms is None:
+            statement_timeout_ms = self.statement_timeout_ms
+
+        conn = psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=database or self.database,
+            user=self.user,
+            password=self.password,
+            connect_timeout=self.connect_timeout,
+            options=f"-c statement_timeout={int(statement_timeout_ms)}",
+        )
+        conn.autocommit = True
+        return conn
+
+    @contextmanager
+    def session(self, database=None, statement_timeout_ms=None):
+        """A new connection to `database`, holding one of the host's slots until the block ends."""
+        if not self.limit.acquire(timeout=self.host_wait_timeout):
+            raise TimeoutError(f"No free connection slot for {self.host}:{self.port}")
+        try:
+            conn = self.connect(database, statement_timeout_ms)
+            try:
+                yield conn
+            finally:
+                conn.close()
+        finally:
+            self.limit.release()
+
+    def read(self, fn, database=None):
+        """Run fn(cursor) on a new connection to `database` while holding one of the host's slots."""
+        with self.session(database) as conn:
+            return fn(conn.cursor())
+
+    def to_dict(self):
+        return {"host": self.host, "port": self.port, "database": self.database, "user": self.user}
+
+
+def list_databases(cursor):
+    rows = _query(cursor, "list_databases", None, "SELECT datname FROM pg_database WHERE datistemplate=false;")
+    return [db[0] for db in rows]
+
+
+def get_metadata(source, max_workers=DEFAULT_PG_WORKERS, databases=None):
+    """
+    Fetch the metadata of every database of a PostgreSQL server concurrently.
+
+    `source` is a PostgresSource; up to `max_workers` databases are read at the
+    same time, each on its own connection (subject to the source's per-host
+    limit). `databases` restricts the extraction to the given names.
+
+    Returns (metadata, errors) like fetch_sql_server_metadata_parallel:
+    metadata maps database -> {"schemas": ...} in pg_database order, errors
+    maps database -> error message for every database that could not be read.
+    """
+    metadata = {}
+    errors = {}
+    max_workers = max(1, int(max_workers or 1))
+
+    dbs = source.read(list_databases)
+    if databases:
+        wanted = set(databases)
+        dbs = [db for db in dbs if db in wanted]
+    logger.info("=== PostgreSQL databases found on %s: %s (workers=%s) ===", source.host, len(dbs), max_workers)
+
+    def _fetch_one(db):
+        logger.info("📌 Reading metadata from DB: %s", db)
+        with span("database", db, extractor="postgres"):
+            return source.read(lambda cursor: fetch_database_metadata(cursor, db), db)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # each task runs in a copy of the caller's context, so its spans reach the caller's trace
+        futures = {pool.submit(contextvars.copy_context().run, _fetch_one, db): db for db in dbs}
+        for future in as_completed(futures):
+            db = futures[future]
+            try:
+                metadata[db] = future.result()
+            except Exception as e:
+                metadata[db] = {}
+                errors[db] = str(e)
+                logger.warning("⚠️ Could not read metadata for %s: %s", db, e)
+
+    return {db: metadata[db] for db in dbs}, errors
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Extract the metadata of every database of a PostgreSQL server.")
+    parser.add_argument("--host", default=os.environ.get("PGHOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PGPORT", DEFAULT_PORT)))
+    parser.add_argument("--user", default=os.environ.get("PGUSER", "postgres"))
+    parser.add_argument("--database", default=os.environ.get("PGDATABASE", "postgres"))
+    parser.add_argument("--workers", type=int, default=DEFAULT_PG_WORKERS)
+    parser.add_argument("--output", default="postgres_metadata.json")
+    args = parser.parse_args()
+
+    # the password comes from PGPASSWORD (or ~/.pgpass), never from the command line
+    source = PostgresSource(args.host, args.user, os.environ.get("PGPASSWORD"), port=args.port, database=args.database)
+    data, errors = get_metadata(source, max_workers=args.workers)
+    for db, error in errors.items():
+        print(f"{db}: {error}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+
+    print(f"Metadata saved successfully to {args.output}")
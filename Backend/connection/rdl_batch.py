@@ -0,0 +1,255 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from werkzeug.utils import secure_filename
+
+from connection.rdl_inspect import parse_rdl
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+# Largest upload (archive or files) one batch request may send
+MAX_RDL_UPLOAD_BYTES = int(os.environ.get("LIFTR_RDL_MAX_UPLOAD_MB", "512")) * _MB
+# Uncompressed size limits of an archive's reports, so a zip bomb cannot fill the disk
+MAX_RDL_FILE_BYTES = int(os.environ.get("LIFTR_RDL_MAX_FILE_MB", "200")) * _MB
+MAX_RDL_EXTRACTED_BYTES = int(os.environ.get("LIFTR_RDL_MAX_EXTRACTED_MB", "4096")) * _MB
+# Reports one batch may hold
+MAX_RDL_FILES = int(os.environ.get("LIFTR_RDL_MAX_FILES", "10000"))
+# Parser processes per batch: the default, and the most a request may ask for; all batches
+# share one pool of MAX_RDL_WORKERS processes
+DEFAULT_RDL_WORKERS = min(os.cpu_count() or 1, 8)
+MAX_RDL_WORKERS = int(os.environ.get("LIFTR_RDL_MAX_WORKERS", str(max(os.cpu_count() or 1, 1))))
+# Reports listed in a batch summary's "most_complex"
+TOP_REPORTS = 20
+
+
+class BatchLimitError(ValueError):
+    """An upload or archive exceeds one of the batch limits."""
+
+
+def _safe_relative_path(name):
+    """
+    Archive member name as a relative path made of secure_filename parts, or None.
+
+    Absolute names, drive letters and ".." parts are refused (zip-slip), as
+    are names left empty once cleaned.
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("/") or (len(name) > 1 and name[1] == ":"):
+        return None
+    parts = []
+    for part in name.split("/"):
+        if part in ("", "."):
+            continue
+        if part == "..":
+            return None
+        part = secure_filename(part)
+        if not part:
+            return None
+        parts.append(part)
+    return os.path.join(*parts) if parts else None
+
+
+def extract_rdl_archive(archive, dest_dir, max_files=MAX_RDL_FILES, max_file_bytes=MAX_RDL_FILE_BYTES,
+                        max_total_bytes=MAX_RDL_EXTRACTED_BYTES, reports=0, total=0):
+    """
+    Extract the .rdl members of a ZIP archive (a path or file object) below `dest_dir`.
+
+    Every member path is cleaned and must stay inside `dest_dir`; members
+    that do not are skipped and reported. Sizes are counted while copying
+    (the sizes in the archive's directory can lie) and BatchLimitError is
+    raised once the batch would exceed `max_files` reports, a report would
+    exceed `max_file_bytes` or all reports `max_total_bytes`. `reports` and
+    `total` carry the counts of files already in the batch.
+
+    Returns ([(report name, path)], [{"name", "reason"}] of skipped members, total bytes).
+    """
+    root = os.path.realpath(dest_dir)
+    files = []
+    skipped = []
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Invalid ZIP archive: {e}")
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            if not info.filename.lower().endswith(".rdl"):
+                skipped.append({"name": info.filename, "reason": "not an .rdl file"})
+                continue
+            relative = _safe_relative_path(info.filename)
+            path = os.path.realpath(os.path.join(root, relative)) if relative else None
+            if path is None or os.path.commonpath([root, path]) != root:
+                skipped.append({"name": info.filename, "reason": "unsafe path"})
+                continue
+            if os.path.exists(path):
+                skipped.append({"name": info.filename, "reason": "duplicate name"})
+                continue
+            if reports + len(files) >= max_files:
+                raise BatchLimitError(f"More than {max_files} reports in one batch")
+            if info.file_size > max_file_bytes:
+                raise BatchLimitError(f"{info.filename} is larger than {max_file_bytes // _MB} MB")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            written = 0
+            with zf.open(info) as src, open(path, "wb") as dst:
+                while True:
+                    block = src.read(_MB)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > max_file_bytes:
+                        raise BatchLimitError(f"{info.filename} is larger than {max_file_bytes // _MB} MB")
+                    if total + written > max_total_bytes:
+                        raise BatchLimitError(f"The reports are larger than {max_total_bytes // _MB} MB uncompressed")
+                    dst.write(block)
+            total += written
+            files.append((relative.replace(os.sep, "/"), path))
+    return files, skipped, total
+
+
+def _parse_report(name, path):
+    """Process pool task: parse one report; errors are returned, not raised, so one bad file fails alone."""
+    start = time.perf_counter()
+    try:
+        result = parse_rdl(path)
+    except ValueError as e:
+        return {"report": name, "status": "error", "error": "Failed to parse RDL (invalid XML).", "details": str(e)}
+    except Exception as e:
+        return {"report": name, "status": "error", "error": "Unexpected error while parsing RDL.",
+                "details": str(e)}
+    return {"report": name, "status": "ok", "seconds": round(time.perf_counter() - start, 4), "result": result}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool():
+    """
+    The parser pool every batch shares, started on first use. It never has
+    more than MAX_RDL_WORKERS processes, however many batches run at once,
+    and its processes are reused, so each is spawned (and imports the
+    parser) only once. Spawned rather than forked: forking a threaded web
+    server can copy locks held by other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_RDL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop a broken pool (a worker died) so the next batch starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_reports(files, workers=DEFAULT_RDL_WORKERS):
+    """
+    Yield the outcome of parse_rdl for every (report name, path), in completion order.
+
+    parse_rdl is CPU-bound and holds the GIL, so reports are parsed in the
+    shared process pool, with at most `workers` of this batch's reports
+    (capped by MAX_RDL_WORKERS and the number of reports) submitted at a
+    time. Closing the generator early (e.g. the client went away) cancels
+    the reports not started yet.
+    """
+    files = iter(list(files))
+    workers = max(1, min(int(workers or 1), MAX_RDL_WORKERS))
+    pool = _shared_pool()
+    running = set()
+    try:
+        running = {pool.submit(_parse_report, name, path) for name, path in islice(files, workers)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                following = next(files, None)
+                if following is not None:
+                    running.add(pool.submit(_parse_report, *following))
+                yield future.result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in running:
+            future.cancel()
+
+
+class BatchSummary:
+    """Aggregate complexity of the reports of one batch, fed one parse outcome at a time."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.reports = 0
+        self.failed = []
+        self.buckets = {"Easy": 0, "Moderate": 0, "Complex": 0}
+        self.score_total = 0
+        self.totals = {"data_sources": 0, "datasets": 0, "parameters": 0, "tablix": 0, "charts": 0,
+                       "subreports": 0, "expressions": 0}
+        self.custom_code = 0
+        self.lookups = 0
+        self.stored_procedures = 0
+        self.servers = {}
+        self.scores = []
+
+    def add(self, outcome):
+        self.reports += 1
+        if outcome["status"] != "ok":
+            self.failed.append(outcome["report"])
+            return
+        result = outcome["result"]
+        complexity = result["complexity"]
+        self.buckets[complexity["bucket"]] = self.buckets.get(complexity["bucket"], 0) + 1
+        self.score_total += complexity["score"]
+        self.scores.append((complexity["score"], outcome["report"], complexity["bucket"]))
+        summary = result["summary"]
+        for key in self.totals:
+            self.totals[key] += summary.get(key) or 0
+        self.custom_code += bool(result.get("custom_code"))
+        self.lookups += bool(result.get("uses_lookup"))
+        self.stored_procedures += sum(1 for d in result.get("datasets", []) if d["sql_signals"].get("stored_proc"))
+        for ds in result.get("data_sources", []):
+            key = (ds.get("server"), ds.get("database"))
+            self.servers[key] = self.servers.get(key, 0) + 1
+
+    def to_dict(self):
+        parsed = self.reports - len(self.failed)
+        seconds = time.perf_counter() - self.start
+        self.scores.sort(key=lambda s: (-s[0], s[1]))
+        return {
+            "reports": self.reports,
+            "parsed": parsed,
+            "failed": len(self.failed),
+            "failed_reports": self.failed,
+            "buckets": self.buckets,
+            "score_total": self.score_total,
+            "score_mean": round(self.score_total / parsed, 2) if parsed else 0,
+            "score_max": self.scores[0][0] if self.scores else 0,
+            "most_complex": [{"report": name, "score": score, "bucket": bucket}
+                             for score, name, bucket in self.scores[:TOP_REPORTS]],
+            "totals": self.totals,
+            "reports_with_custom_code": self.custom_code,
+            "reports_with_lookup": self.lookups,
+            "stored_procedure_datasets": self.stored_procedures,
+            "data_sources": [{"server": server, "database": database, "references": n}
+                             for (server, database), n in sorted(self.servers.items(), key=lambda s: -s[1])],
+            "seconds": round(seconds, 3),
+            "reports_per_sec": round(self.reports / max(seconds, 1e-9), 1),
+        }
+
+
+def remove_batch(dest_dir):
+    shutil.rmtree(dest_dir, ignore_errors=True)
@@ -85,96 +85,161 @@ THRESHOLDS = {"easy_max": 50, "moderate_max": 100}
 def _cap(n, cap): 
     return n if n < cap else cap
 
+def _data_source(info):
+    parsed = parse_conn_string(info["conn"])
+    return {
+        "name": info["name"],
+        "provider": info["provider"],
+        "server": parsed["server"],
+        "database": parsed["database"],
+        "connect_string": info["conn"]
+    }
+
+def _dataset(info):
+    sql = info["sql"]
+    return {
+        "dataset_name": info["name"],
+        "data_source": info["data_source"],
+        "command_type": info["command_type"] or "Text",
+        "sql_preview": sql[:300] + "..." if sql and len(sql) > 300 else sql,
+        "tables": extract_tables(sql),
+        "sql_signals": sql_signals(sql, info["command_type"])
+    }
+
+# first direct child of a DataSource's ConnectionProperties / a DataSet's Query -> key it fills
+CONNECTION_FIELDS = {"ConnectString": "conn", "DataProvider": "provider"}
+QUERY_FIELDS = {"DataSourceName": "data_source", "CommandType": "command_type", "CommandText": "sql"}
+
 def parse_rdl(file_path):
-    """Parse single RDL and extract all metadata."""
+    """
+    Parse single RDL and extract all metadata.
+
+    Single pass over iterparse start/end events: every feature is picked up
+    from the element stack as its element opens or closes, and each element
+    is dropped from its parent once it has closed, so memory stays flat
+    however large the report is (embedded images included). The lookups
+    match the ElementTree paths of the original parser: e.g. a tablix counts,
+    for each TablixMember below it, every TablixRowHierarchy (or
+    TablixColumnHierarchy) between the tablix and the member.
+    """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(path)
-    try:
-        tree = ET.parse(path)
-    except ET.ParseError as e:
-        raise ValueError(f"Invalid RDL XML: {e}")
-    root = tree.getroot()
-    ns = get_ns(root)
 
-    # --- Expressions & Lookup detection ---
+    prefix = None
+    stack = []       # [element, local name in the report namespace (or None), info dict (or None)]
     expr_count = 0
     uses_lookup = False
-    for node in root.iter():
-        if isinstance(node.text, str):
-            txt = node.text.strip()
-            if txt.startswith("="):
-                expr_count += 1
-                if "Lookup(" in txt or "LookupSet(" in txt:
-                    uses_lookup = True
-
-    # --- Data Sources ---
-    data_sources = []
-    for ds in root.findall(".//ns:DataSources/ns:DataSource", ns):
-        name = ds.get("Name")
-        cp = ds.find("ns:ConnectionProperties", ns)
-        conn = safe_text(cp.find("ns:ConnectString", ns)) if cp is not None else None
-        provider = safe_text(cp.find("ns:DataProvider", ns)) if cp is not None else None
-        parsed = parse_conn_string(conn)
-        data_sources.append({
-            "name": name,
-            "provider": provider,
-            "server": parsed["server"],
-            "database": parsed["database"],
-            "connect_string": conn
-        })
-
-    # --- Datasets ---
-    datasets = []
-    for d in root.findall(".//ns:DataSets/ns:DataSet", ns):
-        name = d.get("Name")
-        q = d.find("ns:Query", ns)
-        ds_name = safe_text(q.find("ns:DataSourceName", ns)) if q is not None else None
-        command_type = safe_text(q.find("ns:CommandType", ns)) if q is not None else None
-        sql = safe_text(q.find("ns:CommandText", ns)) if q is not None else None
-        tables = extract_tables(sql)
-        signals = sql_signals(sql, command_type)
-        datasets.append({
-            "dataset_name": name,
-            "data_source": ds_name,
-            "command_type": command_type or "Text",
-            "sql_preview": sql[:300] + "..." if sql and len(sql) > 300 else sql,
-            "tables": tables,
-            "sql_signals": signals
-        })
+    data_sources, datasets, charts, params, tablix_detail, subreports = [], [], [], [], [], []
+    custom_code = False
+    open_charts, open_tablix = [], []
+    row_hierarchies = col_hierarchies = 0
 
-    # --- Charts ---
-    charts = []
-    for ch in root.findall(".//ns:Chart", ns):
-        charts.append({
-            "name": ch.get("Name"),
-            "type": safe_text(ch.find(".//ns:ChartSeries/ns:ChartType", ns))
-        })
+    try:
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                if prefix is None:
+                    prefix = "{%s}" % get_ns(elem)["ns"]
+                tag = elem.tag
+                name = tag[len(prefix):] if isinstance(tag, str) and tag.startswith(prefix) else None
+                info = None
+                if name is not None and stack:
+                    parent = stack[-1]
+                    pname, pinfo = parent[1], parent[2]
+                    if name == "TablixMember":
+                        for t in open_tablix:
+                            t["row_groups"] += row_hierarchies - t["_rows_before"]
+                            t["col_groups"] += col_hierarchies - t["_cols_before"]
+                    elif name == "TablixRowHierarchy":
+                        row_hierarchies += 1
+                    elif name == "TablixColumnHierarchy":
+                        col_hierarchies += 1
+                    elif name == "Tablix":
+                        info = {"name": elem.get("Name"), "row_groups": 0, "col_groups": 0,
+                                "_rows_before": row_hierarchies, "_cols_before": col_hierarchies}
+                        tablix_detail.append(info)
+                        open_tablix.append(info)
+                    elif name == "Chart":
+                        info = {"name": elem.get("Name"), "type": None, "_type_elem": None}
+                        charts.append(info)
+                        open_charts.append(info)
+                    elif name == "ChartType" and pname == "ChartSeries":
+                        # each open chart keeps the first ChartSeries/ChartType inside it
+                        for c in open_charts:
+                            if c["_type_elem"] is None:
+                                c["_type_elem"] = elem
+                    elif name == "Subreport":
+                        subreports.append(elem.get("Name"))
+                    elif name == "Code":
+                        custom_code = True
+                    elif name == "DataSource" and pname == "DataSources" and len(stack) > 1:
+                        info = {"kind": "DataSource", "slot": len(data_sources), "name": elem.get("Name"),
+                                "conn": None, "provider": None, "cp": False}
+                        data_sources.append(None)
+                    elif name == "DataSet" and pname == "DataSets" and len(stack) > 1:
+                        info = {"kind": "DataSet", "slot": len(datasets), "name": elem.get("Name"),
+                                "data_source": None, "command_type": None, "sql": None, "query": False}
+                        datasets.append(None)
+                    elif name == "ReportParameter" and pname == "ReportParameters" and len(stack) > 1:
+                        info = {"name": elem.get("Name"), "cascading": False}
+                        params.append(info)
+                    elif pinfo is not None and pinfo.get("kind") == "DataSource":
+                        if name == "ConnectionProperties" and not pinfo["cp"]:
+                            pinfo["cp"] = True
+                            info = {"kind": "fields", "target": pinfo, "fields": CONNECTION_FIELDS}
+                    elif pinfo is not None and pinfo.get("kind") == "DataSet":
+                        if name == "Query" and not pinfo["query"]:
+                            pinfo["query"] = True
+                            info = {"kind": "fields", "target": pinfo, "fields": QUERY_FIELDS}
+                    elif name == "DataSetName" and pname == "DataSetReference" and len(stack) >= 3 \
+                            and stack[-2][1] == "ValidValues" and stack[-3][2] is not None \
+                            and "cascading" in stack[-3][2]:
+                        stack[-3][2]["cascading"] = True
+                stack.append([elem, name, info])
+                continue
 
-    # --- Parameters (with cascading flag) ---
-    params = []
-    for p in root.findall(".//ns:ReportParameters/ns:ReportParameter", ns):
-        pname = p.get("Name")
-        av = p.find("ns:ValidValues/ns:DataSetReference/ns:DataSetName", ns)
-        params.append({"name": pname, "cascading": av is not None})
+            _, name, info = stack.pop()
+            text = elem.text
+            if isinstance(text, str):
+                txt = text.strip()
+                if txt.startswith("="):
+                    expr_count += 1
+                    if "Lookup(" in txt or "LookupSet(" in txt:
+                        uses_lookup = True
+            if stack:
+                pinfo = stack[-1][2]
+                if pinfo is not None and pinfo.get("kind") == "fields":
+                    key = pinfo["fields"].get(name)
+                    if key is not None and key not in pinfo:
+                        # first matching child only, like Element.find
+                        pinfo[key] = True
+                        pinfo["target"][key] = text
+                del stack[-1][0][-1]
+            if name is None:
+                continue
+            if name == "TablixRowHierarchy" and stack:
+                row_hierarchies -= 1
+            elif name == "TablixColumnHierarchy" and stack:
+                col_hierarchies -= 1
+            elif info is None:
+                continue
+            elif name == "Tablix":
+                open_tablix.remove(info)
+                del info["_rows_before"], info["_cols_before"]
+            elif name == "Chart":
+                open_charts.remove(info)
+                type_elem = info.pop("_type_elem")
+                info["type"] = type_elem.text if type_elem is not None else None
+            elif name == "DataSource":
+                data_sources[info["slot"]] = _data_source(info)
+            elif name == "DataSet":
+                datasets[info["slot"]] = _dataset(info)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid RDL XML: {e}")
 
-    # --- Tablix (with group depth) ---
-    tablix_detail = []
-    for t in root.findall(".//ns:Tablix", ns):
-        rgroups = t.findall(".//ns:TablixRowHierarchy//ns:TablixMember", ns)
-        cgroups = t.findall(".//ns:TablixColumnHierarchy//ns:TablixMember", ns)
-        tablix_detail.append({
-            "name": t.get("Name"),
-            "row_groups": len(rgroups),
-            "col_groups": len(cgroups)
-        })
     tablix_names = [t["name"] for t in tablix_detail]
     max_group_depth = max([max(td["row_groups"], td["col_groups"]) for td in tablix_detail], default=0)
 
-    # --- Subreports & Custom code ---
-    subreports = [sr.get("Name") for sr in root.findall(".//ns:Subreport", ns)]
-    custom_code = root.find(".//ns:Code", ns) is not None
-
     # --- Summary counts ---
     num_params = len(params)
     num_casc   = sum(1 for p in params if p.get("cascading"))
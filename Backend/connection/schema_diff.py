@@ -0,0 +1,215 @@
+import re
+import time
+from functools import lru_cache
+
+# SQL Server and PostgreSQL spellings of the same column type, so a catalog
+# extracted from either engine (SQL Server sys.types names, PostgreSQL
+# information_schema data_type) can be compared with the other.
+TYPE_FAMILIES = {
+    "bigint": "bigint", "int8": "bigint",
+    "int": "integer", "integer": "integer", "int4": "integer",
+    "smallint": "smallint", "int2": "smallint", "tinyint": "smallint",
+    "bit": "boolean", "boolean": "boolean", "bool": "boolean",
+    "decimal": "numeric", "numeric": "numeric", "money": "numeric", "smallmoney": "numeric",
+    "float": "double precision", "double precision": "double precision", "float8": "double precision",
+    "real": "real", "float4": "real",
+    "char": "character", "nchar": "character", "character": "character", "bpchar": "character",
+    "varchar": "character varying", "nvarchar": "character varying", "character varying": "character varying",
+    "text": "text", "ntext": "text", "xml": "xml",
+    "date": "date",
+    "time": "time", "time without time zone": "time",
+    "datetime": "timestamp", "datetime2": "timestamp", "smalldatetime": "timestamp",
+    "timestamp without time zone": "timestamp",
+    "datetimeoffset": "timestamptz", "timestamp with time zone": "timestamptz",
+    "uniqueidentifier": "uuid", "uuid": "uuid",
+    "binary": "bytea", "varbinary": "bytea", "image": "bytea", "bytea": "bytea",
+    # SQL Server's timestamp is a row version, not a date
+    "rowversion": "rowversion", "timestamp": "rowversion",
+}
+
+# PostgreSQL casts such as ::character varying or ::numeric(10,2)[] at the end of a value;
+# a value ending in a quote or parenthesis has none, so casts inside string literals are kept
+_CAST = re.compile(r"^(.*?)(::[a-z_ ]+(\(\d+(,\s*\d+)?\))?(\[\])?)+$", re.IGNORECASE | re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def canonical_type(data_type):
+    """Engine-neutral name of a column type; unknown types compare by their lower-cased name."""
+    name = str(data_type or "").strip().lower()
+    return TYPE_FAMILIES.get(name, name)
+
+
+def _wrapped(value):
+    """True if the whole value is enclosed in one pair of parentheses (ignoring those in strings)."""
+    depth = 0
+    quoted = False
+    for i, ch in enumerate(value):
+        if ch == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0 and i < len(value) - 1:
+                return False
+    return True
+
+
+@lru_cache(maxsize=65536)
+def canonical_default(default):
+    """
+    Column default without SQL Server's wrapping parentheses or PostgreSQL's
+    trailing casts: ((0)) and 0::integer give 0, ('now'::text)::date gives
+    'now'. Casts inside the value, e.g. nextval('s'::regclass), and text in
+    string literals are left alone.
+    """
+    if default is None:
+        return None
+    value = str(default).strip()
+    while True:
+        while value.startswith("(") and value.endswith(")") and _wrapped(value):
+            value = value[1:-1].strip()
+        match = _CAST.match(value)
+        if match is None:
+            return value
+        value = match.group(1).strip()
+
+
+def _iter_tables(metadata):
+    """
+    (database, schema, table, columns) of both catalog shapes.
+
+    SQL Server: {db: {"tables": [{"schema", "name", "columns": [...]}]}}
+    PostgreSQL: {db: {"schemas": {schema: {"tables": {name: {"columns": [...]}}}}}}
+    """
+    for db, db_meta in metadata.items():
+        if not isinstance(db_meta, dict):
+            continue
+        if "schemas" in db_meta:
+            for schema, schema_meta in db_meta["schemas"].items():
+                for name, table in (schema_meta.get("tables") or {}).items():
+                    yield db, schema, name, table.get("columns", [])
+        else:
+            for table in db_meta.get("tables", []):
+                yield db, table["schema"], table["name"], table.get("columns", [])
+
+
+def normalize_catalog(metadata, fold_case=True, compare_defaults=True, database_map=None, schema_map=None):
+    """
+    Flatten a catalog into {(db, schema, table) key: (db, schema, table, signatures, names)}.
+
+    signatures maps each column key to (type, nullable, default, max_length) and
+    names maps it back to the column name as extracted. Keys are lower-cased
+    with fold_case=True, since PostgreSQL folds unquoted identifiers to lower
+    case. database_map/schema_map rename databases/schemas before matching
+    (e.g. {"dbo": "public"}).
+    """
+    database_map = database_map or {}
+    schema_map = schema_map or {}
+    fold = str.lower if fold_case else str
+    # most columns share a handful of (type, nullable, default, length) combinations
+    canonical = {}
+    tables = {}
+    for db, schema, name, columns in _iter_tables(metadata):
+        db = database_map.get(db, db)
+        schema = schema_map.get(schema, schema)
+        signatures = {}
+        names = {}
+        for column in columns:
+            get = column.get
+            raw = (get("data_type"), get("nullable"), get("default") if compare_defaults else None, get("max_length"))
+            signature = canonical.get(raw)
+            if signature is None:
+                signature = canonical[raw] = (
+                    canonical_type(raw[0]), raw[1] in ("YES", True, 1), canonical_default(raw[2]), raw[3],
+                )
+            column_name = column["column_name"]
+            key = fold(column_name)
+            signatures[key] = signature
+            names[key] = column_name
+        tables[(fold(db), fold(schema), fold(name))] = (db, schema, name, signatures, names)
+    return tables
+
+
+def _column_changes(old, new):
+    """{field: {"source", "target"}} for the fields that differ; max_length only if both sides know it."""
+    changes = {}
+    for field, a, b in zip(("data_type", "nullable", "default", "max_length"), old, new):
+        if a != b and not (field == "max_length" and (a is None or b is None)):
+            changes[field] = {"source": a, "target": b}
+    return changes
+
+
+def diff_catalogs(source, target, fold_case=True, compare_defaults=True, database_map=None, schema_map=None):
+    """
+    Yield the differences between two catalogs as JSON-ready records.
+
+    `source` and `target` are metadata dicts of either extractor (SQL Server
+    or PostgreSQL, live or from a snapshot). Tables and columns are matched by
+    hashed (database, schema, table[, column]) keys, so the cost is linear in
+    the size of both catalogs, and tables whose columns are identical are
+    skipped with a single comparison. "removed" means present only in the
+    source, "added" present only in the target.
+
+    Records, in order: per source table either "table_removed" or its
+    "column_removed"/"column_changed" (with "changes") and "column_added"
+    records, then "table_added", then one "summary" record with the counts.
+    """
+    start = time.perf_counter()
+    options = dict(fold_case=fold_case, compare_defaults=compare_defaults,
+                   database_map=database_map, schema_map=schema_map)
+    old = normalize_catalog(source, **options)
+    new = normalize_catalog(target, **options)
+    counts = dict.fromkeys((
+        "tables_compared", "tables_unchanged", "tables_changed", "tables_added", "tables_removed",
+        "columns_added", "columns_removed", "columns_changed",
+    ), 0)
+
+    for key, (db, schema, table, signatures, names) in old.items():
+        other = new.get(key)
+        if other is None:
+            counts["tables_removed"] += 1
+            yield {"type": "table_removed", "database": db, "schema": schema, "table": table}
+            continue
+        counts["tables_compared"] += 1
+        other_signatures, other_names = other[3], other[4]
+        if signatures == other_signatures:
+            counts["tables_unchanged"] += 1
+            continue
+
+        where = {"database": db, "schema": schema, "table": table}
+        records = []
+        for column, signature in signatures.items():
+            other_signature = other_signatures.get(column)
+            if other_signature is None:
+                counts["columns_removed"] += 1
+                records.append({"type": "column_removed", **where, "column": names[column]})
+            elif other_signature != signature:
+                changes = _column_changes(signature, other_signature)
+                if changes:
+                    counts["columns_changed"] += 1
+                    records.append({"type": "column_changed", **where, "column": names[column], "changes": changes})
+        for column in other_signatures:
+            if column not in signatures:
+                counts["columns_added"] += 1
+                records.append({"type": "column_added", **where, "column": other_names[column]})
+        # signatures can differ only in a max_length one side does not know
+        counts["tables_changed" if records else "tables_unchanged"] += 1
+        yield from records
+
+    for key, (db, schema, table, _, _) in new.items():
+        if key not in old:
+            counts["tables_added"] += 1
+            yield {"type": "table_added", "database": db, "schema": schema, "table": table}
+
+    yield {"type": "summary", **counts, "seconds": round(time.perf_counter() - start, 4)}
+
+
+def diff_summary(source, target, **options):
+    """Run diff_catalogs and collect its records: {"summary": {...}, "differences": [...]}."""
+    differences = list(diff_catalogs(source, target, **options))
+    summary = differences.pop()
+    summary.pop("type")
+    return {"summary": summary, "differences": differences}
@@ -0,0 +1,316 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Where snapshots are kept unless LIFTR_SNAPSHOT_DIR says otherwise
+SNAPSHOT_ROOT = os.environ.get(
+    "LIFTR_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metadata_snapshots"),
+)
+DEFAULT_NAMESPACE = "default"
+# Snapshots kept per namespace; older ones are evicted on save
+DEFAULT_RETENTION = 20
+# A delta chain is cut with a full manifest after this many deltas
+FULL_MANIFEST_EVERY = 10
+# Namespaces used as directory names as they are; other names are slugged and hashed
+_PLAIN_NAMESPACE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False).encode("utf-8")
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _snapshot_id(order, databases):
+    return _hash(_canonical({"order": order, "databases": databases}))[:32]
+
+
+def namespace_dir(namespace):
+    """
+    Directory name of a namespace below the snapshot root.
+
+    Plain names (letters, digits, "_" and "-") are used as they are; others
+    become a slug plus a hash of the name, so two names never share a
+    directory. Names that are empty or contain a path separator, ".." or
+    NUL raise ValueError.
+    """
+    if not isinstance(namespace, str) or not namespace or "\0" in namespace:
+        raise ValueError(f"Invalid connection id: {namespace!r}")
+    if "/" in namespace or "\\" in namespace or ".." in namespace:
+        raise ValueError(f"Invalid connection id: {namespace!r}")
+    if _PLAIN_NAMESPACE.match(namespace):
+        return namespace
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", namespace)[:32].strip("_")
+    return f"{slug}-{_hash(namespace.encode('utf-8'))[:16]}"
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    """
+    Compressed, content-addressed store of metadata snapshots for one source.
+
+    Layout under <root>/<namespace_dir(namespace)>/:
+        objects/<aa>/<sha256>.json.zst|.json.gz   one blob per database subtree
+        snapshots/<id>.json                       manifest (full or delta)
+        index.json                                snapshot ids, oldest first
+
+    Each database subtree is stored once per distinct content, so a database
+    that did not change between two extractions costs nothing. Manifests map
+    database -> blob hash; most are stored as deltas against the previous
+    snapshot (only changed/removed databases), with a full manifest every
+    FULL_MANIFEST_EVERY snapshots. The snapshot id is the hash of the resolved
+    manifest, so it doubles as a catalog version.
+    """
+
+    def __init__(self, root=SNAPSHOT_ROOT, namespace=DEFAULT_NAMESPACE, retention=DEFAULT_RETENTION):
+        root = os.path.realpath(root)
+        self.path = os.path.join(root, namespace_dir(namespace))
+        if os.path.dirname(os.path.realpath(self.path)) != root:
+            raise ValueError(f"Invalid connection id: {namespace!r}")
+        self.retention = retention
+        self._lock = threading.RLock()
+        self._latest = None  # (snapshot id, metadata) of the last saved/loaded latest snapshot
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.path, "snapshots"), exist_ok=True)
+
+    # ---------- Blobs ----------
+    def _blob_path(self, digest, ext):
+        return os.path.join(self.path, "objects", digest[:2], f"{digest}{ext}")
+
+    def _find_blob(self, digest):
+        for ext in (".json.zst", ".json.gz"):
+            p = self._blob_path(digest, ext)
+            if os.path.exists(p):
+                return p
+        return None
+
+    def _put_blob(self, subtree):
+        data = _canonical(subtree)
+        digest = _hash(data)
+        if self._find_blob(digest) is None:
+            if zstandard is not None:
+                path, payload = self._blob_path(digest, ".json.zst"), zstandard.ZstdCompressor(level=10).compress(data)
+            else:
+                path, payload = self._blob_path(digest, ".json.gz"), gzip.compress(data, compresslevel=6)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, payload)
+        return digest
+
+    def _get_blob(self, digest):
+        path = self._find_blob(digest)
+        if path is None:
+            raise FileNotFoundError(f"Snapshot object {digest} is missing")
+        with open(path, "rb") as f:
+            payload = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this snapshot")
+            data = zstandard.ZstdDecompressor().decompress(payload)
+        else:
+            data = gzip.decompress(payload)
+        return json.loads(data)
+
+    # ---------- Manifests ----------
+    def _index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def _read_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_index(self, index):
+        _write_atomic(self._index_path(), json.dumps(index, indent=2).encode("utf-8"))
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.path, "snapshots", f"{snapshot_id}.json")
+
+    def _read_manifest(self, snapshot_id):
+        with open(self._manifest_path(snapshot_id), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        _write_atomic(self._manifest_path(manifest["id"]), json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def _resolve(self, snapshot_id):
+        """Return (order, {db: hash}, delta depth) of a snapshot by walking its delta chain."""
+        chain = []
+        manifest = self._read_manifest(snapshot_id)
+        while manifest.get("parent"):
+            chain.append(manifest)
+            manifest = self._read_manifest(manifest["parent"])
+        databases = dict(manifest["databases"])
+        for delta in reversed(chain):
+            databases.update(delta["changed"])
+            for db in delta["removed"]:
+                databases.pop(db, None)
+        order = chain[0]["order"] if chain else manifest["order"]
+        return order, {db: databases[db] for db in order}, len(chain)
+
+    # ---------- Public API ----------
+    def save(self, metadata):
+        """Store a metadata dict and return its snapshot id (unchanged metadata returns the latest id)."""
+        with self._lock:
+            order = list(metadata)
+            databases = {db: self._put_blob(metadata[db]) for db in order}
+            snapshot_id = _snapshot_id(order, databases)
+
+            index = self._read_index()
+            if index and index[-1]["id"] == snapshot_id:
+                self._latest = (snapshot_id, metadata)
+                return snapshot_id
+            # content seen earlier is moved to the end rather than stored twice; it is
+            # rewritten as a full manifest so older deltas based on it stay valid
+            seen = any(entry["id"] == snapshot_id for entry in index)
+            index = [entry for entry in index if entry["id"] != snapshot_id]
+
+            manifest = {"id": snapshot_id, "created_at": datetime.now().isoformat(), "order": order}
+            parent = index[-1]["id"] if index and not seen else None
+            if parent:
+                _, parent_dbs, depth = self._resolve(parent)
+            if parent and depth + 1 < FULL_MANIFEST_EVERY:
+                manifest["parent"] = parent
+                manifest["changed"] = {db: h for db, h in databases.items() if parent_dbs.get(db) != h}
+                manifest["removed"] = [db for db in parent_dbs if db not in databases]
+            else:
+                manifest["databases"] = databases
+            self._write_manifest(manifest)
+
+            index.append({"id": snapshot_id, "created_at": manifest["created_at"], "databases": len(order)})
+            self._write_index(index)
+            self._latest = (snapshot_id, metadata)
+            self.prune()
+            logger.info("📁 Metadata snapshot saved: %s (%s)", self.path, snapshot_id)
+            return snapshot_id
+
+    def load(self, snapshot_id):
+        """Return the metadata dict of a snapshot; KeyError if the id is not in the index."""
+        with self._lock:
+            if self._latest and self._latest[0] == snapshot_id:
+                return self._latest[1]
+            # ids come from clients, so only listed ones are turned into manifest paths
+            if not any(entry["id"] == snapshot_id for entry in self._read_index()):
+                raise KeyError(snapshot_id)
+            order, databases, _ = self._resolve(snapshot_id)
+            return {db: self._get_blob(databases[db]) for db in order}
+
+    def iter_databases(self, snapshot_id):
+        """
+        Iterator of (database, metadata) of a snapshot that reads one database
+        blob at a time, so a large catalog is never held in memory at once.
+        KeyError if the id is not in the index.
+        """
+        with self._lock:
+            if self._latest and self._latest[0] == snapshot_id:
+                return iter(list(self._latest[1].items()))
+            if not any(entry["id"] == snapshot_id for entry in self._read_index()):
+                raise KeyError(snapshot_id)
+            order, databases, _ = self._resolve(snapshot_id)
+        return ((db, self._get_blob(databases[db])) for db in order)
+
+    def version_of(self, metadata):
+        """Snapshot id that save() gives (or gave) a metadata dict, without writing anything."""
+        with self._lock:
+            if self._latest and self._latest[1] is metadata:
+                return self._latest[0]
+        order = list(metadata)
+        return _snapshot_id(order, {db: _hash(_canonical(metadata[db])) for db in order})
+
+    def latest_id(self):
+        index = self._read_index()
+        return index[-1]["id"] if index else None
+
+    def load_latest(self):
+        """Return (snapshot id, metadata) of the newest snapshot, or (None, None) if there is none."""
+        with self._lock:
+            snapshot_id = self.latest_id()
+            if snapshot_id is None:
+                return None, None
+            metadata = self.load(snapshot_id)
+            self._latest = (snapshot_id, metadata)
+            return snapshot_id, metadata
+
+    def list_snapshots(self):
+        return self._read_index()
+
+    def prune(self, retention=None):
+        """Evict snapshots beyond the retention count and delete blobs no snapshot refers to."""
+        retention = max(1, self.retention if retention is None else retention)
+        with self._lock:
+            index = self._read_index()
+            if len(index) <= retention:
+                return []
+            evicted, kept = index[:-retention], index[-retention:]
+            evicted_ids = {entry["id"] for entry in evicted}
+
+            # deltas whose parent is going away are rewritten as full manifests first
+            referenced = set()
+            for entry in kept:
+                manifest = self._read_manifest(entry["id"])
+                order, databases, _ = self._resolve(entry["id"])
+                if manifest.get("parent") in evicted_ids:
+                    self._write_manifest({
+                        "id": manifest["id"], "created_at": manifest["created_at"],
+                        "order": order, "databases": databases,
+                    })
+                referenced.update(databases.values())
+
+            for snapshot_id in evicted_ids:
+                try:
+                    os.remove(self._manifest_path(snapshot_id))
+                except FileNotFoundError:
+                    pass
+            self._write_index(kept)
+
+            objects_dir = os.path.join(self.path, "objects")
+            for prefix in os.listdir(objects_dir):
+                for name in os.listdir(os.path.join(objects_dir, prefix)):
+                    if name.split(".", 1)[0] not in referenced:
+                        os.remove(os.path.join(objects_dir, prefix, name))
+            return sorted(evicted_ids)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(namespace=DEFAULT_NAMESPACE):
+    """
+    Shared SnapshotStore for a namespace (one per source connection).
+
+    Callers pass only ids of registered connections; an id that cannot be a
+    directory name raises ValueError before anything is created.
+    """
+    with _stores_lock:
+        if namespace not in _stores:
+            _stores[namespace] = SnapshotStore(namespace=namespace)
+        return _stores[namespace]
+
+
+def release_snapshot_store(namespace):
+    """Forget the shared store of a namespace (its snapshots stay on disk)."""
+    with _stores_lock:
+        _stores.pop(namespace, None)
@@ -1,30 +1,109 @@
 from connection.Remote_sql_server import fetch_sql_server_metadata as fetch_sql_server_metadata_func
+from connection.Remote_sql_server import fetch_sql_server_metadata_parallel, DEFAULT_METADATA_WORKERS
+from connection.Remote_sql_server import fetch_sql_server_metadata_batched, iter_sql_server_metadata
+from connection.Remote_sql_server import collect_metadata_records, iter_metadata_records
+from connection.incremental_refresh import refresh_sql_server_metadata
+from connection.snapshot_store import get_snapshot_store, namespace_dir, release_snapshot_store
+from connection.connection_manager import ConnectionRegistry
+from connection.extractors import EXTRACTORS, get_extractor
+from connection.schema_diff import diff_catalogs
+from connection.ddl import iter_ddl
+from connection.dependency_graph import load_plan, order_tables
+from connection.data_copy import DEFAULT_COPY_WORKERS, copy_database
+from connection.migration_state import RUN_RUNNING, RUN_SUCCEEDED, get_state_store
+from connection.data_validation import DEFAULT_VALIDATION_WORKERS, validate_database
+from connection.assessment import run_sql_server_assessment
+from services.job_queue import FINISHED, QUEUED, RUNNING, JobManager
+from services.response_cache import ResponseCache
+from services.metrics import metrics, trace
 import os
 import datetime
-from flask import Flask, request, jsonify, send_file
+import json
+import logging
+import threading
+import uuid
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 from connection.rdl_inspect import parse_rdl
-import pyodbc
+from connection.rdl_batch import (DEFAULT_RDL_WORKERS, MAX_RDL_FILE_BYTES, MAX_RDL_FILES, MAX_RDL_UPLOAD_BYTES,
+                                  MAX_RDL_WORKERS, BatchLimitError, BatchSummary, extract_rdl_archive,
+                                  parse_reports, remove_batch)
+
+logger = logging.getLogger(__name__)
 
 RDL_UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploaded_rdls")
-os.makedirs(RDL_UPLOAD_DIR, exist_ok=True)
 
 ALLOWED_EXT = {".rdl"}
-app = Flask(__name__)
-CORS(app, supports_credentials=True)
+# every route lives on this blueprint; create_app() builds the Flask app around it
+bp = Blueprint("liftr", __name__)
+DEFAULT_CONNECTION_ID = "default"
+
+
+class AppState:
+    """Jobs, connections and caches of one app, kept in app.extensions["liftr"] by create_app()."""
+
+    def __init__(self):
+        # background worker pool for extraction/assessment jobs
+        self.jobs = JobManager()
+        # named SQL Server connections, one pool each; clients pick the id ("default" if omitted)
+        self.connections = ConnectionRegistry()
+        # last metadata snapshot + per-database watermarks per connection id (?mode=incremental)
+        self.metadata_states = {}
+        # serialized /fetch_sql_server_metadata responses per (connection id, mode, snapshot id)
+        self.response_cache = ResponseCache()
+        # named PostgreSQL servers (connection settings only, every database gets its own connection)
+        self.postgres_sources = {}
+
+
+def _app_state(name):
+    """Proxy to one attribute of the current app's AppState, so routes can use it like a global."""
+    return LocalProxy(lambda: getattr(current_app.extensions["liftr"], name))
+
+
+jobs = _app_state("jobs")
+connections = _app_state("connections")
+metadata_states = _app_state("metadata_states")
+response_cache = _app_state("response_cache")
+postgres_sources = _app_state("postgres_sources")
 
-conn = None
+metrics.describe("liftr_response_cache_entries", "gauge", "Cached catalog responses.")
+metrics.describe("liftr_response_cache_bytes", "gauge", "Size of the cached catalog responses.")
+metrics.describe("liftr_response_cache_hits_total", "counter", "Catalog requests answered from the cache.")
+metrics.describe("liftr_response_cache_misses_total", "counter", "Catalog requests that needed an extraction.")
+metrics.describe("liftr_pool_connections_in_use", "gauge", "Borrowed connections per named connection.")
+metrics.describe("liftr_pool_connections_idle", "gauge", "Idle pooled connections per named connection.")
+metrics.describe("liftr_jobs", "gauge", "Background jobs by status.")
 
-@app.route("/")
+
+def register_sql_server_connection(connection_id, data):
+    """Check that the server is reachable, then register (or replace) a pooled connection."""
+    # the id names the connection's snapshot directory, so it must be usable as one
+    namespace_dir(connection_id)
+    source = get_extractor("sqlserver").open(data)
+    source.connect().close()
+    entry = connections.register(connection_id, source.connect, server=source.server, info=source.info)
+    metadata_states.pop(connection_id, None)
+    response_cache.invalidate(connection_id)
+    return entry
+
+
+def is_registered(connection_id):
+    """Whether a SQL Server or PostgreSQL connection is registered under this id."""
+    return connections.get(connection_id) is not None or connection_id in postgres_sources
+
+
+@bp.route("/")
 def hello_world():
     return "<p>Hello, World!</p>"
 
-@app.route("/debug_connect_sql", methods=["POST"])
+@bp.route("/debug_connect_sql", methods=["POST"])
 def debug_connect_sql():
     try:
         data = request.get_json()
-        print("Received JSON:", data)
+        logger.debug("Received JSON: %s", data)
 
         server = data.get("server")
         username = data.get("username")
@@ -36,154 +115,663 @@ def debug_connect_sql():
             "Encrypt=no;TrustServerCertificate=yes;"
         )
 
-        print("Connection string:", conn_str)
+        logger.debug("Connection string: %s", conn_str)
 
+        pyodbc = get_extractor("sqlserver").load_driver()
         conn = pyodbc.connect(conn_str, timeout=5)
         return jsonify({"status": "success"}), 200
 
     except Exception as e:
-        print("Error connecting:", str(e))
+        logger.error("Error connecting: %s", e)
         return jsonify({"status": "error", "error_message": str(e)}), 500
 
 
-@app.route("/test_odbc", methods=["GET"])
+@bp.route("/test_odbc", methods=["GET"])
 def test_odbc():
-    import pyodbc
+    pyodbc = get_extractor("sqlserver").load_driver()
     return jsonify({"drivers": pyodbc.drivers()})
 
 
-@app.route("/connect_sql_server", methods=["POST"])
-def connect_sql_server():
-    global conn
-    data = request.get_json()
-
-    try:
-        server = data.get("server")
-        auth_type = data.get("auth_type", "no").lower()
-        username = data.get("username")
-        password = data.get("password")
-
-        if not server:
-            return jsonify({"status": "error", "message": "Server name is required"}), 400
+@bp.route("/extractors", methods=["GET"])
+def list_extractors():
+    """Supported source types and whether their driver is installed."""
+    return jsonify({"status": "success", "extractors": [e.to_dict() for e in EXTRACTORS.values()]}), 200
 
-        driver = "{ODBC Driver 18 for SQL Server}"
-
-        if auth_type == "no":
-            if not username or not password:
-                return jsonify({"status": "error", "message": "Username and password required"}), 400
-
-            conn_str = (
-                f"DRIVER={driver};SERVER={server};UID={username};PWD={password};Encrypt=no;"
-            )
-        else:
-            conn_str = (
-                f"DRIVER={driver};SERVER={server};Trusted_Connection=yes;"
-            )
 
-        conn = pyodbc.connect(conn_str, timeout=5)
+@bp.route("/connect_sql_server", methods=["POST"])
+@bp.route("/api/connections", methods=["POST"])
+def connect_sql_server():
+    data = request.get_json() or {}
+    connection_id = data.get("connection_id") or data.get("connectionName") or DEFAULT_CONNECTION_ID
 
-        return jsonify({"status": "success", "message": "Connection successful"}), 200
+    try:
+        register_sql_server_connection(connection_id, data)
+        return jsonify({
+            "status": "success",
+            "message": "Connection successful",
+            "connection_id": connection_id
+        }), 200
 
+    except ValueError as ve:
+        return jsonify({"status": "error", "message": str(ve)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
     
     
-@app.route("/disconnect_sql_server", methods=["POST"])
+@bp.route("/disconnect_sql_server", methods=["POST"])
 def disconnect_sql_server():
-    global conn
-    if conn:
-        conn.close()
-        conn = None
+    data = request.get_json(silent=True) or {}
+    connection_id = data.get("connection_id", DEFAULT_CONNECTION_ID)
+    if connections.remove(connection_id):
+        metadata_states.pop(connection_id, None)
+        response_cache.invalidate(connection_id)
+        release_snapshot_store(connection_id)
         return jsonify({"status": "success", "message": "Disconnected from SQL Server"}), 200
     else:
         return jsonify({"status": "error", "message": "No active connection to disconnect"}), 400
 
-@app.route("/fetch_sql_server_metadata", methods=["GET"])
+def arg_flag(name):
+    """True if query param `name` is set to 1/true/yes."""
+    return request.args.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def wants_ndjson():
+    """True if the client asked for a streamed NDJSON response."""
+    if arg_flag("stream"):
+        return True
+    return "application/x-ndjson" in request.headers.get("Accept", "")
+
+
+def cached_json_response(cached):
+    """Send a cached response body with its ETag; a matching If-None-Match gets 304 Not Modified."""
+    response = Response(cached.body, mimetype="application/json")
+    response.set_etag(cached.etag, weak=True)
+    # clients may keep the body but must revalidate it before every reuse
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@bp.route("/fetch_sql_server_metadata", methods=["GET"])
 def fetch_sql_server_metadata_route():
-    if not conn:
+    connection_id = request.args.get("connection_id", DEFAULT_CONNECTION_ID)
+    entry = connections.get(connection_id)
+    if entry is None:
         return jsonify({"status": "error", "message": "No active SQL Server connection"}), 400
+    store = get_snapshot_store(connection_id)
+    # ?cached=1 serves the latest stored snapshot without touching the server
+    if arg_flag("cached"):
+        snapshot_id = store.latest_id()
+        if snapshot_id is None:
+            return jsonify({"status": "error", "message": "No metadata snapshot available"}), 404
+        cached = response_cache.get(connection_id, snapshot_id)
+        if cached is None:
+            payload = {"status": "success", "metadata": store.load(snapshot_id), "snapshot_id": snapshot_id}
+            cached = response_cache.put(connection_id, snapshot_id, payload, current=False)
+        return cached_json_response(cached)
+
+    pool = entry.pool
+    # the stream always extracts like the default mode, so it shares that mode's cache entry
+    mode = None if wants_ndjson() else request.args.get("mode") or None
+    # a response extracted less than response_cache.ttl seconds ago is reused; ?refresh=1 forces extraction
+    cached = None if arg_flag("refresh") else response_cache.current(connection_id, mode)
     
+    # ?stream=1 or "Accept: application/x-ndjson" streams one JSON record per line as it is extracted
+    if wants_ndjson():
+        if cached is not None:
+            try:
+                # replayed from the snapshot one database at a time rather than by parsing the cached body
+                databases = store.iter_databases(cached.version)
+            except KeyError:
+                cached = None
+        if cached is not None:
+            response = Response(
+                stream_with_context(json.dumps(record, default=str) + "\n" for record in iter_metadata_records(databases)),
+                mimetype="application/x-ndjson",
+            )
+            response.set_etag(f"{cached.etag}-ndjson", weak=True)
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
+
+        def generate():
+            metadata = {}
+            try:
+                with trace() as timings:
+                    with pool.connection() as conn:
+                        for record in collect_metadata_records(iter_sql_server_metadata(conn), metadata):
+                            yield json.dumps(record, default=str) + "\n"
+                # a completed stream is stored and cached like a default-mode extraction
+                payload = {"status": "success", "metadata": metadata, "timings": timings.to_dict(),
+                           "snapshot_id": store.save(metadata)}
+                response_cache.put(connection_id, payload["snapshot_id"], payload, current=bool(metadata))
+            except Exception as e:
+                yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    if cached is not None:
+        return cached_json_response(cached)
+
     try:
-        metadata = fetch_sql_server_metadata_func(conn)
+        with trace() as timings:
+            # ?mode=parallel&workers=N fans the per-database work out over N pooled connections
+            # (add &batched=1 to read each database in a single round trip)
+            if mode == "parallel":
+                workers = min(request.args.get("workers", DEFAULT_METADATA_WORKERS, type=int), pool.max_size)
+                metadata, errors = fetch_sql_server_metadata_parallel(
+                    pool.borrow, max_workers=workers, batched=arg_flag("batched"), namespace=connection_id
+                )
+                payload = {"status": "success", "metadata": metadata, "errors": errors}
+            else:
+                with pool.connection() as conn:
+                    # ?mode=incremental only re-reads databases/objects modified since the previous call
+                    if mode == "incremental":
+                        state, summary = refresh_sql_server_metadata(
+                            conn, metadata_states.get(connection_id), namespace=connection_id
+                        )
+                        metadata_states[connection_id] = state
+                        metadata = state["metadata"]
+                        payload = {
+                            "status": "success",
+                            "metadata": metadata,
+                            "refresh": summary,
+                            "errors": summary["errors"],
+                        }
+
+                    # ?mode=batched sends one batch per database, ?mode=cross_database one batch for the whole server
+                    elif mode in ("batched", "cross_database"):
+                        metadata, errors = fetch_sql_server_metadata_batched(
+                            conn, cross_database=(mode == "cross_database"), namespace=connection_id
+                        )
+                        payload = {"status": "success", "metadata": metadata, "errors": errors}
+
+                    else:
+                        metadata = fetch_sql_server_metadata_func(conn, namespace=connection_id)
+                        payload = {"status": "success", "metadata": metadata}
         # print("Fetched metadata:", metadata)
-        return jsonify({"status": "success", "metadata": metadata}), 200
+
+        payload["timings"] = timings.to_dict()
+        payload["snapshot_id"] = store.version_of(metadata)
+        # an empty catalog usually means the extraction failed, so it is not reused for later requests
+        cached = response_cache.put(connection_id, payload["snapshot_id"], payload, current=bool(metadata), mode=mode)
+        return cached_json_response(cached)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@bp.route("/connect_postgres", methods=["POST"])
+def connect_postgres():
+    data = request.get_json() or {}
+    connection_id = data.get("connection_id") or data.get("connectionName") or DEFAULT_CONNECTION_ID
+
+    try:
+        namespace_dir(connection_id)
+        source = get_extractor("postgres").open(data)
+        source.read(lambda cursor: cursor.execute("SELECT 1"))
+        postgres_sources[connection_id] = source
+        return jsonify({
+            "status": "success",
+            "message": "Connection successful",
+            "connection_id": connection_id
+        }), 200
+    except ValueError as ve:
+        return jsonify({"status": "error", "message": str(ve)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@bp.route("/disconnect_postgres", methods=["POST"])
+def disconnect_postgres():
+    data = request.get_json(silent=True) or {}
+    connection_id = data.get("connection_id", DEFAULT_CONNECTION_ID)
+    if postgres_sources.pop(connection_id, None) is not None:
+        release_snapshot_store(connection_id)
+        return jsonify({"status": "success", "message": "Disconnected from PostgreSQL"}), 200
+    return jsonify({"status": "error", "message": "No active connection to disconnect"}), 400
+
+
+@bp.route("/fetch_postgres_metadata", methods=["GET"])
+def fetch_postgres_metadata_route():
+    source = postgres_sources.get(request.args.get("connection_id", DEFAULT_CONNECTION_ID))
+    if source is None:
+        return jsonify({"status": "error", "message": "No active PostgreSQL connection"}), 400
+    # ?workers=N reads N databases at a time, ?databases=a,b limits the extraction to those databases
+    workers = request.args.get("workers", type=int)
+    databases = [db for db in request.args.get("databases", "").split(",") if db]
+
+    try:
+        with trace() as timings:
+            metadata, errors = get_extractor("postgres").fetch_metadata(
+                source, max_workers=workers, databases=databases
+            )
+        return jsonify({
+            "status": "success",
+            "metadata": metadata,
+            "errors": errors,
+            "timings": timings.to_dict(),
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Extraction timings, row and error counters plus cache/pool/job gauges in Prometheus text format."""
+    cache = response_cache.stats()
+    metrics.set_gauge("liftr_response_cache_entries", cache["entries"])
+    metrics.set_gauge("liftr_response_cache_bytes", cache["bytes"])
+    metrics.set_gauge("liftr_response_cache_hits_total", cache["hits"])
+    metrics.set_gauge("liftr_response_cache_misses_total", cache["misses"])
+    metrics.clear_gauge("liftr_pool_connections_in_use")
+    metrics.clear_gauge("liftr_pool_connections_idle")
+    for entry in connections.list_entries():
+        stats = entry.pool.stats()
+        metrics.set_gauge("liftr_pool_connections_in_use", stats["in_use"], connection=entry.name)
+        metrics.set_gauge("liftr_pool_connections_idle", stats["idle"], connection=entry.name)
+    statuses = dict.fromkeys((QUEUED, RUNNING) + FINISHED, 0)
+    for job in jobs.list():
+        statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+    for status, count in statuses.items():
+        metrics.set_gauge("liftr_jobs", count, status=status)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@bp.route("/metadata_snapshots", methods=["GET"])
+def list_metadata_snapshots():
+    """List stored metadata snapshots, oldest first."""
+    connection_id = request.args.get("connection_id", DEFAULT_CONNECTION_ID)
+    if not is_registered(connection_id):
+        return jsonify({"status": "error", "message": f"No connection '{connection_id}'"}), 404
+    return jsonify({"status": "success", "snapshots": get_snapshot_store(connection_id).list_snapshots()}), 200
+
+
+def load_catalog(spec):
+    """
+    Metadata for one side of a schema diff:
+    {"metadata": {...}} as given, {"type": "postgres", "connection_id"} extracted
+    live, or {"connection_id", "snapshot_id"} from the snapshot store (latest if
+    no snapshot_id) of a registered connection. Raises LookupError if it
+    does not exist.
+    """
+    if "metadata" in spec:
+        return spec["metadata"]
+    connection_id = spec.get("connection_id", DEFAULT_CONNECTION_ID)
+    if spec.get("type") == "postgres":
+        source = postgres_sources.get(connection_id)
+        if source is None:
+            raise LookupError(f"No active PostgreSQL connection '{connection_id}'")
+        metadata, _ = get_extractor("postgres").fetch_metadata(source)
+        return metadata
+    if not is_registered(connection_id):
+        raise LookupError(f"No connection '{connection_id}'")
+    store = get_snapshot_store(connection_id)
+    snapshot_id = spec.get("snapshot_id") or store.latest_id()
+    if snapshot_id is None:
+        raise LookupError(f"No metadata snapshot for '{connection_id}'")
+    try:
+        return store.load(snapshot_id)
+    except (KeyError, FileNotFoundError):
+        raise LookupError(f"Snapshot '{snapshot_id}' not found") from None
+
+
+@bp.route("/schema_diff", methods=["POST"])
+def schema_diff_route():
+    """
+    Stream the differences between two catalogs as NDJSON, one record per line
+    and a final "summary" record (see connection.schema_diff.diff_catalogs).
+
+    Body: {"source": spec, "target": spec} (see load_catalog), plus optional
+    "schema_map" (e.g. {"dbo": "public"}), "database_map", "fold_case" and
+    "compare_defaults".
+    """
+    data = request.get_json() or {}
+    try:
+        source = load_catalog(data.get("source") or {})
+        target = load_catalog(data.get("target") or {})
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    records = diff_catalogs(
+        source, target,
+        fold_case=data.get("fold_case", True),
+        compare_defaults=data.get("compare_defaults", True),
+        database_map=data.get("database_map"),
+        schema_map=data.get("schema_map"),
+    )
+    return Response(
+        stream_with_context(json.dumps(record, default=str) + "\n" for record in records),
+        mimetype="application/x-ndjson",
+    )
+
+
+@bp.route("/generate_ddl", methods=["POST"])
+def generate_ddl_route():
+    """
+    Stream PostgreSQL DDL for the tables of a SQL Server catalog (see connection.ddl.iter_ddl).
+
+    Body: {"source": spec} (see load_catalog), optional "databases" (default
+    all), "schema_map" (e.g. {"dbo": "public"}), "transaction" (default true:
+    one BEGIN/COMMIT per database) and "lowercase" (default true). Each
+    database's script starts with a "-- Database:" comment; add ?download=1
+    to get it as a file.
+    """
+    data = request.get_json() or {}
+    try:
+        metadata = load_catalog(data.get("source") or {})
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    databases = data.get("databases") or list(metadata)
+    missing = [db for db in databases if db not in metadata]
+    if missing:
+        return jsonify({"status": "error", "message": f"Unknown databases: {', '.join(missing)}"}), 404
+    options = {
+        "schema_map": data.get("schema_map"),
+        "transaction": data.get("transaction", True),
+        "lowercase": data.get("lowercase", True),
+    }
+
+    def generate():
+        for db in databases:
+            yield f"-- Database: {db}\n"
+            yield from iter_ddl(metadata[db], **options)
+            yield "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/sql")
+    if arg_flag("download"):
+        name = secure_filename(databases[0] if len(databases) == 1 else "schema") or "schema"
+        response.headers["Content-Disposition"] = f"attachment; filename={name}.sql"
+    return response
+
+
+@bp.route("/load_order", methods=["POST"])
+def load_order_route():
+    """
+    Foreign key load order of the tables of one database (see connection.dependency_graph).
+
+    Body: {"source": spec} (see load_catalog) and "database". Returns the
+    tables in load order, the "waves" of tables that can load in parallel,
+    the cycles and the foreign keys to defer to load them.
+    """
+    data = request.get_json() or {}
+    try:
+        metadata = load_catalog(data.get("source") or {})
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
+    db = data.get("database")
+    if db not in metadata:
+        return jsonify({"status": "error", "message": f"Unknown database: {db}"}), 404
+    return jsonify({"status": "success", "database": db, **load_plan(metadata[db])}), 200
 
 
-@app.route("/connections", methods=["GET"])
+@bp.route("/connections", methods=["GET"])
 def get_all_connections():
     """Get all active connections."""
     return jsonify({
         "status": "success",
-        "connections": [{"id": "default", "active": conn is not None}]
+        "connections": connections.list()
     }), 200
 
 
-@app.route("/connections/<connection_id>", methods=["GET"])
+@bp.route("/connections/<connection_id>", methods=["GET"])
 def get_connection(connection_id):
     """Get connection by ID."""
-    if connection_id != "default":
+    entry = connections.get(connection_id)
+    if entry is None:
         return jsonify({"status": "error", "message": "Connection not found"}), 404
     
     return jsonify({
         "status": "success",
-        "connection": {"id": "default", "active": conn is not None}
+        "connection": entry.to_dict()
     }), 200
 
 
-@app.route("/connections/<connection_id>", methods=["DELETE"])
+@bp.route("/connections/<connection_id>", methods=["DELETE"])
 def delete_connection(connection_id):
     """Delete connection by ID."""
-    global conn
-    if connection_id != "default":
+    if not connections.remove(connection_id):
         return jsonify({"status": "error", "message": "Connection not found"}), 404
-    
-    if conn:
-        conn.close()
-        conn = None
-        return jsonify({"status": "success", "message": "Connection deleted"}), 200
-    else:
-        return jsonify({"status": "error", "message": "No active connection to delete"}), 400
 
+    metadata_states.pop(connection_id, None)
+    response_cache.invalidate(connection_id)
+    release_snapshot_store(connection_id)
+    return jsonify({"status": "success", "message": "Connection deleted"}), 200
 
-@app.route("/connections/<connection_id>", methods=["PUT"])
+
+@bp.route("/connections/<connection_id>", methods=["PUT"])
 def update_connection(connection_id):
     """Update connection by ID."""
-    global conn
-    if connection_id != "default":
+    if connections.get(connection_id) is None:
         return jsonify({"status": "error", "message": "Connection not found"}), 404
     
-    data = request.get_json()
+    data = request.get_json() or {}
     try:
-        if conn:
-            conn.close()
-        
-        server = data.get("server")
-        auth_type = data.get("auth_type", "no").lower()
-        username = data.get("username")
-        password = data.get("password")
-        
-        if not server:
-            return jsonify({"status": "error", "message": "Server name is required"}), 400
-        
-        if auth_type == "no":
-            if not username or not password:
-                return jsonify({"status": "error", "message": "Username and password required"}), 400
-            conn_str = f"DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={server};UID={username};PWD={password};Encrypt=no;"
-        else:
-            conn_str = f"DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={server};Trusted_Connection=yes;"
-        
-        conn = pyodbc.connect(conn_str, timeout=5)
+        register_sql_server_connection(connection_id, data)
         return jsonify({"status": "success", "message": "Connection updated"}), 200
+    except ValueError as ve:
+        return jsonify({"status": "error", "message": str(ve)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+
+@bp.route("/api/reports/assessment/start/<connection_id>", methods=["POST"])
+def start_assessment(connection_id):
+    """Queue a background assessment of a connection and return its report (job) id."""
+    entry = connections.get(connection_id)
+    if entry is None:
+        return jsonify({"status": "error", "message": "Connection not found"}), 404
+
+    job = jobs.submit(
+        "assessment", entry.server, run_sql_server_assessment,
+        entry.pool.borrow, namespace=connection_id,
+    )
+    return jsonify({"status": "success", "report_id": job.id, "job": job.to_dict()}), 202
+
+
+@bp.route("/api/reports/assessment/status/<report_id>", methods=["GET"])
+def get_assessment_status(report_id):
+    """Status and progress of an assessment job; includes the result summary once finished."""
+    job = jobs.get(report_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Report not found"}), 404
+    response = {"status": "success", "job": job}
+    result = jobs.result(report_id) if job["status"] == "succeeded" else None
+    if result is not None:
+        response["result"] = result
+    return jsonify(response), 200
+
+
+@bp.route("/api/reports/assessment/cancel/<report_id>", methods=["POST"])
+def cancel_assessment(report_id):
+    """Cancel a queued or running assessment job."""
+    if not jobs.cancel(report_id):
+        return jsonify({"status": "error", "message": "Report not found or already finished"}), 404
+    return jsonify({"status": "success", "job": jobs.get(report_id)}), 200
+
+
+def select_tables(db_meta, names=None):
+    """Table records of a database, optionally only the given "schema.table" names (in catalog order)."""
+    tables = db_meta.get("tables", [])
+    if not names:
+        return tables
+    wanted = set(names)
+    return [t for t in tables if f"{t['schema']}.{t['name']}" in wanted]
+
+
+@bp.route("/api/migrations/copy/<connection_id>", methods=["POST"])
+def start_copy(connection_id):
+    """
+    Queue a background copy of SQL Server tables into PostgreSQL and return its job id.
+
+    Body: {"target": PostgreSQL connection id, "database": source database,
+    "target_database" (default: the target connection's database), "tables"
+    (optional "schema.table" list), "schema_map", "batch_size",
+    "buffer_batches", "workers", "chunk_rows", "chunk_seconds"}. Tables come
+    from the connection's latest metadata snapshot and must already exist on
+    the target (see /generate_ddl); large ones are copied as parallel chunks.
+    Progress is checkpointed under the returned run id, see /api/migrations/resume.
+    """
+    data = request.get_json() or {}
+    entry = connections.get(connection_id)
+    target = postgres_sources.get(data.get("target", DEFAULT_CONNECTION_ID))
+    if entry is None or target is None:
+        return jsonify({"status": "error", "message": "Source or target connection not found"}), 404
+    try:
+        metadata = load_catalog({"connection_id": connection_id})
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    db = data.get("database")
+    if db not in metadata:
+        return jsonify({"status": "error", "message": f"Unknown database: {db}"}), 404
+    # parents first, so the target can enforce foreign keys while loading
+    tables = order_tables(select_tables(metadata[db], data.get("tables")))
+    if not tables:
+        return jsonify({"status": "error", "message": "No tables to copy"}), 400
+
+    options = {
+        key: data[key]
+        for key in ("schema_map", "batch_size", "buffer_batches", "chunk_rows", "chunk_seconds", "workers")
+        if data.get(key)
+    }
+    info = {
+        "source": connection_id, "target": data.get("target", DEFAULT_CONNECTION_ID), "database": db,
+        "target_database": data.get("target_database"), "options": options,
+    }
+    run_id = get_state_store().create_run(info, tables)
+    with _resume_lock:
+        job = submit_copy(run_id, entry, target, db, tables, data.get("target_database"), options)
+    return jsonify({"status": "success", "job_id": job.id, "run_id": run_id, "job": job.to_dict()}), 202
+
+
+# makes checking that a run has no active job and submitting its next one a single step
+_resume_lock = threading.Lock()
+
+
+def submit_copy(run_id, entry, target, db, tables, target_database, options):
+    """Queue the copy job of a run and record it on the run; the caller holds _resume_lock."""
+    options = dict(options)
+    # every chunk worker holds a pooled source connection
+    options["workers"] = min(int(options.get("workers") or DEFAULT_COPY_WORKERS), entry.pool.max_size)
+    job = jobs.submit(
+        "copy", entry.server, copy_database,
+        entry.pool.borrow, target, db, tables, target_database=target_database,
+        source_key=entry.server, run_id=run_id, **options,
+    )
+    get_state_store().set_run_job(run_id, job.id)
+    return job
+
+
+@bp.route("/api/migrations/resume/<run_id>", methods=["POST"])
+def resume_copy(run_id):
+    """
+    Resume an interrupted copy run as a new job, e.g. after a restart.
+
+    Finished tables and chunks are skipped and chunks that were in flight are
+    copied again. The run's source and target connections must be connected
+    again; optional body {"source", "target"} names other connection ids.
+    Answers 409 while the run's job is still queued or running.
+    """
+    data = request.get_json(silent=True) or {}
+    store = get_state_store()
+    run = store.get_run(run_id, with_tables=True)
+    if run is None:
+        return jsonify({"status": "error", "message": "Run not found"}), 404
+    if run["status"] == RUN_SUCCEEDED:
+        return jsonify({"status": "error", "message": "Run already finished"}), 409
+    entry = connections.get(data.get("source") or run["source"])
+    target = postgres_sources.get(data.get("target") or run["target"])
+    if entry is None or target is None:
+        return jsonify({"status": "error", "message": "Source or target connection not found"}), 404
+    with _resume_lock:
+        # read again under the lock: a concurrent resume may have just submitted a job
+        job_id = store.get_run(run_id)["job_id"]
+        if job_id and jobs.is_active(job_id):
+            return jsonify({"status": "error", "message": "Run is already being copied"}), 409
+        store.set_run_status(run_id, RUN_RUNNING)
+        job = submit_copy(run_id, entry, target, run["database"], run["table_records"], run["target_database"],
+                          run["options"])
+    return jsonify({"status": "success", "job_id": job.id, "run_id": run_id, "job": job.to_dict()}), 202
+
+
+@bp.route("/api/migrations/runs", methods=["GET"])
+def list_copy_runs():
+    """Copy runs recorded in the migration state store, oldest first."""
+    return jsonify({"status": "success", "runs": get_state_store().list_runs()}), 200
+
+
+@bp.route("/api/migrations/runs/<run_id>", methods=["GET"])
+def get_copy_run(run_id):
+    """A copy run with per-table chunk progress."""
+    run = get_state_store().get_run(run_id)
+    if run is None:
+        return jsonify({"status": "error", "message": "Run not found"}), 404
+    return jsonify({"status": "success", "run": run}), 200
+
+
+@bp.route("/api/migrations/validate/<connection_id>", methods=["POST"])
+def start_validation(connection_id):
+    """
+    Queue a background comparison of copied tables between SQL Server and PostgreSQL.
+
+    Body: {"target", "database", "target_database", "tables", "schema_map"}
+    as for /api/migrations/copy, plus "workers", "chunk_rows", "leaf_rows"
+    and "fanout". Row counts and row hashes are computed per key range inside
+    both databases; the job result lists the smallest mismatched ranges.
+    """
+    data = request.get_json() or {}
+    entry = connections.get(connection_id)
+    target = postgres_sources.get(data.get("target", DEFAULT_CONNECTION_ID))
+    if entry is None or target is None:
+        return jsonify({"status": "error", "message": "Source or target connection not found"}), 404
+    try:
+        metadata = load_catalog({"connection_id": connection_id})
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    db = data.get("database")
+    if db not in metadata:
+        return jsonify({"status": "error", "message": f"Unknown database: {db}"}), 404
+    tables = select_tables(metadata[db], data.get("tables"))
+    if not tables:
+        return jsonify({"status": "error", "message": "No tables to validate"}), 400
+
+    options = {key: data[key] for key in ("schema_map", "chunk_rows", "leaf_rows", "fanout") if data.get(key)}
+    options["workers"] = min(int(data.get("workers") or DEFAULT_VALIDATION_WORKERS), entry.pool.max_size)
+    job = jobs.submit(
+        "validate", entry.server, validate_database,
+        entry.pool.borrow, target, db, tables, target_database=data.get("target_database"),
+        source_key=entry.server, **options,
+    )
+    return jsonify({"status": "success", "job_id": job.id, "job": job.to_dict()}), 202
+
+
+@bp.route("/api/migrations/status/<job_id>", methods=["GET"])
+def get_migration_status(job_id):
+    """Status and progress of a copy or validation job; includes per-table results once finished."""
+    return get_assessment_status(job_id)
+
+
+@bp.route("/api/migrations/cancel/<job_id>", methods=["POST"])
+def cancel_migration(job_id):
+    """Cancel a queued or running copy job."""
+    return cancel_assessment(job_id)
+
+
+@bp.route("/api/reports", methods=["GET"])
+def get_reports():
+    """Assessment jobs known to this worker."""
+    return jsonify({"status": "success", "reports": jobs.list()}), 200
+
+
 def allowed_file(filename):
     _, ext = os.path.splitext(filename.lower())
     return ext in ALLOWED_EXT
 
-@app.route("/inspect_rdl", methods=["POST"])
+@bp.route("/inspect_rdl", methods=["POST"])
 def inspect_rdl_route():
     """
     Inspect an uploaded RDL file and return its parsed JSON structure.
@@ -243,7 +831,108 @@ def inspect_rdl_route():
     return jsonify(result), 200
 
 
-@app.route("/inspect_rdl_by_path", methods=["GET"])
+@bp.app_errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({"error": f"Upload larger than {MAX_RDL_UPLOAD_BYTES // (1024 * 1024)} MB."}), 413
+
+
+@bp.route("/inspect_rdl_batch", methods=["POST"])
+def inspect_rdl_batch_route():
+    """
+    Inspect a whole set of RDL files in one request and stream the results.
+
+    **How it works:**
+    - Accepts multipart/form-data with one or more files in field 'files' (or 'file'):
+      .rdl files and/or .zip archives of them (only .rdl members are extracted, paths are checked)
+    - Saves the reports into /uploaded_rdls/batch_<timestamp>_<id>/
+    - Parses them with parse_rdl() across a process pool (?workers=N, default DEFAULT_RDL_WORKERS)
+    - Streams NDJSON: a "batch" record (reports, workers, skipped files), one "report" record
+      per report as it is parsed, then a "summary" record with the aggregate complexity
+
+    **Use this when:**
+    - You want to assess a whole SSRS estate instead of uploading reports one by one
+
+    **Limits** (environment variables):
+    - LIFTR_RDL_MAX_UPLOAD_MB per request, LIFTR_RDL_MAX_FILES reports per batch
+    - LIFTR_RDL_MAX_FILE_MB per report, LIFTR_RDL_MAX_EXTRACTED_MB for the contents of the archives
+    - LIFTR_RDL_MAX_WORKERS parser processes, shared by all batches
+
+    **Returns:**
+    - 200 OK with the NDJSON stream (a report that fails to parse is a "report" record with status "error")
+    - 400 if no report was uploaded or an archive is invalid
+    - 413 if a limit is exceeded
+    """
+    # checked before request.files reads the body; chunked uploads are cut off by MAX_CONTENT_LENGTH
+    if request.content_length and request.content_length > MAX_RDL_UPLOAD_BYTES:
+        return upload_too_large(None)
+    uploads = request.files.getlist("files") + request.files.getlist("file")
+    if not uploads:
+        return jsonify({"error": "No files in request. Use field name 'files'."}), 400
+    workers = max(1, min(request.args.get("workers", DEFAULT_RDL_WORKERS, type=int), MAX_RDL_WORKERS))
+
+    batch = f"batch_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    batch_dir = os.path.join(RDL_UPLOAD_DIR, batch)
+    os.makedirs(batch_dir)
+    files = []
+    skipped = []
+    extracted = 0
+    try:
+        for upload in uploads:
+            filename = secure_filename(upload.filename or "")
+            if filename.lower().endswith(".zip"):
+                # each archive gets its own folder so equal names in two archives do not collide
+                dest = os.path.join(batch_dir, os.path.splitext(filename)[0])
+                members, members_skipped, extracted = extract_rdl_archive(
+                    upload.stream, dest, reports=len(files), total=extracted)
+                prefix = os.path.splitext(filename)[0]
+                files.extend((f"{prefix}/{name}", path) for name, path in members)
+                skipped.extend({**s, "name": f"{filename}/{s['name']}"} for s in members_skipped)
+            elif allowed_file(filename):
+                path = os.path.join(batch_dir, filename)
+                if os.path.exists(path):
+                    skipped.append({"name": upload.filename, "reason": "duplicate name"})
+                    continue
+                if len(files) >= MAX_RDL_FILES:
+                    raise BatchLimitError(f"More than {MAX_RDL_FILES} reports in one batch")
+                upload.save(path)
+                if os.path.getsize(path) > MAX_RDL_FILE_BYTES:
+                    raise BatchLimitError(f"{filename} is larger than {MAX_RDL_FILE_BYTES // (1024 * 1024)} MB")
+                files.append((filename, path))
+            else:
+                skipped.append({"name": upload.filename, "reason": "not an .rdl or .zip file"})
+    except BatchLimitError as e:
+        remove_batch(batch_dir)
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        remove_batch(batch_dir)
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        remove_batch(batch_dir)
+        return jsonify({"error": "Failed to save uploaded files.", "details": str(e)}), 500
+    if not files:
+        remove_batch(batch_dir)
+        return jsonify({"error": "No .rdl files in the upload.", "skipped": skipped}), 400
+
+    # paths relative to the upload dir, so a report can be parsed again with /inspect_rdl_by_path
+    paths = {name: os.path.relpath(path, RDL_UPLOAD_DIR) for name, path in files}
+    logger.info("🔎 Inspecting %s reports of %s with %s workers", len(files), batch, workers)
+
+    def generate():
+        summary = BatchSummary()
+        yield json.dumps({"type": "batch", "batch": batch, "reports": len(files),
+                          "workers": min(workers, len(files)), "skipped": skipped}) + "\n"
+        try:
+            for outcome in parse_reports(files, workers):
+                summary.add(outcome)
+                yield json.dumps({"type": "report", "path": paths[outcome["report"]], **outcome}, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+        yield json.dumps({"type": "summary", **summary.to_dict()}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@bp.route("/inspect_rdl_by_path", methods=["GET"])
 def inspect_rdl_by_path_route():
     """
     Inspect an existing RDL file from the server by providing its file path.
@@ -280,5 +969,29 @@ def inspect_rdl_by_path_route():
     return jsonify(result), 200
 
 
+def create_app():
+    """
+    Build the Flask app (found by `flask --app main run`; WSGI servers use `main:create_app()`).
+
+    Database drivers are not imported here; each one is loaded by its extractor
+    the first time a connection of that type is opened. Importing this module
+    has no side effects: the job pool, connection registries and caches are
+    created here, one set per app.
+    """
+    # LIFTR_LOG_LEVEL=DEBUG also logs every database/table the extractors visit
+    logging.basicConfig(
+        level=os.environ.get("LIFTR_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    app = Flask(__name__)
+    # no request body may exceed the RDL upload limit, whether or not it declares its length
+    app.config["MAX_CONTENT_LENGTH"] = MAX_RDL_UPLOAD_BYTES
+    CORS(app, supports_credentials=True)
+    app.extensions["liftr"] = AppState()
+    os.makedirs(RDL_UPLOAD_DIR, exist_ok=True)
+    app.register_blueprint(bp)
+    return app
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from services.metrics import trace
+
+logger = logging.getLogger(__name__)
+
+JOB_RESULTS_DIR = os.environ.get(
+    "LIFTR_JOB_RESULTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "job_results"),
+)
+# Worker threads shared by all jobs
+DEFAULT_JOB_WORKERS = int(os.environ.get("LIFTR_JOB_WORKERS", "4"))
+# Jobs allowed to run at the same time against one source server
+DEFAULT_PER_SOURCE_LIMIT = int(os.environ.get("LIFTR_JOBS_PER_SOURCE", "1"))
+# Finished jobs kept in memory; older ones are still served from their result files
+DEFAULT_KEEP_FINISHED = int(os.environ.get("LIFTR_JOBS_KEEP_FINISHED", "1000"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled."""
+
+
+class JobContext:
+    """Handle passed to a running job function to report progress and observe cancellation."""
+
+    def __init__(self, job):
+        self._job = job
+
+    @property
+    def job_id(self):
+        return self._job.id
+
+    @property
+    def cancelled(self):
+        return self._job.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self._job.id)
+
+    def report(self, progress, message=None):
+        """Set progress (0-100) and an optional status message."""
+        self._job.progress = max(0.0, min(100.0, float(progress)))
+        if message is not None:
+            self._job.message = message
+
+
+class Job:
+    def __init__(self, kind, source, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.source = source
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = None
+        self.cancel_event = threading.Event()
+        # serializes writes of the job's file; once the final state is written, nothing overwrites it
+        self.persist_lock = threading.Lock()
+        self.persisted_final = False
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "source": self.source,
+            "status": self.status,
+            "progress": round(self.progress, 1),
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": self.timings,
+        }
+
+
+class JobManager:
+    """
+    Runs long jobs (metadata extraction, assessments) off the request thread.
+
+    Jobs share one bounded thread pool, but at most `per_source_limit` jobs run
+    against the same source server at a time; the rest wait in a per-source
+    queue without holding a worker thread. A job function is called as
+    fn(ctx, *args, **kwargs) with a JobContext and returns a JSON-serializable
+    result, which is written to <results_dir>/<job id>.json together with the
+    final job status, so results survive a restart of the worker. Timing spans
+    recorded while the job runs are kept as its "timings" breakdown. Only the
+    last `keep_finished` finished jobs stay in memory (and in list()); older
+    ones are read back from their files by get() and result().
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, per_source_limit=DEFAULT_PER_SOURCE_LIMIT,
+                 results_dir=JOB_RESULTS_DIR, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.per_source_limit = max(1, per_source_limit)
+        self.keep_finished = max(0, keep_finished)
+        self.results_dir = results_dir
+        os.makedirs(results_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="liftr-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._running = {}   # source -> number of running jobs
+        self._pending = {}   # source -> deque of queued jobs
+        self._finished = deque()  # ids of finished jobs still in _jobs, oldest first
+
+    # ---------- Submitting / scheduling ----------
+    def submit(self, kind, source, fn, *args, **kwargs):
+        job = Job(kind, source, fn, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._running.get(source, 0) < self.per_source_limit:
+                self._start(job)
+            else:
+                self._pending.setdefault(source, deque()).append(job)
+                job.message = "Waiting for another job on this source to finish"
+        self._persist(job)
+        return job
+
+    def _start(self, job):
+        # caller holds self._lock
+        self._running[job.source] = self._running.get(job.source, 0) + 1
+        self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = datetime.now().isoformat()
+        job.message = "Running"
+        self._persist(job)
+        result = None
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled(job.id)
+            # spans recorded by the job function (extraction phases) become the job's timing breakdown
+            with trace() as timings:
+                try:
+                    result = job.fn(JobContext(job), *job.args, **job.kwargs)
+                finally:
+                    job.timings = timings.to_dict()
+            job.status = SUCCEEDED
+            job.progress = 100.0
+            job.message = "Completed"
+        except JobCancelled:
+            job.status = CANCELLED
+            job.message = "Cancelled"
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            job.message = "Failed"
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            self._persist(job, result, final=True)
+            # release the source slot and start the next job waiting for it
+            with self._lock:
+                self._forget_finished(job)
+                self._running[job.source] -= 1
+                pending = self._pending.get(job.source)
+                while pending:
+                    nxt = pending.popleft()
+                    if nxt.cancel_event.is_set():
+                        continue
+                    self._start(nxt)
+                    break
+
+    def _forget_finished(self, job):
+        # caller holds self._lock
+        self._finished.append(job.id)
+        while len(self._finished) > self.keep_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    # ---------- Queries / control ----------
+    def get(self, job_id):
+        """Job status dict, from memory or from its persisted file; None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        stored = self._load(job_id)
+        return stored["job"] if stored else None
+
+    def is_active(self, job_id):
+        """True while a job of this manager is queued or running; jobs of an earlier process never are."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job is not None and job.status in (QUEUED, RUNNING)
+
+    def result(self, job_id):
+        """Persisted result of a finished job, or None."""
+        stored = self._load(job_id)
+        return stored.get("result") if stored else None
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop immediately, running ones at their next check."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job.cancel_event.set()
+            pending = self._pending.get(job.source)
+            if job.status == QUEUED and pending and job in pending:
+                pending.remove(job)
+                job.status = CANCELLED
+                job.message = "Cancelled"
+                job.finished_at = datetime.now().isoformat()
+                self._forget_finished(job)
+                final = True
+            else:
+                job.message = "Cancelling"
+                final = False
+        self._persist(job, final=final)
+        return True
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status not in FINISHED:
+                    job.cancel_event.set()
+        self._executor.shutdown(wait=wait)
+
+    # ---------- Persistence ----------
+    def _path(self, job_id):
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    def _persist(self, job, result=None, final=False):
+        """
+        Write the job's file atomically (a unique temp file, then os.replace).
+
+        Writes of one job are serialized by its persist_lock, and a status
+        update that loses the race against the final write (e.g. cancel()
+        while the job finishes) is dropped instead of replacing the result.
+        """
+        with job.persist_lock:
+            if job.persisted_final:
+                return
+            data = {"job": job.to_dict()}
+            if result is not None:
+                data["result"] = result
+            tmp = None
+            try:
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.results_dir,
+                                                 prefix=f"{job.id}.", suffix=".tmp", delete=False) as f:
+                    tmp = f.name
+                    json.dump(data, f, default=str)
+                os.replace(tmp, self._path(job.id))
+                job.persisted_final = final
+            except Exception as e:
+                logger.warning("⚠️ Could not persist job %s: %s", job.id, e)
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def _load(self, job_id):
+        # job ids are uuid hex; anything else cannot name a result file
+        if not job_id or not all(ch in "0123456789abcdef" for ch in job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
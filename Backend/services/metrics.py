@@ -0,0 +1,168 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and timing summaries rendered in the
+    Prometheus text exposition format by /metrics.
+
+    Series are identified by a metric name plus a sorted tuple of label pairs;
+    labels should stay low-cardinality (extractor, phase), per-database detail
+    belongs in a Trace instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}      # name -> (type, help text)
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}    # (name, labels) -> value
+        self._summaries = {}  # (name, labels) -> [count, sum]
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def clear_gauge(self, name):
+        """Drop every series of a gauge, e.g. before re-setting per-connection values."""
+        with self._lock:
+            for key in [key for key in self._gauges if key[0] == name]:
+                del self._gauges[key]
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries.setdefault(key, [0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+
+    def render(self):
+        with self._lock:
+            series = {}
+            for (name, labels), value in self._counters.items():
+                series.setdefault(name, []).append((name, labels, value))
+            for (name, labels), value in self._gauges.items():
+                series.setdefault(name, []).append((name, labels, value))
+            for (name, labels), (count, total) in self._summaries.items():
+                series.setdefault(name, []).append((f"{name}_sum", labels, total))
+                series[name].append((f"{name}_count", labels, count))
+
+        lines = []
+        for name in sorted(series):
+            kind, text = self._help.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in sorted(series[name], key=lambda s: (s[1], s[0])):
+                lines.append(f"{sample}{_format_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("liftr_extraction_phase_seconds", "summary", "Time spent in each metadata extraction phase.")
+metrics.describe("liftr_extraction_rows_total", "counter", "Catalog rows read per extraction phase.")
+metrics.describe("liftr_extraction_errors_total", "counter", "Failed extraction phases.")
+
+
+class Trace:
+    """Timing breakdown of one extraction (request or job), per phase and per database."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.phases = {}     # phase -> {"count", "seconds", "rows", "errors"}
+        self.databases = {}  # database -> {phase: seconds}
+
+    def add(self, phase, database, seconds, rows, failed):
+        with self._lock:
+            entry = self.phases.setdefault(phase, {"count": 0, "seconds": 0.0, "rows": 0, "errors": 0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["rows"] += rows
+            entry["errors"] += int(failed)
+            if database is not None:
+                per_db = self.databases.setdefault(database, {})
+                per_db[phase] = per_db.get(phase, 0.0) + seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self._start, 4),
+                "phases": {
+                    phase: {**entry, "seconds": round(entry["seconds"], 4)}
+                    for phase, entry in self.phases.items()
+                },
+                "databases": {
+                    db: {phase: round(seconds, 4) for phase, seconds in phases.items()}
+                    for db, phases in self.databases.items()
+                },
+            }
+
+
+_current_trace = contextvars.ContextVar("liftr_trace", default=None)
+
+
+@contextmanager
+def trace():
+    """Collect every span recorded in this context (and contexts copied from it) into a new Trace."""
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+class Span:
+    __slots__ = ("phase", "database", "rows", "error")
+
+    def __init__(self, phase, database):
+        self.phase = phase
+        self.database = database
+        self.rows = 0
+        self.error = None
+
+
+@contextmanager
+def span(phase, database=None, extractor="sqlserver"):
+    """
+    Time one extraction phase. The caller sets `rows` on the yielded Span and
+    may set `error` for failures it handles itself; exceptions leaving the
+    block are counted as errors too.
+    """
+    s = Span(phase, database)
+    start = time.perf_counter()
+    try:
+        yield s
+    except Exception as e:
+        s.error = s.error or str(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe("liftr_extraction_phase_seconds", elapsed, extractor=extractor, phase=phase)
+        if s.rows:
+            metrics.inc("liftr_extraction_rows_total", s.rows, extractor=extractor, phase=phase)
+        if s.error:
+            metrics.inc("liftr_extraction_errors_total", extractor=extractor, phase=phase)
+        current = _current_trace.get()
+        if current is not None:
+            current.add(phase, database, elapsed, s.rows, bool(s.error))
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a connection's latest response is served without asking the source again
+DEFAULT_TTL = int(os.environ.get("LIFTR_RESPONSE_CACHE_TTL", "300"))
+# Memory budget for cached response bodies, least recently used evicted first
+DEFAULT_MAX_BYTES = int(os.environ.get("LIFTR_RESPONSE_CACHE_MB", "256")) * 1024 * 1024
+
+
+class CachedResponse:
+    def __init__(self, connection_id, mode, version, body):
+        self.connection_id = connection_id
+        self.mode = mode
+        self.version = version
+        self.body = body
+        # weak validator of the catalog rather than of the body: the body also carries the
+        # extraction's timings, which differ between two extractions of the same catalog
+        key = json.dumps([connection_id, mode, version])
+        self.etag = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        self.created = time.monotonic()
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    def payload(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """
+    Serialized catalog responses keyed by (connection id, extraction mode,
+    catalog version); the mode keeps responses whose payloads differ (e.g.
+    ?mode=incremental's refresh summary) apart. The default mode is None.
+
+    The catalog version is the snapshot id of the extracted metadata, so an
+    entry never goes stale by itself; the TTL only bounds how long a connection's
+    current version is trusted before the next request extracts again. Bodies
+    are kept serialized so they can be sent (or answered with 304) without
+    re-encoding, and the total size stays under `max_bytes`.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (connection id, mode, version) -> CachedResponse, LRU first
+        self._current = {}             # (connection id, mode) -> (version, time it was confirmed)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def current(self, connection_id, mode=None):
+        """Entry for the connection's current version if it was confirmed within the TTL."""
+        with self._lock:
+            version, confirmed = self._current.get((connection_id, mode), (None, 0))
+            entry = self._entries.get((connection_id, mode, version))
+            if entry is None or time.monotonic() - confirmed > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((connection_id, mode, version))
+            self.hits += 1
+            return entry
+
+    def get(self, connection_id, version, mode=None):
+        """Entry for a specific catalog version, regardless of the TTL."""
+        with self._lock:
+            entry = self._entries.get((connection_id, mode, version))
+            if entry is not None:
+                self._entries.move_to_end((connection_id, mode, version))
+            return entry
+
+    def put(self, connection_id, version, payload, current=True, mode=None):
+        """
+        Serialize and cache a response; with current=True it also becomes the
+        version served for the connection until the TTL runs out. Bodies larger
+        than the whole budget are returned but not kept.
+        """
+        entry = CachedResponse(connection_id, mode, version, json.dumps(payload, default=str).encode("utf-8"))
+        with self._lock:
+            key = (connection_id, mode, version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            if entry.size <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += entry.size
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted.size
+            if current:
+                self._current[(connection_id, mode)] = (version, time.monotonic())
+        return entry
+
+    def invalidate(self, connection_id=None):
+        """Drop every entry of a connection (or of all connections)."""
+        with self._lock:
+            for key in [k for k in self._entries if connection_id is None or k[0] == connection_id]:
+                self._size -= self._entries.pop(key).size
+            for key in [k for k in self._current if connection_id is None or k[0] == connection_id]:
+                del self._current[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# tests import the app's packages (connection, services) the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
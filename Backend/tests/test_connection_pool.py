@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from connection import Remote_sql_server
+from connection.connection_manager import ConnectionPool, PoolExhausted
+
+
+class FakeConnection:
+    """Driver connection whose validation query fails once it is marked broken."""
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+        self.queries = []
+
+    def cursor(self):
+        if self.closed:
+            raise RuntimeError("connection is closed")
+        return self
+
+    def execute(self, sql, *params):
+        if self.broken:
+            raise RuntimeError("communication link failure")
+        self.queries.append(sql)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+def test_borrow_reuses_the_released_connection():
+    pool = ConnectionPool(FakeConnection, max_size=2)
+    first = pool.borrow()
+    raw = first._raw
+    first.close()
+    first.close()  # a second close does not release it twice
+    assert pool.stats() == {"max_size": 2, "in_use": 0, "idle": 1}
+    again = pool.borrow()
+    assert again._raw is raw and not raw.closed
+    # an idle connection is validated before it is handed out again
+    assert raw.queries == ["SELECT 1"]
+    again.close()
+
+
+def test_borrow_replaces_a_connection_that_fails_validation():
+    pool = ConnectionPool(FakeConnection)
+    conn = pool.borrow()
+    stale = conn._raw
+    conn.close()
+    stale.broken = True
+    fresh = pool.borrow()
+    assert fresh._raw is not stale and stale.closed
+    assert pool.stats()["in_use"] == 1
+
+
+def test_discard_closes_instead_of_pooling():
+    pool = ConnectionPool(FakeConnection)
+    conn = pool.borrow()
+    conn.discard()
+    conn.close()
+    assert conn._raw.closed
+    assert pool.stats() == {"max_size": 8, "in_use": 0, "idle": 0}
+
+
+def test_connection_context_discards_on_error():
+    pool = ConnectionPool(FakeConnection)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("query failed")
+    assert conn._raw.closed and pool.stats()["idle"] == 0
+    with pool.connection() as conn:
+        pass
+    assert not conn._raw.closed and pool.stats()["idle"] == 1
+
+
+def test_evict_idle_closes_expired_connections():
+    pool = ConnectionPool(FakeConnection)
+    conn = pool.borrow()
+    conn.close()
+    assert pool.evict_idle() == 0
+    pool.idle_timeout = -1
+    assert pool.evict_idle() == 1
+    assert conn._raw.closed and pool.stats()["idle"] == 0
+
+
+def test_borrow_waits_then_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, max_size=1)
+    held = pool.borrow()
+    with pytest.raises(PoolExhausted):
+        pool.borrow(timeout=0.01)
+    threading.Timer(0.05, held.close).start()
+    assert pool.borrow(timeout=5)._raw is held._raw
+
+
+def test_closed_pool_closes_returned_connections():
+    pool = ConnectionPool(FakeConnection)
+    idle = pool.borrow()
+    in_use = pool.borrow()
+    idle.close()
+    pool.close()
+    assert idle._raw.closed and not in_use._raw.closed
+    in_use.close()
+    assert in_use._raw.closed
+    with pytest.raises(RuntimeError):
+        pool.borrow()
+
+
+def test_parallel_extraction_discards_a_broken_worker_connection(monkeypatch):
+    created = []
+
+    def connect():
+        created.append(FakeConnection())
+        return created[-1]
+
+    pool = ConnectionPool(connect, max_size=2)
+
+    def read_database(cursor, db, db_meta):
+        if db == "broken":
+            raise RuntimeError("communication link failure")
+        db_meta["tables"] = []
+
+    monkeypatch.setattr(Remote_sql_server, "list_databases", lambda cursor: ["a", "broken", "b"])
+    monkeypatch.setattr(Remote_sql_server, "fetch_database_metadata", read_database)
+    monkeypatch.setattr(Remote_sql_server, "export_metadata", lambda metadata, namespace: None)
+    metadata, errors = Remote_sql_server.fetch_sql_server_metadata_parallel(pool.borrow, max_workers=1)
+    assert metadata == {"a": {"tables": []}, "broken": {}, "b": {"tables": []}}
+    assert errors == {"broken": "communication link failure"}
+    # the one worker's connection failed on "broken": it was closed rather than returned to the pool,
+    # and "b" was read on a new one
+    assert [raw.closed for raw in created] == [True, False]
+    assert pool.stats() == {"max_size": 2, "in_use": 0, "idle": 1}
@@ -0,0 +1,146 @@
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from connection.data_copy import (
+    ChunkScheduler,
+    chunk_where,
+    encode_copy_rows,
+    range_replaceable,
+    target_chunk_where,
+)
+from connection.migration_state import CHUNK_DONE, CHUNK_STARTED
+
+
+def test_encode_copy_rows_escapes_text_and_marks_nulls():
+    rows = [("a\tb\\c\nd\re", None, 42, 1.5, True, False)]
+    assert encode_copy_rows(rows) == b"a\\tb\\\\c\\nd\\re\t\\N\t42\t1.5\tt\tf\n"
+
+
+def test_encode_copy_rows_types():
+    key = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    rows = [
+        (Decimal("10.50"), b"\x00\xff", date(2025, 1, 2), datetime(2025, 1, 2, 3, 4, 5, 7000), time(1, 2, 3), key),
+        ("välue", None, None, None, None, None),
+    ]
+    assert encode_copy_rows(rows) == (
+        "10.50\t\\\\x00ff\t2025-01-02\t2025-01-02T03:04:05.007000\t01:02:03\t12345678-1234-5678-1234-567812345678\n"
+        "välue\t\\N\t\\N\t\\N\t\\N\t\\N\n"
+    ).encode("utf-8")
+
+
+def test_encode_copy_rows_empty_batch():
+    assert encode_copy_rows([]) == b""
+
+
+def test_chunk_where_bounds():
+    chunk = {"lower": 10, "upper": 20, "lower_inclusive": True, "upper_inclusive": False}
+    assert chunk_where("Id", chunk) == ("[Id] >= ? AND [Id] < ?", (10, 20))
+    assert target_chunk_where("Id", chunk) == ("id >= %s AND id < %s", (10, 20))
+    assert target_chunk_where("Id", chunk, lowercase=False) == ('"Id" >= %s AND "Id" < %s', (10, 20))
+
+
+def test_chunk_where_open_ends_and_nulls():
+    assert chunk_where("k", {"lower": 5, "upper": None, "lower_inclusive": False}) == ("[k] > ?", (5,))
+    assert chunk_where("k", {"lower": None, "upper": 5, "upper_inclusive": True, "include_null": True}) == (
+        "([k] <= ? OR [k] IS NULL)", (5,))
+    # a chunk without bounds covers the whole table, NULL keys included
+    assert chunk_where("k", {"include_null": True}) == (None, ())
+    assert chunk_where(None, {"lower": 1}) == (None, ())
+    assert target_chunk_where(None, {"lower": 1}) == (None, ())
+
+
+def test_range_replaceable():
+    assert range_replaceable({"kind": "single", "column": None})
+    assert range_replaceable({"kind": "key_range", "column": "id", "type": "int"})
+    assert range_replaceable({"kind": "key_slices", "column": "d", "type": "datetime2"})
+    assert range_replaceable({"kind": "partitions", "column": "d", "type": "date"})
+    assert not range_replaceable({"kind": "key_slices", "column": "code", "type": "nvarchar"})
+    assert not range_replaceable({"kind": "key_slices", "column": "id", "type": "uniqueidentifier"})
+    # plans saved before they recorded the key type
+    assert not range_replaceable({"kind": "key_slices", "column": "code"})
+
+
+def _drain(scheduler):
+    chunks = []
+    while True:
+        chunk = scheduler.next()
+        if chunk is None:
+            return chunks
+        chunks.append(chunk)
+
+
+def test_scheduler_cuts_key_range_into_contiguous_chunks():
+    plan = {"kind": "key_range", "column": "id", "low": 1, "high": 100, "step": 25}
+    chunks = _drain(ChunkScheduler(plan))
+    assert [(c["id"], c["lower"], c["upper"]) for c in chunks] == [(0, 1, 26), (1, 26, 51), (2, 51, 76), (3, 76, None)]
+    assert all(c["lower_inclusive"] and not c["upper_inclusive"] for c in chunks)
+
+
+def test_scheduler_calls_on_start_in_order():
+    started = []
+    plan = {"kind": "key_range", "column": "id", "low": 0, "high": 9, "step": 5}
+    chunks = _drain(ChunkScheduler(plan, on_start=started.append))
+    assert started == chunks
+
+
+def test_scheduler_resume_redoes_unfinished_key_ranges_first():
+    plan = {"kind": "key_range", "column": "id", "low": 0, "high": 99, "step": 10}
+    resume = [
+        {"id": 0, "lower": 0, "upper": 10, "lower_inclusive": True, "upper_inclusive": False, "status": CHUNK_DONE},
+        {"id": 1, "lower": 10, "upper": 20, "lower_inclusive": True, "upper_inclusive": False,
+         "status": CHUNK_STARTED},
+        {"id": 2, "lower": 20, "upper": 30, "lower_inclusive": True, "upper_inclusive": False, "status": CHUNK_DONE},
+    ]
+    chunks = _drain(ChunkScheduler(plan, resume=resume))
+    assert chunks[0] == {"id": 1, "lower": 10, "upper": 20, "lower_inclusive": True, "upper_inclusive": False,
+                         "replace": True}
+    # new ranges continue after the highest key taken, with new ids
+    assert (chunks[1]["id"], chunks[1]["lower"]) == (3, 30)
+    assert not any(c.get("replace") for c in chunks[1:])
+    assert chunks[-1]["upper"] is None
+    assert [c["lower"] for c in chunks[1:]] == list(range(30, 100, 10))
+
+
+def test_scheduler_resume_after_open_ended_range_only_redoes():
+    plan = {"kind": "key_range", "column": "id", "low": 0, "high": 99, "step": 50}
+    resume = [
+        {"id": 0, "lower": 0, "upper": 50, "status": CHUNK_DONE},
+        {"id": 1, "lower": 50, "upper": None, "status": CHUNK_STARTED},
+    ]
+    chunks = _drain(ChunkScheduler(plan, resume=resume))
+    assert [(c["id"], c["lower"], c["upper"], c["replace"]) for c in chunks] == [(1, 50, None, True)]
+
+
+def test_scheduler_resume_planned_chunks():
+    plan = {"kind": "key_slices", "column": "d", "type": "date", "chunks": [
+        {"lower": None, "upper": 1, "lower_inclusive": False, "upper_inclusive": True},
+        {"lower": 1, "upper": 2, "lower_inclusive": False, "upper_inclusive": True},
+        {"lower": 2, "upper": None, "lower_inclusive": False, "upper_inclusive": True},
+    ]}
+    resume = [
+        {"id": 0, "lower": None, "upper": 1, "lower_inclusive": False, "upper_inclusive": True, "status": CHUNK_DONE},
+        {"id": 1, "lower": 1, "upper": 2, "lower_inclusive": False, "upper_inclusive": True,
+         "status": CHUNK_STARTED},
+    ]
+    chunks = _drain(ChunkScheduler(plan, resume=resume))
+    assert [(c["id"], c.get("replace", False)) for c in chunks] == [(1, True), (2, False)]
+    assert (chunks[1]["lower"], chunks[1]["upper"]) == (2, None)
+
+
+def test_scheduler_stop():
+    scheduler = ChunkScheduler({"kind": "key_range", "column": "id", "low": 0, "high": 99, "step": 10})
+    assert scheduler.next() is not None
+    scheduler.stop()
+    assert scheduler.next() is None
+
+
+def test_scheduler_record_adapts_step():
+    plan = {"kind": "key_range", "column": "id", "low": 0, "high": 10 ** 9, "step": 1000}
+    scheduler = ChunkScheduler(plan, target_seconds=1.0)
+    chunk = scheduler.next()
+    # 1000 rows in 0.1s over 1000 keys: a 1s chunk holds 10000 keys, but the step grows at most 4x at once
+    scheduler.record(chunk, rows=1000, seconds=0.1)
+    following = scheduler.next()
+    assert following["lower"] == chunk["upper"]
+    assert following["upper"] - following["lower"] == 4000
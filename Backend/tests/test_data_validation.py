@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from connection.data_validation import TableValidator, sql_server_row_text
+
+TABLE = {"schema": "dbo", "name": "Orders", "columns": [
+    {"column_name": "Id", "data_type": "int"},
+    {"column_name": "Created", "data_type": "datetime"},
+]}
+
+
+class FakeCursor:
+    """Answers the bounds query with `bounds` and the slices query with `uppers`."""
+
+    def __init__(self, bounds=None, uppers=()):
+        self.bounds = bounds
+        self.uppers = uppers
+        self.executed = []
+
+    def execute(self, sql, *params):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return None if self.bounds is None else SimpleNamespace(low=self.bounds[0], high=self.bounds[1])
+
+    def fetchall(self):
+        return [SimpleNamespace(upper=u) for u in self.uppers]
+
+
+def _validator(column="Id", integer_key=True):
+    return TableValidator("Shop", TABLE, column, integer_key)
+
+
+def _bounds(children):
+    return [(c["lower"], c["upper"], c["lower_inclusive"], c["upper_inclusive"]) for c in children]
+
+
+def test_split_integer_key_cuts_even_half_open_ranges():
+    chunk = {"lower": 1, "upper": None, "lower_inclusive": True, "upper_inclusive": False}
+    children = _validator().split(FakeCursor(bounds=(1, 100)), chunk, fanout=4)
+    assert _bounds(children) == [
+        (1, 26, True, False),
+        (26, 51, True, False),
+        (51, 76, True, False),
+        (76, None, True, False),
+    ]
+
+
+def test_split_integer_key_keeps_parent_bounds_and_nulls():
+    chunk = {"lower": 10, "upper": 20, "lower_inclusive": False, "upper_inclusive": True, "include_null": True}
+    cursor = FakeCursor(bounds=(11, 20))
+    children = _validator().split(cursor, chunk, fanout=2)
+    assert _bounds(children) == [(10, 16, False, False), (16, 20, True, True)]
+    assert children[0]["include_null"] and "include_null" not in children[1]
+    # the bounds are read without the NULL keys, which only the first child carries
+    sql, params = cursor.executed[0]
+    assert "IS NULL" not in sql and params == (10, 20)
+
+
+def test_split_slices_key_uses_distinct_uppers():
+    chunk = {"lower": None, "upper": None, "include_null": True}
+    cursor = FakeCursor(uppers=["b", "b", "m", "z"])
+    children = TableValidator("Shop", TABLE, "Code", False).split(cursor, chunk, fanout=4)
+    assert _bounds(children) == [(None, "b", True, True), ("b", "m", False, True), ("m", None, False, None)]
+    assert children[0]["include_null"]
+    assert cursor.executed[0][1] == (4,)
+
+
+def test_split_refuses_what_cannot_be_cut():
+    chunk = {"lower": 1, "upper": 5}
+    assert TableValidator("Shop", TABLE, None, False).split(FakeCursor(bounds=(1, 5)), chunk) == []
+    assert _validator().split(FakeCursor(bounds=None), chunk) == []
+    assert _validator().split(FakeCursor(bounds=(None, None)), chunk) == []
+    assert _validator().split(FakeCursor(bounds=(3, 3)), chunk) == []
+    assert _validator("Code", False).split(FakeCursor(uppers=["a"]), chunk) == []
+
+
+def test_sql_server_row_text_renders_datetime_to_the_millisecond():
+    text = sql_server_row_text([{"column_name": "Created", "data_type": "datetime"}])
+    assert text == "ISNULL(CONVERT(VARCHAR(23), [Created], 121), CHAR(30))"
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from connection.Remote_sql_server import connect_sql_server
+from connection.extractors import build_sql_server_conn_str
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_library_modules_import_without_flask_or_drivers():
+    # a fresh interpreter, since other tests have imported flask already
+    code = ("import sys; import connection.Remote_sql_server, connection.extractors, connection.postgres; "
+            "print(sorted(m for m in ('flask', 'pyodbc', 'psycopg2') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("data, message", [
+    ({}, "Server name is required"),
+    ({"server": "sql01"}, "Username and password required"),
+])
+def test_connect_sql_server_rejects_missing_fields(data, message):
+    with pytest.raises(ValueError, match=message):
+        connect_sql_server(data)
+
+
+def test_build_sql_server_conn_str():
+    assert build_sql_server_conn_str({"server": "sql01", "username": "sa", "password": "pw"}) == \
+        "DRIVER={ODBC Driver 18 for SQL Server};SERVER=sql01;UID=sa;PWD=pw;Encrypt=no;"
+    assert build_sql_server_conn_str({"server": "sql01", "authType": "yes"}) == \
+        "DRIVER={ODBC Driver 18 for SQL Server};SERVER=sql01;Trusted_Connection=yes;"
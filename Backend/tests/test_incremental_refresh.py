@@ -0,0 +1,27 @@
+import pytest
+
+from connection.catalog import Catalog
+from connection.incremental_refresh import refresh_database_metadata
+
+
+class ShortBatchCursor:
+    """Cursor of a batch that stopped after `result_sets` empty result sets."""
+
+    def __init__(self, result_sets):
+        self.result_sets = result_sets
+
+    def execute(self, sql, *params):
+        pass
+
+    def fetchall(self):
+        return []
+
+    def nextset(self):
+        self.result_sets -= 1
+        return self.result_sets > 0
+
+
+@pytest.mark.parametrize("result_sets, missing", [(1, "columns"), (2, "foreign_keys")])
+def test_short_batch_raises(result_sets, missing):
+    with pytest.raises(RuntimeError, match=f"no result set for {missing}"):
+        refresh_database_metadata(ShortBatchCursor(result_sets), "Shop", Catalog(), None)
@@ -0,0 +1,65 @@
+from datetime import datetime
+from decimal import Decimal
+
+from connection.data_copy import ChunkScheduler
+from connection.migration_state import CHUNK_DONE, CHUNK_STARTED, MigrationStateStore
+
+PLAN = {"kind": "key_slices", "column": "Created", "type": "datetime2", "chunks": [
+    {"lower": None, "upper": datetime(2025, 1, 1), "lower_inclusive": False, "upper_inclusive": True},
+    {"lower": datetime(2025, 1, 1), "upper": datetime(2025, 6, 1, 12, 30, 0, 500), "lower_inclusive": False,
+     "upper_inclusive": True},
+    {"lower": datetime(2025, 6, 1, 12, 30, 0, 500), "upper": None, "lower_inclusive": False, "upper_inclusive": True},
+]}
+
+
+def _store(tmp_path):
+    return MigrationStateStore(str(tmp_path / "state.db"))
+
+
+def _copy(store, run_id, chunks, finish):
+    """Journal `chunks` as a copy would: all are started, the first `finish` are done."""
+    for i, chunk in enumerate(chunks):
+        store.chunk_started(run_id, "dbo.Orders", chunk)
+        if i < finish:
+            store.chunk_done(run_id, "dbo.Orders", chunk, {"rows": 10, "bytes": 100, "seconds": 0.1})
+
+
+def test_resume_redoes_the_started_chunk_with_its_typed_bounds(tmp_path):
+    store = _store(tmp_path)
+    run_id = store.create_run({"database": "Shop"}, [{"name": "Orders"}])
+    store.save_plan(run_id, "dbo.Orders", PLAN)
+    scheduler = ChunkScheduler(PLAN)
+    _copy(store, run_id, [scheduler.next(), scheduler.next()], finish=1)
+
+    status, plan, chunks = store.table_state(run_id, "dbo.Orders")
+    assert plan == PLAN
+    assert [chunks[i]["status"] for i in sorted(chunks)] == [CHUNK_DONE, CHUNK_STARTED]
+    resumed = ChunkScheduler(plan, resume=list(chunks.values()))
+    redo = resumed.next()
+    assert (redo["id"], redo["replace"]) == (1, True)
+    assert redo["upper"] == datetime(2025, 6, 1, 12, 30, 0, 500)
+    following = resumed.next()
+    assert (following["id"], following["lower"], following.get("replace", False)) == \
+        (2, datetime(2025, 6, 1, 12, 30, 0, 500), False)
+    assert resumed.next() is None
+
+
+def test_reset_chunks_starts_the_table_over(tmp_path):
+    store = _store(tmp_path)
+    run_id = store.create_run({"database": "Shop"}, [])
+    plan = {"kind": "key_range", "column": "Id", "type": "decimal", "low": Decimal("1"), "high": Decimal("9"),
+            "step": 5}
+    store.save_plan(run_id, "dbo.Orders", plan)
+    _copy(store, run_id, [{"id": 0, "lower": Decimal("1"), "upper": Decimal("6")}], finish=0)
+    store.reset_chunks(run_id, "dbo.Orders")
+    _, saved, chunks = store.table_state(run_id, "dbo.Orders")
+    assert chunks == {} and saved["low"] == Decimal("1")
+
+
+def test_run_records_its_job(tmp_path):
+    store = _store(tmp_path)
+    run_id = store.create_run({"database": "Shop"}, [])
+    assert store.get_run(run_id)["job_id"] is None
+    store.set_run_job(run_id, "job-1")
+    assert store.get_run(run_id)["job_id"] == "job-1"
+    assert store.get_run("missing") is None
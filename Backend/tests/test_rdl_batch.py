@@ -0,0 +1,71 @@
+import io
+import os
+import warnings
+import zipfile
+
+import pytest
+
+from connection.rdl_batch import BatchLimitError, extract_rdl_archive
+
+REPORT = b"<Report />"
+
+
+def _archive(members):
+    buffer = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # zipfile warns about the duplicate name
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name, data in members:
+                zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_unsafe_duplicate_and_other_members_are_skipped(tmp_path):
+    archive = _archive([
+        ("reports/a.rdl", REPORT),
+        ("../x.rdl", REPORT),
+        ("C:/x.rdl", REPORT),
+        ("/etc/x.rdl", REPORT),
+        ("reports/../../x.rdl", REPORT),
+        ("reports/a.rdl", REPORT),
+        ("readme.txt", b"notes"),
+    ])
+    files, skipped, total = extract_rdl_archive(archive, str(tmp_path / "batch"))
+    assert files == [("reports/a.rdl", str(tmp_path / "batch" / "reports" / "a.rdl"))]
+    assert skipped == [
+        {"name": "../x.rdl", "reason": "unsafe path"},
+        {"name": "C:/x.rdl", "reason": "unsafe path"},
+        {"name": "/etc/x.rdl", "reason": "unsafe path"},
+        {"name": "reports/../../x.rdl", "reason": "unsafe path"},
+        {"name": "reports/a.rdl", "reason": "duplicate name"},
+        {"name": "readme.txt", "reason": "not an .rdl file"},
+    ]
+    assert total == len(REPORT)
+    assert sorted(os.listdir(tmp_path)) == ["batch"]
+
+
+def test_oversized_member_raises(tmp_path):
+    archive = _archive([("big.rdl", b"x" * 1024)])
+    with pytest.raises(BatchLimitError, match="big.rdl is larger than"):
+        extract_rdl_archive(archive, str(tmp_path), max_file_bytes=1000)
+
+
+def test_extracted_total_limit_counts_earlier_files(tmp_path):
+    archive = _archive([("a.rdl", b"x" * 600), ("b.rdl", b"x" * 600)])
+    with pytest.raises(BatchLimitError, match="uncompressed"):
+        extract_rdl_archive(archive, str(tmp_path), max_total_bytes=1000)
+    archive = _archive([("a.rdl", b"x" * 600)])
+    with pytest.raises(BatchLimitError, match="uncompressed"):
+        extract_rdl_archive(archive, str(tmp_path / "next"), max_total_bytes=1000, total=500)
+
+
+def test_report_count_limit(tmp_path):
+    archive = _archive([("a.rdl", REPORT), ("b.rdl", REPORT)])
+    with pytest.raises(BatchLimitError, match="More than 2 reports"):
+        extract_rdl_archive(archive, str(tmp_path), max_files=2, reports=1)
+
+
+def test_invalid_archive(tmp_path):
+    with pytest.raises(ValueError, match="Invalid ZIP archive"):
+        extract_rdl_archive(io.BytesIO(b"not a zip"), str(tmp_path))
@@ -0,0 +1,106 @@
+"""
+parse_rdl against the results of the ElementTree parser it replaced: the
+expected dicts below are what that parser returned for the same files.
+"""
+import os
+
+from benchmarks.rdl_generator import QUERIES, generate_rdl
+from connection.rdl_inspect import parse_rdl
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _signals(joins=0, subqueries=0, cte=0, union=0, window=0, stored_proc=0):
+    return {"joins": joins, "subqueries": subqueries, "cte": cte, "union": union, "window": window,
+            "stored_proc": stored_proc}
+
+
+NESTED_SQL = (
+    "WITH recent AS (SELECT * FROM dbo.Orders WHERE OrderDate > @Start) SELECT r.*, c.Name, ROW_NUMBER() OVER "
+    "(ORDER BY r.OrderDate) AS rn FROM recent r JOIN dbo.Customers c ON c.CustomerID = r.CustomerID LEFT JOIN "
+    "(SELECT CustomerID, SUM(Total) AS Total FROM Sales.Invoices GROUP BY CustomerID) i ON i.CustomerID = "
+    "c.CustomerID UNION SELECT * FROM archive.Orders"
+)
+
+# tablixes inside a tablix's cells and row headers, a chart and a subreport in a cell, a chart whose
+# first series has no type, data sources without connection properties or without a connect string
+NESTED_EXPECTED = {
+    "summary": {"report_name": "nested_report.rdl", "data_sources": 3, "datasets": 3, "parameters": 3,
+                "cascading_parameters": 1, "tablix": 3, "charts": 2, "subreports": 1, "expressions": 7,
+                "custom_code": True, "max_group_depth": 10},
+    "data_sources": [
+        {"name": "Warehouse", "provider": "SQL", "server": "sql01.corp.local", "database": "Warehouse",
+         "connect_string": "Data Source=sql01.corp.local;Initial Catalog=Warehouse;Integrated Security=True"},
+        {"name": "Shared", "provider": None, "server": None, "database": None, "connect_string": None},
+        {"name": "NoString", "provider": "OLEDB", "server": None, "database": None, "connect_string": None},
+    ],
+    "datasets": [
+        {"dataset_name": "Orders", "data_source": "Warehouse", "command_type": "Text",
+         "sql_preview": NESTED_SQL[:300] + "...",
+         "tables": ["dbo.Orders", "recent", "dbo.Customers", "Sales.Invoices", "archive.Orders"],
+         "sql_signals": _signals(joins=2, subqueries=2, cte=1, union=1, window=1)},
+        {"dataset_name": "Balances", "data_source": "Shared", "command_type": "StoredProcedure",
+         "sql_preview": "dbo.usp_Balances", "tables": [], "sql_signals": _signals(stored_proc=1)},
+        {"dataset_name": "Shared", "data_source": None, "command_type": "Text", "sql_preview": None, "tables": [],
+         "sql_signals": _signals()},
+    ],
+    "charts": [{"name": "CellChart", "type": "Line"}, {"name": "Totals", "type": "Pie"}],
+    "parameters": [{"name": "Start", "cascading": False}, {"name": "Region", "cascading": True},
+                   {"name": "Status", "cascading": False}],
+    "tablix": ["Outer", "Inner", "Header"],
+    # a tablix's group counts include the members of the tablixes nested in it
+    "tablix_detail": [{"name": "Outer", "row_groups": 10, "col_groups": 4},
+                      {"name": "Inner", "row_groups": 2, "col_groups": 1},
+                      {"name": "Header", "row_groups": 2, "col_groups": 1}],
+    "subreports": ["Detail"],
+    "expressions": 7,
+    "uses_lookup": True,
+    "custom_code": True,
+    "complexity": {"score": 108, "bucket": "Complex"},
+}
+
+GENERATED_OPTIONS = {"data_sources": 2, "datasets": 4, "parameters": 4, "tablixes": 10, "charts": 2,
+                     "subreports": 1, "max_group_depth": 3}
+GENERATED_GROUPS = [(3, 2), (2, 2), (4, 2), (4, 2), (4, 2), (4, 2), (4, 1), (3, 2), (4, 1), (6, 3)]
+GENERATED_EXPECTED = {
+    "summary": {"report_name": "generated.rdl", "data_sources": 2, "datasets": 4, "parameters": 4,
+                "cascading_parameters": 0, "tablix": 11, "charts": 2, "subreports": 1, "expressions": 80,
+                "custom_code": True, "max_group_depth": 6},
+    "data_sources": [
+        {"name": f"DataSource{i}", "provider": "SQL", "server": f"sql{i}.corp.local", "database": f"Warehouse{i}",
+         "connect_string": f"Data Source=sql{i}.corp.local;Initial Catalog=Warehouse{i}"}
+        for i in range(2)
+    ],
+    "datasets": [
+        {"dataset_name": "DataSet0", "data_source": "DataSource0", "command_type": "StoredProcedure",
+         "sql_preview": QUERIES[3], "tables": [], "sql_signals": _signals(stored_proc=1)},
+        {"dataset_name": "DataSet1", "data_source": "DataSource1", "command_type": "StoredProcedure",
+         "sql_preview": QUERIES[3], "tables": [], "sql_signals": _signals(stored_proc=1)},
+        {"dataset_name": "DataSet2", "data_source": "DataSource0", "command_type": "Text",
+         "sql_preview": QUERIES[0], "tables": ["dbo.Orders", "dbo.Customers"], "sql_signals": _signals(joins=1)},
+        {"dataset_name": "DataSet3", "data_source": "DataSource1", "command_type": "Text",
+         "sql_preview": QUERIES[2], "tables": ["dbo.OrderLines", "dbo.Products", ""],
+         "sql_signals": _signals(subqueries=1, union=1)},
+    ],
+    "charts": [{"name": "Chart0", "type": "Column"}, {"name": "Chart1", "type": "Column"}],
+    "parameters": [{"name": f"Param{i}", "cascading": False} for i in range(4)],
+    "tablix": [f"Tablix{i}" for i in range(10)] + ["Tablix9_Inner"],
+    "tablix_detail": [{"name": f"Tablix{i}", "row_groups": rows, "col_groups": cols}
+                      for i, (rows, cols) in enumerate(GENERATED_GROUPS)]
+                     + [{"name": "Tablix9_Inner", "row_groups": 4, "col_groups": 2}],
+    "subreports": ["Subreport0"],
+    "expressions": 80,
+    "uses_lookup": True,
+    "custom_code": True,
+    "complexity": {"score": 158, "bucket": "Complex"},
+}
+
+
+def test_parse_rdl_nested_items():
+    assert parse_rdl(os.path.join(FIXTURES, "nested_report.rdl")) == NESTED_EXPECTED
+
+
+def test_parse_rdl_generated_report(tmp_path):
+    path = tmp_path / "generated.rdl"
+    generate_rdl(str(path), **GENERATED_OPTIONS)
+    assert parse_rdl(str(path)) == GENERATED_EXPECTED
@@ -0,0 +1,60 @@
+import pytest
+
+import main
+from connection import snapshot_store
+from connection.snapshot_store import SnapshotStore
+from services.response_cache import ResponseCache
+
+METADATA = {"Shop": {"tables": [{"schema": "dbo", "name": "Orders", "columns": [{"column_name": "Id"}]}]}}
+
+
+class FakeConnection:
+    def cursor(self):
+        return self
+
+    def execute(self, sql, *params):
+        pass
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    app = main.create_app()
+    extractions = []
+
+    def fetch(conn, namespace=None):
+        extractions.append(namespace)
+        return METADATA
+
+    monkeypatch.setattr(main, "fetch_sql_server_metadata_func", fetch)
+    monkeypatch.setitem(snapshot_store._stores, "shop", SnapshotStore(str(tmp_path), "shop"))
+    with app.app_context():
+        main.connections.register("shop", FakeConnection)
+    client = app.test_client()
+    client.extractions = extractions
+    return client
+
+
+def test_etag_survives_a_new_extraction_of_the_same_catalog(client):
+    first = client.get("/fetch_sql_server_metadata?connection_id=shop")
+    assert first.status_code == 200 and first.headers["ETag"].startswith("W/")
+    # ?refresh=1 extracts again: new timings in the body, same catalog
+    second = client.get("/fetch_sql_server_metadata?connection_id=shop&refresh=1",
+                        headers={"If-None-Match": first.headers["ETag"]})
+    assert client.extractions == ["shop", "shop"]
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_etag_differs_by_mode_and_version():
+    cache = ResponseCache()
+    a = cache.put("shop", "v1", {"timings": 1})
+    assert cache.put("shop", "v1", {"timings": 2}).etag == a.etag
+    assert cache.put("shop", "v2", {}).etag != a.etag
+    assert cache.put("shop", "v1", {}, mode="incremental").etag != a.etag
+    assert cache.put("other", "v1", {}).etag != a.etag
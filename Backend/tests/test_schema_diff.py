@@ -0,0 +1,22 @@
+import pytest
+
+from connection.schema_diff import canonical_default
+
+
+@pytest.mark.parametrize("default, expected", [
+    (None, None),
+    ("((0))", "0"),
+    ("0::integer", "0"),
+    ("(getdate())", "getdate()"),
+    ("('now'::text)::date", "'now'"),
+    ("'abc'::character varying", "'abc'"),
+    ("'{}'::integer[]", "'{}'"),
+    ("12.50::numeric(10,2)", "12.50"),
+    ("nextval('s'::regclass)", "nextval('s'::regclass)"),
+    ("('Error::Unknown')", "'Error::Unknown'"),
+    ("'a)(b'", "'a)(b'"),
+    ("(1) + (2)", "(1) + (2)"),
+    ("  ((N'x'))  ", "N'x'"),
+])
+def test_canonical_default(default, expected):
+    assert canonical_default(default) == expected
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from connection.snapshot_store import FULL_MANIFEST_EVERY, SnapshotStore, namespace_dir
+
+
+def _catalog(version):
+    """A catalog that changes a little with every version: one database edited, one added, one dropped."""
+    catalog = {"Static": {"tables": [{"schema": "dbo", "name": "Config", "columns": []}]}}
+    catalog["Edited"] = {"tables": [{"schema": "dbo", "name": f"Orders_{version}", "columns": []}]}
+    if version % 3:
+        catalog[f"Added_{version % 3}"] = {"tables": [], "views": [f"v{version}"]}
+    return catalog
+
+
+def _manifest(store, snapshot_id):
+    with open(os.path.join(store.path, "snapshots", f"{snapshot_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _blobs(store):
+    objects = os.path.join(store.path, "objects")
+    return {name.split(".", 1)[0] for prefix in os.listdir(objects)
+            for name in os.listdir(os.path.join(objects, prefix))}
+
+
+def test_save_and_load_across_full_manifests(tmp_path):
+    store = SnapshotStore(str(tmp_path), "shop", retention=100)
+    count = 2 * FULL_MANIFEST_EVERY + 5
+    ids = [store.save(_catalog(v)) for v in range(count)]
+    assert len(set(ids)) == count
+    assert [entry["id"] for entry in store.list_snapshots()] == ids
+
+    # a delta chain is cut with a full manifest every FULL_MANIFEST_EVERY snapshots
+    full = [i for i, snapshot_id in enumerate(ids) if "databases" in _manifest(store, snapshot_id)]
+    assert full == list(range(0, count, FULL_MANIFEST_EVERY))
+    assert set(_manifest(store, ids[1])["changed"]) == {"Edited", "Added_1"}
+    assert _manifest(store, ids[3])["removed"] == ["Added_2"]
+
+    # a new store reads from disk rather than from the last saved snapshot
+    reopened = SnapshotStore(str(tmp_path), "shop", retention=100)
+    for version, snapshot_id in enumerate(ids):
+        loaded = reopened.load(snapshot_id)
+        assert loaded == _catalog(version)
+        assert list(loaded) == list(_catalog(version))
+        assert list(reopened.iter_databases(snapshot_id)) == list(_catalog(version).items())
+    assert reopened.load_latest() == (ids[-1], _catalog(count - 1))
+
+
+def test_unchanged_and_repeated_content(tmp_path):
+    store = SnapshotStore(str(tmp_path), "shop")
+    first = store.save(_catalog(0))
+    second = store.save(_catalog(1))
+    third = store.save(_catalog(2))
+    assert store.save(_catalog(2)) == third
+    assert len(store.list_snapshots()) == 3
+    assert store.version_of(_catalog(1)) == second
+
+    # older content saved again moves to the end as a full manifest; the deltas based on it still resolve
+    assert store.save(_catalog(0)) == first
+    assert [entry["id"] for entry in store.list_snapshots()] == [second, third, first]
+    assert "databases" in _manifest(store, first) and "parent" not in _manifest(store, first)
+    reopened = SnapshotStore(str(tmp_path), "shop")
+    assert reopened.load(second) == _catalog(1)
+    assert reopened.load(third) == _catalog(2)
+    assert reopened.load(first) == _catalog(0)
+
+
+def test_prune_rewrites_deltas_of_evicted_snapshots(tmp_path):
+    store = SnapshotStore(str(tmp_path), "shop", retention=3)
+    ids = [store.save(_catalog(v)) for v in range(6)]
+    kept = ids[-3:]
+    assert [entry["id"] for entry in store.list_snapshots()] == kept
+    assert sorted(os.listdir(os.path.join(store.path, "snapshots"))) == sorted(f"{i}.json" for i in kept)
+    # the oldest kept snapshot was a delta on an evicted one
+    assert "databases" in _manifest(store, kept[0]) and "parent" not in _manifest(store, kept[0])
+    assert _manifest(store, kept[1])["parent"] == kept[0]
+
+    reopened = SnapshotStore(str(tmp_path), "shop", retention=3)
+    for version, snapshot_id in zip(range(3, 6), kept):
+        assert reopened.load(snapshot_id) == _catalog(version)
+    with pytest.raises(KeyError):
+        reopened.load(ids[0])
+    # only blobs of kept snapshots remain
+    referenced = {h for i in kept for h in reopened._resolve(i)[1].values()}
+    assert _blobs(reopened) == referenced
+
+    assert reopened.prune(retention=1) == sorted(kept[:2])
+    assert reopened.load(kept[2]) == _catalog(5)
+
+
+def test_unknown_snapshot_ids(tmp_path):
+    store = SnapshotStore(str(tmp_path), "shop")
+    store.save(_catalog(0))
+    for snapshot_id in ("missing", "../index"):
+        with pytest.raises(KeyError):
+            SnapshotStore(str(tmp_path), "shop").load(snapshot_id)
+        with pytest.raises(KeyError):
+            store.iter_databases(snapshot_id)
+
+
+def test_namespace_dir():
+    assert namespace_dir("prod_01") == "prod_01"
+    assert namespace_dir("Prod DB").startswith("Prod_DB-")
+    assert namespace_dir("Prod DB") != namespace_dir("Prod_DB") != namespace_dir("Prod#DB")
+    for bad in ("", "..", "a/b", "a\\b", "x\0", None):
+        with pytest.raises(ValueError):
+            namespace_dir(bad)
@@ -5,6 +5,38 @@ import ReportDetails from "./ReportDetails";
 import { reportService } from "../service";
 import sampleMetadata from "../../data/sqlserver_metadata.json";
 
+// NDJSON record type -> key of the database entry it is appended to
+const RECORD_KEYS = {
+  table: "tables",
+  view: "views",
+  procedure: "procedures",
+  function: "functions",
+  trigger: "triggers",
+};
+
+// Merge one streamed metadata record into the { db: { tables, views, ... } } shape
+const applyMetadataRecord = (metadata, record) => {
+  if (record.type === "database") {
+    metadata[record.database] = {
+      tables: [],
+      views: [],
+      procedures: [],
+      functions: [],
+      triggers: [],
+    };
+  } else if (RECORD_KEYS[record.type]) {
+    metadata[record.database][RECORD_KEYS[record.type]].push(record.data);
+  } else if (record.type === "database_end") {
+    metadata[record.database].data_volume = record.data_volume;
+  } else if (record.type === "error") {
+    // an error without a database ended the whole stream, so what arrived is not the catalog
+    if (!record.database) {
+      throw new Error(record.message);
+    }
+    console.error(`Failed to read metadata for ${record.database}:`, record.message);
+  }
+};
+
 const Reports = () => {
   const [reports, setReports] = useState([
     {
@@ -35,19 +67,20 @@ const Reports = () => {
     setIsLoadingMetadata(true);
 
     try {
-      const response = await reportService.fetchSqlServerMetadata();
-
-      if (response.status === "success") {
-        console.log("SQL Server Metadata:", response.metadata);
-        setMetadata(response.metadata);
-      } else {
-        console.error("Failed to fetch metadata:", response.message);
-        // Fallback to sample data for testing
-        console.log("Loading sample metadata for testing...");
-        setMetadata(sampleMetadata);
-      }
+      // Databases are shown as soon as each one has been streamed, not after the whole server
+      const streamed = {};
+      await reportService.streamSqlServerMetadata((record) => {
+        applyMetadataRecord(streamed, record);
+        if (record.type === "database_end") {
+          setMetadata({ ...streamed });
+          setIsLoadingMetadata(false);
+        }
+      });
+      console.log("SQL Server Metadata:", streamed);
+      setMetadata({ ...streamed });
     } catch (error) {
       console.error("Error fetching SQL Server metadata:", error);
+      alert("Failed to fetch SQL Server metadata: " + error.message + "\nShowing sample metadata instead.");
       // Fallback to sample data for testing
       console.log("Loading sample metadata for testing...");
       setMetadata(sampleMetadata);
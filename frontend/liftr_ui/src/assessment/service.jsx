@@ -182,6 +182,37 @@ export const reportService = {
       throw error;
     }
   },
+
+  // Stream SQL Server metadata as NDJSON, calling onRecord for each database/object record
+  streamSqlServerMetadata: async (onRecord) => {
+    try {
+      // axios buffers the whole body, so read the chunked response with fetch instead
+      const response = await fetch(`${apiClient.defaults.baseURL}/fetch_sql_server_metadata`, {
+        headers: { Accept: "application/x-ndjson" },
+      });
+      if (!response.ok) {
+        throw new Error(`Metadata stream failed with status ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => onRecord(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        onRecord(JSON.parse(buffer));
+      }
+    } catch (error) {
+      console.error("Error streaming SQL Server metadata:", error);
+      throw error;
+    }
+  },
 };
 
 export default apiClient;